@@ -1,6 +1,10 @@
+import asyncio
 import json
 import logging
 import os
+import time
+import uuid
+import weakref
 
 # Set up logging immediately
 logging.basicConfig(level=logging.INFO)
@@ -8,13 +12,24 @@ logger = logging.getLogger(__name__)
 
 # Global variable to store initialized resources
 global_app = None
+global_durable_app = None
+global_llm = None
 global_bedrock_client = None
 global_fastapi_app = None
+global_single_flight = None
+global_llm_limiter = None
+global_checkpointer = None
+global_booking_assistant = None
+global_thread_locks = weakref.WeakValueDictionary()
+global_job_queue = None
+global_job_pool = None
+global_durable_runs = 0
 
 # Import FastAPI-related modules at the top
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, Field
-from typing import Any
+from typing import List, Literal, Optional
 from mangum import Mangum
 
 # Create pydantic model for the input
@@ -26,6 +41,55 @@ class ItineraryInput(BaseModel):
         ...,
         description="The user's message containing their interests and preferences for the itinerary."
     )
+    thread_id: Optional[str] = Field(
+        None,
+        description="Conversation thread; requests with a thread are never coalesced with other requests."
+    )
+
+class BookingDateChange(BaseModel):
+    booking_id: int
+    new_date: Optional[str] = Field(None, description="New departure date (flights), YYYY-MM-DD")
+    new_checkin_date: Optional[str] = Field(None, description="New check-in date (hotels), YYYY-MM-DD")
+    new_checkout_date: Optional[str] = Field(None, description="New check-out date (hotels), YYYY-MM-DD")
+
+class BookingBatchInput(BaseModel):
+    """
+    A batch of booking operations executed in a single transaction
+    """
+    operation: Literal["retrieve", "change_dates", "cancel", "list"]
+    kind: Literal["flight", "hotel"] = "flight"
+    booking_ids: List[int] = Field(default_factory=list, description="Bookings to retrieve or cancel")
+    changes: List[BookingDateChange] = Field(default_factory=list, description="Date changes for change_dates")
+    user_id: Optional[int] = Field(None, description="User whose bookings are listed")
+    page_size: int = Field(50, ge=1, le=500)
+    after_booking_id: int = Field(0, description="Last booking_id of the previous page")
+
+class BookingAssistantInput(BaseModel):
+    """
+    A message to the booking assistant; changes and cancellations wait for approval
+    """
+    message: str
+    thread_id: Optional[str] = Field(None, description="Conversation thread; a new one is started if omitted")
+    user_id: Optional[int] = Field(None, description="User whose bookings the assistant may list")
+
+class JobInput(BaseModel):
+    """
+    An itinerary request to run in the background
+    """
+    user_message: str
+    priority: Literal["interactive", "batch"] = "batch"
+    idempotency_key: Optional[str] = Field(None, description="Submitting the same key again returns the first job")
+
+class ApprovalDecisionInput(BaseModel):
+    """
+    Approve or deny pending tool calls of a thread
+    """
+    tool_call_ids: Optional[List[str]] = Field(None, description="Tool calls the decision covers; all pending ones if omitted")
+    reason: Optional[str] = Field(None, description="Why the calls were denied, passed back to the assistant")
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+# Seconds a client rejected by a full job queue is asked to wait
+JOB_QUEUE_RETRY_AFTER = "30"
 
 # Create FastAPI app at the top level
 fastAPI_app = FastAPI(
@@ -34,26 +98,146 @@ fastAPI_app = FastAPI(
     version="1.0.0",
 )
 
+def ensure_repo_modules():
+    """
+    Make the shared modules at the repository root (booking_repository, fake_llm, ...)
+    importable. In Lambda they are copied next to this file; locally this file is run
+    from its own directory.
+    """
+    import sys
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if repo_root not in sys.path and os.path.exists(os.path.join(repo_root, "booking_repository.py")):
+        sys.path.append(repo_root)
+
 def initialize_resources():
     """
     Lazy initialization of expensive resources.
     Only called when needed, not during cold start.
     """
-    global global_app, global_bedrock_client
+    global global_app
     
     # Check if already initialized
     if global_app is not None:
         return global_app
     
     logger.info("Initializing resources...")
+    global_app = build_itinerary_graph(get_llm())
+    logger.info("Resources initialized successfully")
+    
+    return global_app
+
+def get_llm():
+    """
+    The shared chat model, behind the LLM concurrency limiter.
+    """
+    global global_llm, global_bedrock_client
+    if global_llm is not None:
+        return global_llm
+    
+    # LLM_BACKEND=fake swaps Bedrock for the local stand-in, for offline load testing
+    if os.environ.get("LLM_BACKEND", "bedrock").lower() == "fake":
+        ensure_repo_modules()
+        from fake_llm import llm_from_env
+        llm = llm_from_env()
+        logger.info("Using fake LLM backend: %r", llm)
+        if model_routing_enabled():
+            from model_router import fake_router
+            llm = fake_router(llm)
+        global_llm = limit_llm_concurrency(llm)
+        return global_llm
     
     import boto3
+    from langchain_aws import ChatBedrockConverse
+    
+    # Initialize bedrock client
+    global_bedrock_client = boto3.client("bedrock-runtime")
+    
+    # Create the llm: small and large models routed by request complexity, or a single model
+    if model_routing_enabled():
+        ensure_repo_modules()
+        from model_router import bedrock_router
+        llm = bedrock_router(global_bedrock_client, temperature=0.1)
+    else:
+        llm = ChatBedrockConverse(
+            model="us.amazon.nova-lite-v1:0",
+            provider='amazon', 
+            temperature=0.1, 
+            max_tokens=512,
+            client=global_bedrock_client,
+        )
+    
+    global_llm = limit_llm_concurrency(llm)
+    return global_llm
+
+def model_routing_enabled():
+    return os.environ.get("MODEL_ROUTER", "1") != "0"
+
+def get_llm_limiter():
+    """
+    The process-wide adaptive concurrency limiter for LLM calls, or None when LLM_LIMITER=0.
+    Its limit, queue depth and rejections are exported on /metrics.
+    """
+    global global_llm_limiter
+    if os.environ.get("LLM_LIMITER", "1") == "0":
+        return None
+    if global_llm_limiter is None:
+        ensure_repo_modules()
+        from concurrency_limiter import PRIORITIES, AdaptiveConcurrencyLimiter
+        from deadline import use_step_latency
+        from instrumentation import METRICS
+        limiter = global_llm_limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=int(os.environ.get("LLM_CONCURRENCY_INITIAL", "8")),
+            max_limit=int(os.environ.get("LLM_CONCURRENCY_MAX", "64")),
+            max_queue=int(os.environ.get("LLM_QUEUE_SIZE", "100")),
+            queue_timeout=float(os.environ.get("LLM_QUEUE_TIMEOUT_SECONDS", "30")),
+        )
+        # The time a deadline keeps for an LLM step follows the latency of the calls
+        use_step_latency(lambda: limiter.latency)
+        METRICS.callback("llm_concurrency_limit", "Current adaptive limit of concurrent LLM calls", lambda: limiter.limit)
+        METRICS.callback("llm_inflight_requests", "LLM calls in flight", lambda: limiter.inflight)
+        METRICS.callback(
+            "llm_queue_depth", "LLM calls waiting for a slot", lambda: {p: limiter.queue_depth(p) for p in PRIORITIES},
+            labels=("priority",),
+        )
+        METRICS.callback(
+            "llm_limiter_rejected_total", "LLM calls rejected by the limiter", lambda: dict(limiter.rejected),
+            kind="counter", labels=("priority",),
+        )
+        METRICS.callback("llm_throttled_total", "LLM calls throttled by the backend", lambda: limiter.throttled, kind="counter")
+    return global_llm_limiter
+
+def limit_llm_concurrency(llm):
+    limiter = get_llm_limiter()
+    if limiter is None:
+        return llm
+    from concurrency_limiter import LimitedChatModel
+    return LimitedChatModel(model=llm, limiter=limiter)
+
+def build_itinerary_graph(llm, checkpointer=None):
+    """
+    Build and compile the itinerary workflow around the given chat model.
+    
+    Args:
+        llm: A LangChain chat model that supports tool calling
+        checkpointer: Saver for durable runs. With one, every step is checkpointed and
+            errors are raised instead of being written into the itinerary, so that a
+            retry resumes the run where it failed
+        
+    Returns:
+        The compiled LangGraph workflow
+    """
     from typing import TypedDict, Annotated, List, Optional
     from langgraph.graph import StateGraph, END
     from langchain_core.messages import HumanMessage, AIMessage
-    from langchain_aws import ChatBedrockConverse
     from langgraph.prebuilt import create_react_agent
     from langchain_core.tools import tool
+    ensure_repo_modules()
+    from concurrency_limiter import LimiterRejected
+    from multi_city import ROUTE_ORDERS, CityPlan, city_planner, combine_city_plans, dispatch_cities, merge_city_plans
+    from deadline import DeadlineExceeded, current_deadline, partial_itinerary, ran_out_of_steps, skip_when_short, step_seconds
+    from instrumentation import DEADLINE_TRIGGERED
+    from langgraph.errors import GraphRecursionError
+    from message_utils import final_text
     
     # Define PlannerState class for StateGraph
     class PlannerState(TypedDict):
@@ -63,18 +247,9 @@ def initialize_resources():
         user_message: str
         weather_info: Optional[str]
         attractions_info: Optional[str]
-    
-    # Initialize bedrock client
-    global_bedrock_client = boto3.client("bedrock-runtime")
-    
-    # Create the llm
-    llm = ChatBedrockConverse(
-        model="us.amazon.nova-lite-v1:0",
-        provider='amazon', 
-        temperature=0.1, 
-        max_tokens=512,
-        client=global_bedrock_client,
-    )
+        # Multi-city mode: the planned cities and one plan per city from the parallel workers
+        cities: List[str]
+        city_plans: Annotated[List[CityPlan], merge_city_plans]
     
     # Define tool functions
     @tool
@@ -143,10 +318,12 @@ def initialize_resources():
         except Exception as e:
             return f"An error occurred while getting the weather forecast for {city}: {str(e)}"
     
-    tools = [mock_search_tourist_attractions, mock_get_weather_forecast]
+    # The weather is skipped when the request deadline is close
+    tools = [mock_search_tourist_attractions, skip_when_short(mock_get_weather_forecast)]
     
     # Create the ReAct agent
     get_realtime_info_react_llm = create_react_agent(llm, tools=tools)
+    max_steps = int(os.environ.get("ITINERARY_MAX_STEPS", "12"))
     
     # Define workflow nodes
     def input_interest(state: PlannerState) -> PlannerState:
@@ -157,13 +334,31 @@ def initialize_resources():
     def create_itinerary(state: PlannerState) -> PlannerState:
         try:
             messages = [HumanMessage(content=state['user_message'])]
-            agent_input = {"messages": messages}
-            result = get_realtime_info_react_llm.invoke(agent_input)
+            deadline = current_deadline()
+            stopped = None
+            try:
+                for values in get_realtime_info_react_llm.stream(
+                    {"messages": messages}, {"recursion_limit": max_steps}, stream_mode="values"
+                ):
+                    messages = values["messages"]
+                    # Unless the last message asks for tools, the next step is an LLM call.
+                    # The first one always runs: without it there is nothing to answer with
+                    next_is_llm = not isinstance(messages[-1], AIMessage)
+                    took_step = any(isinstance(m, AIMessage) for m in messages)
+                    if next_is_llm and took_step and deadline is not None and deadline.short(step_seconds()):
+                        stopped = "stopped_early"
+                        break
+            except GraphRecursionError:
+                stopped = "step_limit"
+            if ran_out_of_steps(messages):
+                stopped = "step_limit"
             
-            if isinstance(result, dict) and "output" in result:
-                itinerary = result["output"]
+            if stopped:
+                logger.warning(f"Itinerary planning cut short ({stopped}), returning a partial itinerary")
+                DEADLINE_TRIGGERED.inc(stopped)
+                itinerary = partial_itinerary(messages)
             else:
-                itinerary = str(result)
+                itinerary = final_text(messages)
             
             return {
                 **state,
@@ -174,8 +369,14 @@ def initialize_resources():
                 ],
                 'itinerary': itinerary
             }
+        except (LimiterRejected, DeadlineExceeded):
+            # Backpressure and a missed deadline go back to the client as a 429 or a 504
+            # instead of an apology in the itinerary
+            raise
         except Exception as e:
             logger.error(f"Error creating itinerary: {e}")
+            if checkpointer is not None:
+                raise
             error_message = f"Error creating itinerary: {str(e)}"
             
             return {
@@ -193,27 +394,260 @@ def initialize_resources():
     workflow.add_node("input_user_interests", input_interest)
     workflow.add_node("create_itinerary", create_itinerary)
     workflow.set_entry_point("input_user_interests")
-    workflow.add_edge("input_user_interests", "create_itinerary")
     workflow.add_edge("create_itinerary", END)
     
-    global_app = workflow.compile()
-    logger.info("Resources initialized successfully")
+    if not multi_city_enabled():
+        workflow.add_edge("input_user_interests", "create_itinerary")
+        return workflow.compile(checkpointer=checkpointer)
     
-    return global_app
+    # Requests naming several cities fan out to one worker per city, then merge the plans
+    # in the visit order from the route optimizer
+    timeout = os.environ.get("MULTI_CITY_TIMEOUT_SECONDS")
+    route_objective = os.environ.get("MULTI_CITY_ROUTE", "distance")
+    if route_objective not in ROUTE_ORDERS:
+        raise ValueError(f"MULTI_CITY_ROUTE must be one of {', '.join(ROUTE_ORDERS)}, got {route_objective!r}")
+    workflow.add_node("plan_city", city_planner(
+        llm, tools, timeout=float(timeout) if timeout else None, raise_errors=checkpointer is not None,
+        max_attempts=int(os.environ.get("DURABLE_CITY_ATTEMPTS", "3")),
+    ))
+    workflow.add_node("combine_city_plans", combine_city_plans(llm))
+    workflow.add_conditional_edges(
+        "input_user_interests",
+        lambda state: dispatch_cities(state, "create_itinerary", route_objective),
+        ["create_itinerary", "plan_city"],
+    )
+    workflow.add_edge("plan_city", "combine_city_plans")
+    workflow.add_edge("combine_city_plans", END)
+    return workflow.compile(checkpointer=checkpointer).with_config(max_concurrency=int(os.environ.get("MULTI_CITY_WORKERS", "4")))
+
+def multi_city_enabled():
+    return os.environ.get("MULTI_CITY", "1") != "0"
+
+@fastAPI_app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    """
+    Per-request timings: HTTP metrics, a structured log line and, with SERVER_TIMING=1,
+    a Server-Timing header. Graph timings are added by the endpoints through request.state.
+    """
+    ensure_repo_modules()
+    from instrumentation import HTTP_DURATION, RequestTimings
+
+    timings = request.state.timings = RequestTimings()
+    response = await call_next(request)
+    # Label by route template rather than raw path to keep the number of series bounded
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    HTTP_DURATION.observe(time.perf_counter() - timings.started, request.method, path, str(response.status_code))
+    if os.environ.get("SERVER_TIMING") == "1":
+        response.headers["Server-Timing"] = timings.server_timing()
+    if path != "/metrics":
+        logger.info(timings.log_line(method=request.method, path=path, status=response.status_code))
+    return response
+
+@fastAPI_app.get("/metrics")
+async def metrics():
+    """
+    Prometheus text-format metrics for nodes, tools, LLM calls and HTTP requests.
+    """
+    from instrumentation import METRICS
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
 
 # Define the FastAPI endpoint
 @fastAPI_app.post("/generate-itinerary")
-async def generate_itinerary(request: dict):
+async def generate_itinerary(request: dict, http_request: Request, http_response: Response):
+    """
+    Generate an itinerary and wait for it. The run happens in the request itself rather
+    than on the job workers, so interactive requests never queue behind background jobs.
+    """
     # Extract user message from either user_message or question field
     user_message = request.get('user_message', '')
     if not user_message and 'question' in request:
         user_message = request.get('question', '')
     
     logger.info(f"Received request with message: {user_message}")
+    ensure_repo_modules()
+    from deadline import DEADLINE_HEADER, request_deadline
+    # The graph wraps up before the Lambda timeout or the client's deadline (counted from
+    # the start of the request, cold start included), whichever comes first
+    try:
+        deadline = request_deadline(
+            itinerary_timeout(), http_request.scope.get("aws.context"), http_request.headers.get(DEADLINE_HEADER)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    job_request = itinerary_job_request(
+        user_message,
+        request.get('priority', 'interactive'),
+        deadline.remaining(),
+        idempotency_key=http_request.headers.get(IDEMPOTENCY_HEADER) or request.get('idempotency_key'),
+        thread_id=request.get('thread_id'),
+    )
+    result, replayed = await execute_itinerary(job_request, http_request.state.timings, deadline)
+    if replayed:
+        http_response.headers["Idempotent-Replayed"] = "true"
+    return itinerary_response(user_message, result)
+
+def itinerary_job_request(user_message, priority, timeout, idempotency_key=None, thread_id=None, durable=False):
+    """
+    Validated input of an itinerary job, with the wall-clock time its run has to finish by.
+    Durable jobs without an idempotency key checkpoint their run under the job ID, so a job
+    picked up again after a crash resumes where it stopped.
+    """
+    from concurrency_limiter import PRIORITIES
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"priority must be one of {sorted(PRIORITIES)}")
+    if idempotency_key and len(idempotency_key) > 255:
+        raise HTTPException(status_code=400, detail="Idempotency keys are at most 255 characters")
+    return {
+        "user_message": user_message,
+        "priority": priority,
+        "deadline_at": time.time() + timeout,
+        "idempotency_key": idempotency_key,
+        "thread_id": thread_id,
+        "durable": durable,
+    }
+
+async def run_itinerary_job(job, progress):
+    """
+    Job handler: run the itinerary graph for a queued job and return the response body.
+    Errors are raised as JobFailed with the status code the synchronous endpoint returns.
+    """
+    from deadline import Deadline
+    from instrumentation import RequestTimings
+    from job_queue import JobFailed
+    request = job["request"]
+    if request.get("durable") and not request.get("idempotency_key"):
+        request = {**request, "idempotency_key": f"job:{job['id']}"}
+    deadline = Deadline(request["deadline_at"] - time.time())
+    if deadline.remaining() <= 0:
+        raise JobFailed(504, "Itinerary generation timed out before the job started")
+    timings = RequestTimings()
+    steps = []
+    
+    def on_update(namespace, update):
+        steps.extend(itinerary_steps(namespace, update))
+        progress({"steps": steps, "partial": partial_output(update)})
+    
+    try:
+        result, replayed = await execute_itinerary(request, timings, deadline, on_update)
+    except HTTPException as e:
+        raise JobFailed(e.status_code, e.detail, e.headers)
+    response = itinerary_response(request["user_message"], result)
+    if replayed:
+        response["replayed"] = True
+    return response
+
+async def execute_itinerary(request, timings, deadline, on_update=None):
+    """
+    Run the itinerary graph for a job request: as a durable run when it has an
+    idempotency key, coalesced with identical in-flight requests otherwise.
+    
+    Returns:
+        tuple: (final state, whether it was a stored result of a durable run)
+    Raises:
+        HTTPException: 429 when the LLM limiter rejects the run, 504 at the deadline
+    """
+    from concurrency_limiter import LimiterRejected, llm_priority
+    from deadline import DeadlineExceeded, deadline_scope
+    from instrumentation import DEADLINE_TRIGGERED, ITINERARY_REQUESTS, GraphInstrumentation
     app = initialize_resources()
+    user_message, priority = request["user_message"], request["priority"]
+    idempotency_key = request.get("idempotency_key")
     input_data = {"user_message": user_message}
-    result = app.invoke(input_data)
-    
+    config = {"callbacks": [GraphInstrumentation(timings)]}
+    single_flight = get_single_flight()
+    replayed = False
+    try:
+        with llm_priority(priority), deadline_scope(deadline):
+            if idempotency_key:
+                result, replayed = await asyncio.wait_for(
+                    run_durable_itinerary(idempotency_key, input_data, config, on_update), deadline.remaining()
+                )
+            elif single_flight is None or request.get('thread_id'):
+                result = await asyncio.wait_for(run_graph(app, input_data, config, on_update), deadline.remaining())
+                ITINERARY_REQUESTS.inc("unshared")
+            else:
+                from request_coalescing import normalize_message
+                # The shared run stops at the deadline of the request that started it, so only
+                # requests whose deadlines fall in the same COALESCE_DEADLINE_WINDOW_SECONDS share it
+                window = float(os.environ.get("COALESCE_DEADLINE_WINDOW_SECONDS", "5"))
+                key = (priority, normalize_message(user_message), int(deadline.expires_at // window))
+                # Every waiter gets the progress of the shared run, not only the one that started it
+                result, shared = await asyncio.wait_for(
+                    single_flight.do_with_updates(
+                        key, run_graph, app, input_data, config, on_update=on_update, timeout=deadline.remaining()
+                    ),
+                    deadline.remaining(),
+                )
+                ITINERARY_REQUESTS.inc("coalesced" if shared else "executed")
+    except (asyncio.TimeoutError, DeadlineExceeded) as e:
+        logger.error(f"Itinerary generation timed out for message: {user_message}")
+        DEADLINE_TRIGGERED.inc("timeout")
+        detail = str(e) if isinstance(e, DeadlineExceeded) else "Itinerary generation timed out"
+        if idempotency_key:
+            detail += f", retry with the same {IDEMPOTENCY_HEADER} to resume it"
+        raise HTTPException(status_code=504, detail=detail)
+    except LimiterRejected as e:
+        logger.warning(f"Rejected itinerary request: {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    return result, replayed
+
+async def run_graph(graph, graph_input, config, on_update=None):
+    """
+    Run a graph to its final state, passing every node's update, subgraphs included,
+    to on_update(namespace, update) if given.
+    """
+    if on_update is None:
+        return await graph.ainvoke(graph_input, config)
+    result = None
+    async for namespace, mode, chunk in graph.astream(
+        graph_input, config, stream_mode=["updates", "values"], subgraphs=True
+    ):
+        if mode == "updates":
+            on_update(namespace, chunk)
+        elif not namespace:
+            result = chunk
+    return result
+
+def itinerary_steps(namespace, update):
+    """
+    Progress labels for one streamed update, e.g. "create_itinerary/tools: mock_get_weather_forecast".
+    """
+    prefix = "".join(f"{part.split(':')[0]}/" for part in namespace)
+    steps = []
+    for node, values in (update or {}).items():
+        label = prefix + node
+        if isinstance(values, dict):
+            tools = [m.name for m in values.get("messages") or [] if getattr(m, "type", None) == "tool"]
+            cities = [plan["city"] for plan in values.get("city_plans") or []]
+            if tools or cities:
+                label += ": " + ", ".join(tools or cities)
+        steps.append(label)
+    return steps
+
+def partial_output(update):
+    """
+    The newest text of a streamed update: an itinerary, a city plan or an answer of the agent.
+    """
+    from message_utils import final_text
+    for values in (update or {}).values():
+        if not isinstance(values, dict):
+            continue
+        if values.get("itinerary"):
+            return values["itinerary"]
+        if values.get("city_plans"):
+            plan = values["city_plans"][-1]
+            return plan["plan"] or f"{plan['city']}: {plan['error']}"
+        answers = [m for m in values.get("messages") or [] if getattr(m, "type", None) == "ai" and not m.tool_calls]
+        text = final_text(answers)
+        if text:
+            return text
+    return None
+
+def itinerary_response(user_message, result):
+    """
+    The response expected by the Streamlit app for the final state of an itinerary run.
+    """
     # Find the AI message with the final response
     ai_message_content = ""
     if "messages" in result and len(result["messages"]) > 0:
@@ -270,6 +704,438 @@ async def generate_itinerary(request: dict):
         ]
     }
 
+async def run_durable_itinerary(idempotency_key, input_data, config, on_update=None):
+    """
+    Run the itinerary graph as a durable run identified by an idempotency key.
+
+    Every step of the run is checkpointed in the thread "itinerary:<key>". A key whose run
+    completed returns the stored result without running anything; a key whose run failed
+    or timed out resumes it from the last completed step, so finished LLM and tool calls
+    are not repeated. A city that keeps failing is retried DURABLE_CITY_ATTEMPTS times, then
+    reported as failed in the itinerary. Once the run completes only its final checkpoint is kept.
+
+    Returns:
+        tuple: (final state, whether it was a stored result)
+    """
+    from concurrency_limiter import LimiterRejected
+    from deadline import DeadlineExceeded
+    from instrumentation import ITINERARY_REQUESTS
+    from multi_city import CITY_ATTEMPTS, failed_city_attempts
+    graph = get_durable_itinerary_graph()
+    thread_id = f"itinerary:{idempotency_key}"
+    config = {**config, "configurable": {"thread_id": thread_id}}
+    async with thread_lock(thread_id):
+        snapshot = await graph.aget_state(config)
+        if snapshot.values and snapshot.values.get("user_message") != input_data["user_message"]:
+            raise HTTPException(status_code=409, detail="Idempotency key already used for a different request")
+        if snapshot.values and not snapshot.next:
+            ITINERARY_REQUESTS.inc("replayed")
+            return snapshot.values, True
+        try:
+            if snapshot.next:
+                logger.info(f"Resuming itinerary run {thread_id} at {', '.join(snapshot.next)}")
+                attempts = failed_city_attempts(task.error for task in snapshot.tasks)
+                config["configurable"][CITY_ATTEMPTS] = attempts
+                result = await run_graph(graph, None, config, on_update)
+                ITINERARY_REQUESTS.inc("resumed")
+            else:
+                result = await run_graph(graph, input_data, config, on_update)
+                ITINERARY_REQUESTS.inc("durable")
+        except (LimiterRejected, DeadlineExceeded):
+            raise
+        except Exception as e:
+            logger.error(f"Itinerary run {thread_id} failed: {e}")
+            raise HTTPException(
+                status_code=503, detail=f"Itinerary generation failed, retry with the same {IDEMPOTENCY_HEADER} to resume it"
+            )
+        clean_up_durable_runs(thread_id)
+    return result, False
+
+def clean_up_durable_runs(thread_id):
+    """
+    After a durable run completed: drop every checkpoint of its thread but the final one,
+    which replays the result, and every 100 runs delete the itinerary threads not written
+    to for DURABLE_RETENTION_SECONDS (default one day). Checkpointers without
+    `prune_thread` and `stale_threads` (e.g. a remote one from CHECKPOINTER) keep everything.
+    """
+    global global_durable_runs
+    checkpointer = get_checkpointer()
+    if not hasattr(checkpointer, "prune_thread"):
+        return
+    checkpointer.prune_thread(thread_id)
+    global_durable_runs += 1
+    # The first run of an instance purges too: Lambda instances rarely reach 100 runs
+    if global_durable_runs % 100 == 1:
+        retention = float(os.environ.get("DURABLE_RETENTION_SECONDS", "86400"))
+        for stale_thread_id in checkpointer.stale_threads("itinerary:", retention):
+            checkpointer.delete_thread(stale_thread_id)
+
+def get_durable_itinerary_graph():
+    """
+    The itinerary graph checkpointing every step, for requests with an idempotency key.
+    """
+    global global_durable_app
+    if global_durable_app is None:
+        global_durable_app = build_itinerary_graph(get_llm(), checkpointer=get_checkpointer())
+    return global_durable_app
+
+def get_job_queue():
+    """
+    The SQLite job queue of the itinerary jobs, at JOB_DB (a file in the temp directory by
+    default). Job counts by status are exported on /metrics.
+    """
+    global global_job_queue
+    if global_job_queue is None:
+        import tempfile
+        ensure_repo_modules()
+        from instrumentation import METRICS
+        from job_queue import JobQueue
+        queue = global_job_queue = JobQueue(
+            os.environ.get("JOB_DB", os.path.join(tempfile.gettempdir(), "travel_jobs.db")),
+            retention_seconds=float(os.environ.get("JOB_RETENTION_SECONDS", "86400")),
+            max_queued=int(os.environ.get("JOB_QUEUE_MAX", "1000")),
+        )
+        METRICS.callback("itinerary_jobs", "Itinerary jobs by status", queue.counts, labels=("status",))
+        METRICS.callback(
+            "itinerary_job_workers_busy", "Job workers running a job",
+            lambda: global_job_pool.running if global_job_pool is not None else 0,
+        )
+    return global_job_queue
+
+def get_job_pool():
+    """
+    The asyncio workers running itinerary jobs, JOB_WORKERS at once (default 16). They are
+    started on first use, on the running event loop.
+    """
+    global global_job_pool
+    if global_job_pool is None or not global_job_pool.alive():
+        from job_queue import JobWorkerPool
+        global_job_pool = JobWorkerPool(
+            get_job_queue(), run_itinerary_job, concurrency=int(os.environ.get("JOB_WORKERS", "16"))
+        )
+        global_job_pool.start()
+    return global_job_pool
+
+def job_view(job):
+    """
+    A job as returned by the job endpoints.
+    """
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "user_message": job["request"]["user_message"],
+        "priority": job["request"]["priority"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "progress": job["progress"],
+        "result": job["result"],
+        "error": job["error"],
+    }
+
+@fastAPI_app.post("/jobs", status_code=202)
+async def create_job(request: JobInput, http_request: Request):
+    """
+    Queue an itinerary job and return its ID right away; poll GET /jobs/{job_id} or
+    follow GET /jobs/{job_id}/stream for its progress and result.
+    """
+    idempotency_key = http_request.headers.get(IDEMPOTENCY_HEADER) or request.idempotency_key
+    job_request = itinerary_job_request(
+        request.user_message, request.priority, float(os.environ.get("JOB_TIMEOUT_SECONDS", "600")),
+        idempotency_key=idempotency_key, durable=True,
+    )
+    queue = get_job_queue()
+    get_job_pool()
+    from job_queue import QueueFull
+    try:
+        job_id, created = queue.submit(job_request, request.priority, idempotency_key=idempotency_key)
+    except QueueFull as e:
+        logger.warning(f"Rejected itinerary job: {e}")
+        raise HTTPException(status_code=429, detail=f"Too many queued jobs: {e}", headers={"Retry-After": JOB_QUEUE_RETRY_AFTER})
+    return {"job_id": job_id, "status": queue.get(job_id)["status"], "created": created}
+
+@fastAPI_app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Status of a job, with its partial output while it runs and its result or error at the end.
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job_view(job)
+
+@fastAPI_app.get("/jobs/{job_id}/stream")
+async def stream_job(job_id: str):
+    """
+    Server-sent events with the job every time it changes: "progress" events while it is
+    queued or running, then one "done" event with its result or error.
+    """
+    from fastapi.responses import StreamingResponse
+    from job_queue import FINISHED
+    queue = get_job_queue()
+    if queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    
+    async def events():
+        async for job in queue.changes(job_id):
+            event = "done" if job["status"] in FINISHED else "progress"
+            yield f"event: {event}\ndata: {json.dumps(job_view(job))}\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@fastAPI_app.post("/generate-itinerary/batch")
+async def generate_itinerary_batch(http_request: Request, concurrency: Optional[int] = None, dedupe: bool = True):
+    """
+    Generate itineraries for an NDJSON body in the shape of requests.jsonl, one entry per line.
+    Entries run at batch priority, `concurrency` (default BATCH_CONCURRENCY or 8) at a time,
+    and identical prompts run once. The response streams one NDJSON line per entry as it
+    finishes, with its `index` in the batch, then a summary line.
+    """
+    from fastapi.responses import StreamingResponse
+    ensure_repo_modules()
+    from batch_itinerary import run_batch
+    from deadline import Deadline
+    if concurrency is None:
+        concurrency = int(os.environ.get("BATCH_CONCURRENCY", "8"))
+    if not 1 <= concurrency <= 64:
+        raise HTTPException(status_code=400, detail="concurrency must be between 1 and 64")
+    # Read the whole body first: once the response streams, Starlette reads the request's
+    # channel to detect disconnects and the rest of the body would be lost
+    lines = (await http_request.body()).splitlines()
+    timings = http_request.state.timings
+    initialize_resources()
+
+    async def run(prompt, entry):
+        request = itinerary_job_request(prompt, "batch", itinerary_timeout())
+        result, _ = await execute_itinerary(request, timings, Deadline(itinerary_timeout()))
+        return itinerary_response(prompt, result)["result"][-1]["content"]
+
+    async def records():
+        async for record in run_batch(lines, run, concurrency=concurrency, dedupe=dedupe):
+            yield json.dumps(record) + "\n"
+
+    logger.info("Itinerary batch of %d lines, concurrency %d", len(lines), concurrency)
+    return StreamingResponse(records(), media_type="application/x-ndjson")
+
+def itinerary_timeout():
+    return float(os.environ.get("ITINERARY_TIMEOUT_SECONDS", "120"))
+
+def get_single_flight():
+    """
+    Shared SingleFlight for identical concurrent itinerary requests, or None when
+    COALESCE_REQUESTS=0.
+    """
+    global global_single_flight
+    if os.environ.get("COALESCE_REQUESTS", "1") == "0":
+        return None
+    if global_single_flight is None:
+        ensure_repo_modules()
+        from request_coalescing import SingleFlight
+        global_single_flight = SingleFlight(timeout=itinerary_timeout())
+    return global_single_flight
+
+def get_repository():
+    """
+    Lazily open the shared booking repository (pooled SQLite connections).
+    """
+    ensure_repo_modules()
+    from booking_repository import DEFAULT_DB_PATH, get_booking_repository
+    return get_booking_repository(os.environ.get("TRAVEL_BOOKINGS_DB", DEFAULT_DB_PATH))
+
+@fastAPI_app.post("/bookings/batch")
+async def bookings_batch(request: BookingBatchInput):
+    """
+    Retrieve, re-date, cancel or list many bookings with one request.
+    """
+    import sqlite3
+
+    repository = get_repository()
+    from booking_repository import FLIGHT_COLUMNS, HOTEL_COLUMNS
+    columns = FLIGHT_COLUMNS if request.kind == "flight" else HOTEL_COLUMNS
+    logger.info("Booking batch: %s %s bookings", request.operation, request.kind)
+
+    try:
+        if request.operation == "retrieve":
+            if request.kind == "flight":
+                rows = await repository.aget_flight_bookings(request.booking_ids)
+            else:
+                rows = await repository.aget_hotel_bookings(request.booking_ids)
+            return {
+                "bookings": [dict(zip(columns, rows[i])) for i in request.booking_ids if i in rows],
+                "not_found": [i for i in request.booking_ids if i not in rows],
+            }
+
+        if request.operation == "cancel":
+            if request.kind == "flight":
+                results = await repository.acancel_flight_bookings(request.booking_ids)
+            else:
+                results = await repository.acancel_hotel_bookings(request.booking_ids)
+            return {"results": [{"booking_id": i, "cancelled": ok} for i, ok in results.items()]}
+
+        if request.operation == "change_dates":
+            if request.kind == "flight":
+                if any(change.new_date is None for change in request.changes):
+                    raise HTTPException(status_code=400, detail="Flight date changes require new_date")
+                results = await repository.achange_flight_dates([(c.booking_id, c.new_date) for c in request.changes])
+                return {"results": [{"booking_id": i, "updated": ok} for i, ok in results.items()]}
+            results = await repository.achange_hotel_dates_many(
+                [(c.booking_id, c.new_checkin_date, c.new_checkout_date) for c in request.changes]
+            )
+            return {
+                "results": [
+                    {"booking_id": i, "updated": updated is not None,
+                     **(dict(zip(("check_in_date", "check_out_date", "nights", "total_price"), updated)) if updated else {})}
+                    for i, updated in results.items()
+                ]
+            }
+
+        # operation == "list"
+        if request.user_id is None:
+            raise HTTPException(status_code=400, detail="Listing bookings requires user_id")
+        if request.kind == "flight":
+            rows = await repository.aflight_bookings_for_user(request.user_id, request.page_size, request.after_booking_id)
+        else:
+            rows = await repository.ahotel_bookings_for_user(request.user_id, request.page_size, request.after_booking_id)
+        return {
+            "bookings": [dict(zip(columns, row)) for row in rows],
+            "next_after_booking_id": rows[-1][0] if len(rows) == request.page_size else None,
+        }
+    except ValueError as e:
+        # e.g. malformed dates in hotel date changes
+        raise HTTPException(status_code=400, detail=str(e))
+    except sqlite3.Error as e:
+        logger.error("Booking batch failed: %s", e)
+        raise HTTPException(status_code=500, detail="Booking database error")
+
+def get_checkpointer():
+    """
+    Durable checkpointer shared by the graphs that stop for human input and the durable
+    itinerary runs. By default it is SQLite at CHECKPOINT_DB, a file in the temp directory
+    (/tmp on Lambda) unless set. For approvals and retries to resume on any instance,
+    CHECKPOINTER can name a factory of a remote saver as "module:function", e.g. one
+    returning a langgraph-checkpoint-postgres PostgresSaver.
+    """
+    global global_checkpointer
+    if global_checkpointer is None:
+        ensure_repo_modules()
+        factory = os.environ.get("CHECKPOINTER")
+        if factory:
+            import importlib
+            module_name, _, function_name = factory.partition(":")
+            global_checkpointer = getattr(importlib.import_module(module_name), function_name)()
+            logger.info("Using checkpointer from %s", factory)
+            return global_checkpointer
+        import tempfile
+        from checkpointer import SQLiteCheckpointSaver
+        db_path = os.environ.get("CHECKPOINT_DB", os.path.join(tempfile.gettempdir(), "travel_checkpoints.db"))
+        global_checkpointer = SQLiteCheckpointSaver(db_path)
+    return global_checkpointer
+
+def get_booking_assistant():
+    global global_booking_assistant
+    if global_booking_assistant is None:
+        ensure_repo_modules()
+        from human_approval import build_booking_assistant
+        global_booking_assistant = build_booking_assistant(get_llm(), checkpointer=get_checkpointer())
+    return global_booking_assistant
+
+def thread_lock(thread_id):
+    """
+    Lock serializing the runs of one thread, so a decision cannot be applied twice.
+    """
+    lock = global_thread_locks.get(thread_id)
+    if lock is None:
+        lock = global_thread_locks[thread_id] = asyncio.Lock()
+    return lock
+
+async def assistant_response(graph, config):
+    """
+    The thread's last assistant message and the tool calls still waiting for approval.
+    """
+    from human_approval import pending_approvals
+    from message_utils import final_text
+    snapshot = await graph.aget_state(config)
+    pending = pending_approvals(snapshot)
+    return {
+        "thread_id": config["configurable"]["thread_id"],
+        "status": "awaiting_approval" if pending else "completed",
+        "response": final_text(snapshot.values.get("messages", [])),
+        "pending_approvals": pending,
+    }
+
+@fastAPI_app.post("/booking-assistant")
+async def booking_assistant(request: BookingAssistantInput, http_request: Request):
+    """
+    Send a message to the booking assistant. When it wants to change or cancel bookings
+    the run stops with status "awaiting_approval" until /approvals/{thread_id} decides.
+    """
+    graph = get_booking_assistant()
+    thread_id = request.thread_id or str(uuid.uuid4())
+    config = {"configurable": {"thread_id": thread_id, "user_id": request.user_id}}
+    from instrumentation import GraphInstrumentation
+    async with thread_lock(thread_id):
+        from human_approval import pending_approvals
+        if pending_approvals(await graph.aget_state(config)):
+            raise HTTPException(status_code=409, detail="The thread has tool calls waiting for approval")
+        await graph.ainvoke(
+            {"messages": [("user", request.message)]},
+            {**config, "callbacks": [GraphInstrumentation(http_request.state.timings)]},
+        )
+        return await assistant_response(graph, config)
+
+@fastAPI_app.get("/approvals/{thread_id}")
+async def list_approvals(thread_id: str):
+    """
+    Tool calls of the thread waiting for approval.
+    """
+    graph = get_booking_assistant()
+    from human_approval import pending_approvals
+    snapshot = await graph.aget_state({"configurable": {"thread_id": thread_id}})
+    if snapshot.created_at is None:
+        raise HTTPException(status_code=404, detail=f"Unknown thread {thread_id}")
+    return {"thread_id": thread_id, "pending_approvals": pending_approvals(snapshot)}
+
+async def decide_approvals(thread_id, decision, command, timings):
+    graph = get_booking_assistant()
+    from human_approval import pending_approvals
+    from instrumentation import GraphInstrumentation
+    config = {"configurable": {"thread_id": thread_id}}
+    async with thread_lock(thread_id):
+        snapshot = await graph.aget_state(config)
+        pending = {call["id"] for call in pending_approvals(snapshot)}
+        if not pending:
+            raise HTTPException(status_code=404, detail=f"No tool calls of thread {thread_id} are waiting for approval")
+        unknown = set(decision.tool_call_ids or ()) - pending
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Not waiting for approval: {sorted(unknown)}")
+        # Tools such as list_user_bookings read user_id, which the checkpoint metadata keeps
+        config["configurable"]["user_id"] = snapshot.metadata.get("user_id")
+        await graph.ainvoke(command, {**config, "callbacks": [GraphInstrumentation(timings)]})
+        return await assistant_response(graph, config)
+
+@fastAPI_app.post("/approvals/{thread_id}/approve")
+async def approve_tool_calls(thread_id: str, decision: ApprovalDecisionInput, http_request: Request):
+    """
+    Approve the given pending tool calls (or all of them) and resume the thread.
+    """
+    ensure_repo_modules()
+    from human_approval import approve
+    logger.info("Approving tool calls of thread %s: %s", thread_id, decision.tool_call_ids or "all")
+    return await decide_approvals(thread_id, decision, approve(decision.tool_call_ids), http_request.state.timings)
+
+@fastAPI_app.post("/approvals/{thread_id}/deny")
+async def deny_tool_calls(thread_id: str, decision: ApprovalDecisionInput, http_request: Request):
+    """
+    Deny the given pending tool calls (or all of them) and resume the thread.
+    """
+    ensure_repo_modules()
+    from human_approval import deny
+    logger.info("Denying tool calls of thread %s: %s", thread_id, decision.tool_call_ids or "all")
+    return await decide_approvals(
+        thread_id, decision, deny(decision.reason or "", decision.tool_call_ids), http_request.state.timings
+    )
+
 @fastAPI_app.get("/")
 async def root():
     """
@@ -280,6 +1146,12 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "/generate-itinerary": "POST endpoint to generate a travel itinerary",
+            "/generate-itinerary/batch": "POST NDJSON itinerary requests; streams NDJSON results as they finish",
+            "/jobs": "POST an itinerary request to run in the background; GET /jobs/{job_id} or /jobs/{job_id}/stream for it",
+            "/bookings/batch": "POST endpoint to retrieve, change, cancel or list many bookings at once",
+            "/booking-assistant": "POST endpoint to chat with the booking assistant; changes wait for approval",
+            "/approvals/{thread_id}": "GET the tool calls waiting for approval; POST .../approve or .../deny to resume",
+            "/metrics": "GET endpoint with Prometheus metrics for graph nodes, tools and LLM calls",
             "/docs": "API documentation"
         }
     }
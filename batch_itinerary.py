@@ -0,0 +1,141 @@
+"""
+Bulk itinerary generation from NDJSON.
+
+Batch jobs such as newsletter personalization send thousands of prompts. One HTTP request
+per prompt pays the request overhead every time and leaves the concurrency to the client.
+`run_batch` takes the whole batch as NDJSON in the corpus shape of evaluate.py
+(`parse_entry`) and runs it with a bounded number of entries in flight. Identical
+prompts run once. Results come out as soon as each entry finishes:
+
+    {"index": 3, "id": "user-004", "itinerary": "...", "deduplicated": false, "duration_ms": 812.4}
+    {"index": 0, "id": "user-001", "error": {"status_code": 429, "detail": "..."}, "duration_ms": 30.1}
+    ...
+    {"summary": {"items": 1000, "errors": 2, "deduplicated": 140, "seconds": 61.2, "items_per_second": 16.3}}
+
+An entry that fails, including a line that is not valid UTF-8 JSON, gets an error record and
+does not stop the rest of the batch.
+"""
+import asyncio
+import json
+import time
+
+from request_coalescing import normalize_message
+
+
+def parse_entry(entry, line_number):
+    """
+    ID and prompt of one corpus entry.
+
+    The prompt is `user_message`, `question` or `title` and `body` joined; the ID is
+    `request_id`, `id` or the line number.
+
+    Returns:
+        tuple: (entry id, prompt)
+    """
+    entry_id = str(entry.get("request_id") or entry.get("id") or line_number)
+    prompt = entry.get("user_message") or entry.get("question")
+    if not prompt:
+        prompt = "\n\n".join(part for part in (entry.get("title"), entry.get("body")) if part)
+    return entry_id, prompt
+
+
+def _error(e):
+    return {"status_code": getattr(e, "status_code", 500), "detail": getattr(e, "detail", None) or str(e)}
+
+
+async def run_batch(lines, run, concurrency=8, dedupe=True):
+    """
+    Run every entry of an NDJSON batch and yield its result as soon as it is ready.
+
+    Args:
+        lines (Iterable[str | bytes]): NDJSON lines; blank lines are skipped and do not count
+        run: Coroutine function `run(prompt, entry)` returning the itinerary text. Exceptions
+            with `status_code`/`detail` (e.g. HTTPException) keep them in the error record
+        concurrency (int): Entries running at once
+        dedupe (bool): Run prompts that are equal after normalization only once
+    Yields:
+        dict: One record per entry, in completion order, with the 0-based `index` of the
+            entry in the batch, then a final {"summary": ...}
+    """
+    started = time.perf_counter()
+    records = asyncio.Queue()
+    slots = asyncio.Semaphore(concurrency)
+    waiting = {}  # prompt key -> [(index, entry id, start time)] of the entries sharing a run
+    finished = {}  # prompt key -> outcome, for duplicates arriving after the run
+    tasks = set()
+    stats = {"items": 0, "errors": 0, "deduplicated": 0}
+
+    def emit(index, entry_id, outcome, start, deduplicated):
+        record = {"index": index, "id": entry_id, **outcome}
+        if "itinerary" in outcome:
+            record["deduplicated"] = deduplicated
+        else:
+            stats["errors"] += 1
+        stats["deduplicated"] += deduplicated
+        record["duration_ms"] = round((time.perf_counter() - start) * 1e3, 1)
+        records.put_nowait(record)
+
+    async def execute(key, prompt, entry):
+        try:
+            outcome = {"itinerary": await run(prompt, entry)}
+        except Exception as e:
+            outcome = {"error": _error(e)}
+        finally:
+            slots.release()
+        if dedupe and "itinerary" in outcome:
+            # Failures are not reused: a later duplicate runs again, e.g. after a 429
+            finished[key] = outcome
+        for position, (index, entry_id, start) in enumerate(waiting.pop(key)):
+            emit(index, entry_id, outcome, start, position > 0)
+
+    async def produce():
+        try:
+            index = -1
+            for line_number, line in enumerate(lines, 1):
+                if not line.strip():
+                    continue
+                index += 1
+                stats["items"] += 1
+                start = time.perf_counter()
+                try:
+                    # UnicodeDecodeError is a ValueError too: a line that is not UTF-8 fails on its own
+                    entry = json.loads(line.decode() if isinstance(line, bytes) else line)
+                except ValueError as e:
+                    emit(index, str(line_number), {"error": {"status_code": 400, "detail": f"Invalid JSON: {e}"}}, start, False)
+                    continue
+                if not isinstance(entry, dict):
+                    emit(index, str(line_number), {"error": {"status_code": 400, "detail": "Entry is not a JSON object"}}, start, False)
+                    continue
+                entry_id, prompt = parse_entry(entry, line_number)
+                if not prompt:
+                    emit(index, entry_id, {"error": {"status_code": 400, "detail": "Entry has no prompt"}}, start, False)
+                    continue
+                key = normalize_message(prompt) if dedupe else index
+                if key in finished:
+                    emit(index, entry_id, finished[key], start, True)
+                elif key in waiting:
+                    waiting[key].append((index, entry_id, start))
+                else:
+                    await slots.acquire()
+                    waiting[key] = [(index, entry_id, start)]
+                    task = asyncio.create_task(execute(key, prompt, entry))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            while tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            # End the stream whatever happened, rather than leave the reader waiting
+            records.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (record := await records.get()) is not None:
+            yield record
+        await producer
+        seconds = time.perf_counter() - started
+        yield {"summary": {**stats, "seconds": round(seconds, 3), "items_per_second": round(stats["items"] / seconds, 2)}}
+    finally:
+        # The client went away or the batch failed: stop the entries still running
+        producer.cancel()
+        for task in list(tasks):
+            task.cancel()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark: POST /generate-itinerary/batch against one /generate-itinerary request per entry,
+with the fake Bedrock model.
+
+The batch is NDJSON in the shape of requests.jsonl: --items entries of which --duplicates
+repeat an earlier prompt, plus one line that is not JSON. For every concurrency it
+reports items/s, how many entries were deduplicated and the time to the first result,
+and checks that every entry came back once and that the bad line failed on its own.
+
+    python bench/bench_batch_itinerary.py --items 200 --concurrency 1,8,32 --first-token-ms 100
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "3_deploy_langGraph_agent"))
+
+CITIES = ["Paris", "Rome", "Venice", "Barcelona", "Lisbon", "Vienna", "Prague", "Amsterdam"]
+INTERESTS = ["museums", "food", "architecture", "nightlife", "parks", "history", "shopping", "music"]
+
+
+def make_batch(items, duplicates, seed):
+    """
+    NDJSON lines: unique prompts, duplicates of them in random places and one invalid line.
+    """
+    rng = random.Random(seed)
+    entries = [
+        {"request_id": f"req-{i:04d}", "title": f"Trip {i}",
+         "body": f"Plan {1 + i % 5} days in {CITIES[i % len(CITIES)]}, we like {INTERESTS[i // len(CITIES) % len(INTERESTS)]} (#{i})"}
+        for i in range(items - duplicates - 1)
+    ]
+    for i in range(duplicates):
+        copy = dict(rng.choice(entries[:len(entries) - i]))
+        copy["request_id"] += f"-dup{i}"
+        entries.insert(rng.randrange(len(entries) + 1), copy)
+    lines = [json.dumps(entry) for entry in entries]
+    lines.insert(len(lines) // 2, "{not json")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the NDJSON itinerary batch endpoint")
+    parser.add_argument("--items", type=int, default=200, help="Lines in the batch, the invalid one included")
+    parser.add_argument("--duplicates", type=int, default=40, help="Entries repeating an earlier prompt")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated batch concurrencies")
+    parser.add_argument("--first-token-ms", type=float, default=100, help="Fake Bedrock latency per LLM call")
+    parser.add_argument("--sequential", type=int, default=20, help="Entries sent one request at a time, for comparison")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    os.environ.update({
+        "LLM_BACKEND": "fake", "MODEL_ROUTER": "0", "LLM_CONCURRENCY_INITIAL": "64",
+        "FAKE_LLM_FIRST_TOKEN_MS": str(args.first_token_ms),
+    })
+    os.chdir(ROOT)  # the mock tools read data/*.json
+    import httpx
+    import uvicorn
+    import server
+
+    # A real server rather than TestClient, which buffers streamed responses
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    uvicorn_server = uvicorn.Server(uvicorn.Config(server.fastAPI_app, port=port, log_level="warning"))
+    threading.Thread(target=uvicorn_server.run, daemon=True).start()
+    while not uvicorn_server.started:
+        time.sleep(0.05)
+    client = httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=None)
+    # Warm up: build the graph outside the measurements
+    client.post("/generate-itinerary", json={"user_message": "Plan 1 day in Paris"})
+    body = make_batch(args.items, args.duplicates, args.seed)
+    entries = [json.loads(line) for line in body.splitlines() if line.startswith("{\"")]
+
+    start = time.perf_counter()
+    for entry in entries[:args.sequential]:
+        response = client.post("/generate-itinerary", json={"user_message": entry["body"], "priority": "batch"})
+        assert response.status_code == 200, response.text
+    sequential = args.sequential / (time.perf_counter() - start)
+
+    print(f"fake LLM latency {args.first_token_ms:.0f} ms per call, {args.items} entries, "
+          f"{args.duplicates} duplicates, 1 invalid line")
+    print(f"one request per entry, sequential: {sequential:6.1f} items/s")
+    print(f"{'concurrency':>11} | {'items/s':>7} | {'speed-up':>8} | {'deduplicated':>12} | {'first result':>12} | errors")
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        records, first = [], None
+        start = time.perf_counter()
+        with client.stream("POST", f"/generate-itinerary/batch?concurrency={concurrency}", content=body,
+                           headers={"Content-Type": "application/x-ndjson"}) as response:
+            assert response.status_code == 200
+            for line in response.iter_lines():
+                if line:
+                    records.append(json.loads(line))
+                    first = first or time.perf_counter() - start
+        summary = records.pop()["summary"]
+        assert sorted(r["index"] for r in records) == list(range(args.items)), "every entry answers once"
+        errors = [r for r in records if "error" in r]
+        assert len(errors) == 1 and errors[0]["error"]["status_code"] == 400, errors
+        print(f"{concurrency:>11} | {summary['items_per_second']:>7.1f} | {summary['items_per_second'] / sequential:>7.1f}x | "
+              f"{summary['deduplicated']:>12} | {first * 1e3:>9.0f} ms | {summary['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-call sqlite3 connections on an unindexed database (how the booking tools
+used to work) vs. the pooled, indexed BookingRepository, and one-transaction-per-booking
+updates vs. the batch operations.
+
+    python bench/bench_booking_repository.py --bookings 1000000
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import closing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from booking_repository import BookingRepository
+from generate_bookings import generate_database
+
+
+def legacy_point_lookup(db_path, booking_id):
+    with closing(sqlite3.connect(db_path, timeout=10.0)) as conn:
+        with closing(conn.cursor()) as cursor:
+            cursor.execute("SELECT * FROM flight_bookings WHERE booking_id = ?", (booking_id,))
+            return cursor.fetchone()
+
+
+def legacy_user_lookup(db_path, user_id):
+    with closing(sqlite3.connect(db_path, timeout=10.0)) as conn:
+        with closing(conn.cursor()) as cursor:
+            cursor.execute("SELECT * FROM flight_bookings WHERE user_id = ? ORDER BY booking_id LIMIT 50", (user_id,))
+            return cursor.fetchall()
+
+
+def report(name, count, elapsed):
+    print(f"{name:<45} {count:>7} queries {elapsed:8.3f} s {count / elapsed:12,.0f} q/s {elapsed / count * 1e6:10.1f} us/q")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark booking lookups")
+    parser.add_argument("--bookings", type=int, default=1_000_000, help="Flight bookings in the test database")
+    parser.add_argument("--users", type=int, default=50_000, help="Users in the test database")
+    parser.add_argument("--point-lookups", type=int, default=20_000, help="Lookups by booking_id")
+    parser.add_argument("--user-lookups", type=int, default=2_000, help="Lookups by user_id (indexed)")
+    parser.add_argument("--legacy-user-lookups", type=int, default=20, help="Lookups by user_id without indexes")
+    parser.add_argument("--batch-size", type=int, default=20, help="Bookings per batch for the batch operations")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, "bookings.db")
+    legacy_path = os.path.join(workdir, "bookings_legacy.db")
+    start = time.perf_counter()
+    generate_database(db_path, args.users, args.bookings, 0, seed=args.seed)
+    print(f"Generated {args.bookings:,} flight bookings in {time.perf_counter() - start:.1f}s")
+
+    # The legacy database has the original schema without secondary indexes
+    shutil.copy(db_path, legacy_path)
+    with closing(sqlite3.connect(legacy_path)) as conn:
+        for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'").fetchall():
+            conn.execute(f"DROP INDEX {name}")
+        conn.commit()
+
+    rng = random.Random(args.seed)
+    booking_ids = [rng.randint(1, args.bookings) for _ in range(args.point_lookups)]
+    user_ids = [rng.randint(1, args.users) for _ in range(args.user_lookups)]
+    repository = BookingRepository(db_path)
+
+    start = time.perf_counter()
+    for booking_id in booking_ids:
+        legacy_point_lookup(legacy_path, booking_id)
+    report("point lookup, connection per call", len(booking_ids), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for booking_id in booking_ids:
+        repository.get_flight_booking(booking_id)
+    report("point lookup, BookingRepository", len(booking_ids), time.perf_counter() - start)
+
+    legacy_users = user_ids[: args.legacy_user_lookups]
+    start = time.perf_counter()
+    for user_id in legacy_users:
+        legacy_user_lookup(legacy_path, user_id)
+    report("per-user query, no index, connection per call", len(legacy_users), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for user_id in user_ids:
+        repository.flight_bookings_for_user(user_id)
+    report("per-user query, BookingRepository", len(user_ids), time.perf_counter() - start)
+
+    # Batch vs. one call per booking, as an agent would issue with the single-booking tools
+    batches = [booking_ids[i:i + args.batch_size] for i in range(0, len(booking_ids), args.batch_size)]
+    start = time.perf_counter()
+    for batch in batches:
+        repository.get_flight_bookings(batch)
+    report(f"retrieve, batches of {args.batch_size}", len(booking_ids), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for booking_id in booking_ids:
+        repository.change_flight_date(booking_id, "2030-01-01")
+    report("change date, one transaction per booking", len(booking_ids), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for batch in batches:
+        repository.change_flight_dates([(booking_id, "2030-01-02") for booking_id in batch])
+    report(f"change date, batches of {args.batch_size}", len(booking_ids), time.perf_counter() - start)
+
+    repository.close()
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
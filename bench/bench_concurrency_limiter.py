@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: LLM calls under a traffic spike against a backend that throttles above a
+fixed concurrency, with and without the adaptive concurrency limiter.
+
+The backend is FakeBedrockChatModel with max_concurrency set, which fails calls over
+the quota with a Bedrock ThrottlingException. Callers are a mix of interactive and
+batch users that each make several sequential calls.
+
+    python bench/bench_concurrency_limiter.py --callers 200 --quota 16 --first-token-ms 200
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from langchain_core.messages import HumanMessage
+
+from concurrency_limiter import AdaptiveConcurrencyLimiter, LimitedChatModel, LimiterRejected, is_throttling_error, llm_priority
+from fake_llm import FakeBedrockChatModel
+
+
+def percentile(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def run(model, args, rng):
+    outcomes = Counter()
+    latencies = {"interactive": [], "batch": []}
+    retry_after = []
+
+    async def caller(index, priority):
+        await asyncio.sleep(rng.uniform(0, args.spike_seconds))
+        with llm_priority(priority):
+            for call in range(args.calls):
+                start = time.perf_counter()
+                try:
+                    await model.ainvoke([HumanMessage(content=f"Plan a trip to Paris ({index}/{call})")])
+                    outcomes[priority, "ok"] += 1
+                    latencies[priority].append(time.perf_counter() - start)
+                except LimiterRejected as error:
+                    outcomes[priority, "rejected"] += 1
+                    retry_after.append(error.retry_after)
+                    return
+                except Exception as error:
+                    if not is_throttling_error(error):
+                        raise
+                    outcomes[priority, "throttled"] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        caller(i, "batch" if rng.random() < args.batch_share else "interactive") for i in range(args.callers)
+    ))
+    return outcomes, latencies, retry_after, time.perf_counter() - start
+
+
+def report(name, outcomes, latencies, retry_after, elapsed):
+    print(f"{name} ({elapsed:.1f}s)")
+    for priority in ("interactive", "batch"):
+        values = latencies[priority]
+        print(f"  {priority:<12} ok {outcomes[priority, 'ok']:>5} | throttled {outcomes[priority, 'throttled']:>5} | "
+              f"rejected {outcomes[priority, 'rejected']:>4} | p50 {percentile(values, 50) * 1e3:7.0f} ms | "
+              f"p99 {percentile(values, 99) * 1e3:7.0f} ms")
+    if retry_after:
+        print(f"  Retry-After: median {statistics.median(retry_after)} s, max {max(retry_after)} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the adaptive LLM concurrency limiter")
+    parser.add_argument("--callers", type=int, default=200, help="Callers in the spike")
+    parser.add_argument("--calls", type=int, default=5, help="Sequential LLM calls per caller")
+    parser.add_argument("--spike-seconds", type=float, default=1.0, help="Window in which all callers arrive")
+    parser.add_argument("--batch-share", type=float, default=0.3, help="Fraction of batch callers")
+    parser.add_argument("--quota", type=int, default=16, help="Concurrent calls the backend accepts before throttling")
+    parser.add_argument("--first-token-ms", type=float, default=200, help="Backend latency per call")
+    parser.add_argument("--queue-size", type=int, default=100, help="Limiter wait queue size")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    backend = FakeBedrockChatModel(
+        first_token_ms=args.first_token_ms, latency_distribution="lognormal",
+        latency_jitter_ms=args.first_token_ms / 4, max_concurrency=args.quota, seed=args.seed,
+    )
+    report("without limiter", *asyncio.run(run(backend, args, random.Random(args.seed))))
+
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_queue=args.queue_size)
+    limited = LimitedChatModel(model=backend, limiter=limiter)
+    report("with adaptive limiter", *asyncio.run(run(limited, args, random.Random(args.seed))))
+    print(f"  limiter: {limiter.stats()}")
+
+
+if __name__ == "__main__":
+    main()
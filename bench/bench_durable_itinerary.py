@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Failure injection for durable itinerary runs: requests to /generate-itinerary with an
+Idempotency-Key whose LLM fails partway through the graph, then retried with the same key.
+
+For each scenario it reports the LLM calls of the failed attempt, of the retry (which
+resumes from the last completed step) and of a retry without a key (which starts over),
+and checks that a third request replays the stored result without any LLM call. Then
+one city fails on every attempt: the run is retried with the same key until the city has
+failed DURABLE_CITY_ATTEMPTS times and is reported as failed, and the checkpoints left for
+the completed run are counted.
+
+    python bench/bench_durable_itinerary.py --first-token-ms 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "3_deploy_langGraph_agent"))
+
+from pydantic import PrivateAttr
+
+from fake_llm import FakeBedrockChatModel
+
+SCENARIOS = [
+    # (name, request, LLM call that fails on the first attempt)
+    ("single city, answer fails", "Plan 3 days in Paris, we like museums", 2),
+    ("3 cities, one worker fails", "Plan a trip across Paris, Rome and Venice, 2 days each", 4),
+]
+
+
+class FlakyChatModel(FakeBedrockChatModel):
+    """
+    The fake Bedrock model, failing the `fail_on_call`-th call (1-based) once.
+    """
+
+    fail_on_call: int = 0
+
+    _calls: int = PrivateAttr(default=0)
+
+    def _respond(self, messages, tools):
+        with self._inflight_lock:
+            self._calls += 1
+            call = self._calls
+        if call == self.fail_on_call:
+            raise RuntimeError("injected failure")
+        return super()._respond(messages, tools)
+
+    def calls(self):
+        """
+        Calls made so far, including the failed one.
+        """
+        return self._calls
+
+
+class BrokenCityModel(FakeBedrockChatModel):
+    """
+    The fake Bedrock model, failing every call of the worker planning `city`.
+    """
+
+    city: str = ""
+
+    def _respond(self, messages, tools):
+        if any(f"trip in {self.city}." in str(m.content) for m in messages):
+            raise RuntimeError(f"{self.city} is down")
+        return super()._respond(messages, tools)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inject failures into durable itinerary runs and retry them")
+    parser.add_argument("--first-token-ms", type=float, default=200, help="Fake Bedrock latency per LLM call")
+    args = parser.parse_args()
+
+    os.environ.update({
+        "LLM_BACKEND": "fake", "MODEL_ROUTER": "0", "LLM_LIMITER": "0", "COALESCE_REQUESTS": "0",
+        "CHECKPOINT_DB": os.path.join(tempfile.mkdtemp(), "checkpoints.db"), "DURABLE_CITY_ATTEMPTS": "3",
+    })
+    os.chdir(ROOT)  # the mock tools read data/*.json
+    from fastapi.testclient import TestClient
+    import server
+
+    client = TestClient(server.fastAPI_app)
+
+    def post(message, key=None, llm=None):
+        if llm is not None:
+            # The graphs are built around the model, so they are rebuilt for a new one
+            server.global_llm, server.global_durable_app, server.global_app = llm, None, None
+        headers = {"Idempotency-Key": key} if key else {}
+        start = time.perf_counter()
+        response = client.post("/generate-itinerary", json={"user_message": message}, headers=headers)
+        return response, time.perf_counter() - start
+
+    print(f"fake LLM latency {args.first_token_ms:.0f} ms per call")
+    print(f"{'scenario':<28} | {'1st attempt':>15} | {'retry, same key':>17} | {'retry, no key':>15} | replay")
+    for name, message, fail_on_call in SCENARIOS:
+        key = str(uuid.uuid4())
+        llm = FlakyChatModel(first_token_ms=args.first_token_ms, fail_on_call=fail_on_call)
+        failed, _ = post(message, key, llm)
+        first_calls = llm.calls()
+
+        llm = FlakyChatModel(first_token_ms=args.first_token_ms)
+        resumed, resumed_seconds = post(message, key, llm)
+        resumed_calls = llm.calls()
+
+        llm = FlakyChatModel(first_token_ms=args.first_token_ms)
+        scratch, scratch_seconds = post(message, llm=llm)
+        scratch_calls = llm.calls()
+
+        replayed, replay_seconds = post(message, key)
+        assert replayed.json() == resumed.json() and llm.calls() == scratch_calls, "the replay should be the stored result"
+        assert replayed.headers.get("Idempotent-Replayed") == "true"
+
+        print(f"{name:<28} | {failed.status_code} {first_calls:>2} LLM calls | "
+              f"{resumed.status_code} {resumed_calls:>2} calls {resumed_seconds:>4.1f}s | "
+              f"{scratch.status_code} {scratch_calls:>2} calls {scratch_seconds:>3.1f}s | {replay_seconds * 1e3:.0f} ms")
+
+    conflict, _ = post("Plan 3 days in Rome", key)
+    print(f"same key, different request -> {conflict.status_code} {conflict.json()['detail']}")
+
+    key = str(uuid.uuid4())
+    llm = BrokenCityModel(first_token_ms=args.first_token_ms, city="Rome")
+    statuses = [post(SCENARIOS[1][1], key, llm if attempt == 0 else None)[0] for attempt in range(3)]
+    assert [r.status_code for r in statuses] == [503, 503, 200], [r.status_code for r in statuses]
+    state = server.get_durable_itinerary_graph().get_state({"configurable": {"thread_id": f"itinerary:{key}"}})
+    assert [plan["error"] for plan in state.values["city_plans"] if plan["error"]] == ["Rome is down"]
+    checkpointer = server.get_checkpointer()
+    with checkpointer._lock:
+        rows = checkpointer._conn.execute(
+            "SELECT (SELECT COUNT(*) FROM checkpoints WHERE thread_id = ?), (SELECT COUNT(*) FROM writes WHERE thread_id = ?)",
+            (f"itinerary:{key}", f"itinerary:{key}"),
+        ).fetchone()
+    print(f"Rome fails every time -> {', '.join(str(r.status_code) for r in statuses)}, Rome reported as failed; "
+          f"{rows[0]} checkpoint and {rows[1]} writes kept for the completed run")
+
+
+if __name__ == "__main__":
+    main()
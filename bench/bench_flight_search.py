@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: pandas CSV scan per search (how the notebook search_flights tool worked)
+vs. FlightSearchIndex with and without its query cache. The target is 100k searches/s
+in-process.
+
+    python bench/bench_flight_search.py --bookings 1000000 --searches 100000
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pandas as pd
+
+from flight_search import FlightSearchIndex
+from generate_bookings import generate_database
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+TARGET_SEARCHES_PER_SECOND = 100_000
+
+
+def legacy_search(csv_path, user_id, arrival_city):
+    df = pd.read_csv(csv_path)
+    if user_id not in df["Id"].values:
+        return None
+    departure_city = df[df["Id"] == user_id].iloc[0]["Current_Location"]
+    return df[(df["Departure_City"] == departure_city) & (df["Arrival_City"] == arrival_city)]
+
+
+def report(name, count, elapsed):
+    rate = count / elapsed
+    print(f"{name:<40} {count:>8} searches {elapsed:8.3f} s {rate:12,.0f} /s {elapsed / count * 1e6:8.2f} us/search")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark flight searches")
+    parser.add_argument("--bookings", type=int, default=1_000_000, help="Flight bookings in the test database")
+    parser.add_argument("--searches", type=int, default=100_000, help="Searches per index benchmark")
+    parser.add_argument("--distinct-queries", type=int, default=2_000, help="Distinct queries in the cached workload")
+    parser.add_argument("--limit", type=int, default=10, help="Flights returned per search, as the tool does (0 for all)")
+    parser.add_argument("--legacy-searches", type=int, default=50, help="Searches with the pandas CSV scan")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, "bookings.db")
+    csv_path = os.path.join(ROOT, "data", "synthetic_travel_data.csv")
+    generate_database(db_path, 10_000, args.bookings, 0, seed=args.seed)
+
+    start = time.perf_counter()
+    cached = FlightSearchIndex().load_database(db_path)
+    uncached = FlightSearchIndex(cache_size=0).load_database(db_path)
+    print(f"Loaded {len(cached):,} flights into each index in {(time.perf_counter() - start) / 2:.2f}s")
+
+    rng = random.Random(args.seed)
+    cities = sorted({f.departure_city for flights in cached._routes.values() for f in flights})
+    today = date.today()
+
+    def random_query():
+        origin, destination = rng.sample(cities, 2)
+        first = today + timedelta(days=rng.randint(1, 45))
+        last = first + timedelta(days=rng.randint(0, 7))
+        return origin, destination, first.isoformat(), last.isoformat(), args.limit or None
+
+    queries = [random_query() for _ in range(args.searches)]
+    start = time.perf_counter()
+    for query in queries:
+        uncached.search(*query)
+    uncached_rate = report("index, bisect only", len(queries), time.perf_counter() - start)
+
+    distinct = queries[: args.distinct_queries]
+    repeated = [rng.choice(distinct) for _ in range(args.searches)]
+    start = time.perf_counter()
+    for query in repeated:
+        cached.search(*query)
+    cached_rate = report(f"index, cached ({len(distinct)} distinct)", len(repeated), time.perf_counter() - start)
+    print(f"  {cached.cache_info()}")
+
+    csv_users = pd.read_csv(csv_path)["Id"].dropna().astype(int).tolist()
+    start = time.perf_counter()
+    for _ in range(args.legacy_searches):
+        legacy_search(csv_path, rng.choice(csv_users), rng.choice(cities))
+    report("pandas CSV scan per search", args.legacy_searches, time.perf_counter() - start)
+
+    for name, rate in (("bisect only", uncached_rate), ("cached", cached_rate)):
+        status = "OK" if rate >= TARGET_SEARCHES_PER_SECOND else "BELOW TARGET"
+        print(f"{name}: {rate:,.0f} searches/s vs. target {TARGET_SEARCHES_PER_SECOND:,} -> {status}")
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
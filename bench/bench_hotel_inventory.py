@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: HotelInventory search latency and incremental refresh vs. a full reload.
+
+    python bench/bench_hotel_inventory.py --bookings 1000000
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from booking_repository import BookingRepository
+from generate_bookings import generate_database
+from hotel_inventory import HotelInventory
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hotel inventory searches")
+    parser.add_argument("--bookings", type=int, default=1_000_000, help="Hotel bookings in the test database")
+    parser.add_argument("--searches", type=int, default=20_000, help="Searches to time")
+    parser.add_argument("--changes", type=int, default=1_000, help="Bookings changed or cancelled before the refresh")
+    parser.add_argument("--rooms-per-hotel", type=int, default=200, help="Rooms per hotel (about 110 are booked per night at 1M bookings)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, "bookings.db")
+    generate_database(db_path, 10_000, 0, args.bookings, seed=args.seed)
+
+    start = time.perf_counter()
+    inventory = HotelInventory(db_path, rooms_per_hotel=args.rooms_per_hotel, track_changes=True)
+    load_s = time.perf_counter() - start
+    print(f"Loaded {args.bookings:,} bookings into {len(inventory.hotel_names):,} hotels in {load_s:.2f}s")
+
+    rng = random.Random(args.seed)
+    cities = inventory.cities()
+    today = date.today()
+
+    def random_search():
+        check_in = today + timedelta(days=rng.randint(1, 60))
+        check_out = check_in + timedelta(days=rng.randint(1, 14))
+        low = rng.choice([None, 100, 200])
+        high = rng.choice([None, 300, 400])
+        return rng.choice(cities), check_in.isoformat(), check_out.isoformat(), low, high
+
+    searches = [random_search() for _ in range(args.searches)]
+    for search in searches[:100]:
+        inventory.search(*search)
+    latencies = []
+    found = 0
+    for search in searches:
+        start = time.perf_counter()
+        found += len(inventory.search(*search, k=5))
+        latencies.append((time.perf_counter() - start) * 1e6)
+    print(f"search top-5: p50 {statistics.median(latencies):.1f} us | p99 {percentile(latencies, 99):.1f} us | "
+          f"max {max(latencies):.1f} us | {found / len(searches):.1f} hotels/search")
+
+    repository = BookingRepository(db_path)
+    booking_ids = rng.sample(range(1, args.bookings + 1), args.changes)
+    half = len(booking_ids) // 2
+    for booking_id in booking_ids[:half]:
+        check_in = today + timedelta(days=rng.randint(1, 60))
+        repository.change_hotel_dates(booking_id, check_in.isoformat(), (check_in + timedelta(days=3)).isoformat())
+    repository.cancel_hotel_bookings(booking_ids[half:])
+    repository.close()
+
+    start = time.perf_counter()
+    applied = inventory.refresh()
+    refresh_s = time.perf_counter() - start
+    start = time.perf_counter()
+    reloaded = HotelInventory(db_path, rooms_per_hotel=args.rooms_per_hotel)
+    reload_s = time.perf_counter() - start
+    print(f"incremental refresh: {applied} change log rows in {refresh_s * 1e3:.1f} ms | full reload {reload_s * 1e3:.0f} ms")
+
+    mismatches = sum(inventory.search(*search) != reloaded.search(*search) for search in searches[:1000])
+    print(f"refreshed vs. reloaded inventory: {mismatches} mismatching searches out of 1000")
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: overhead of GraphInstrumentation on the itinerary graph with the fake LLM.
+The same graph is run with and without the callback handler; the target is < 1%
+of the request time with realistic LLM latency.
+
+    python bench/bench_instrumentation.py --runs 200 --first-token-ms 300
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "3_deploy_langGraph_agent"))
+
+from fake_llm import FakeBedrockChatModel
+from instrumentation import InstrumentedGraph, RequestTimings
+
+TARGET_OVERHEAD_PERCENT = 1.0
+
+
+def time_runs(invoke, runs):
+    durations = []
+    for i in range(runs):
+        start = time.perf_counter()
+        invoke({"user_message": f"Plan a trip to Paris #{i}"})
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark graph instrumentation overhead")
+    parser.add_argument("--runs", type=int, default=200, help="Graph runs per variant")
+    parser.add_argument("--first-token-ms", type=float, default=300.0, help="Fake LLM latency used for the percentage")
+    args = parser.parse_args()
+
+    from server import build_itinerary_graph
+
+    # Zero-latency LLM so the difference between the two variants is only the handler
+    graph = build_itinerary_graph(FakeBedrockChatModel())
+    instrumented = InstrumentedGraph(graph)
+    time_runs(graph.invoke, 10)
+    time_runs(lambda state: instrumented.invoke(state, timings=RequestTimings()), 10)
+
+    # Interleave the variants so drift on the machine affects both equally
+    plain, traced = [], []
+    for _ in range(args.runs // 10):
+        plain += time_runs(graph.invoke, 10)
+        traced += time_runs(lambda state: instrumented.invoke(state, timings=RequestTimings()), 10)
+
+    plain_ms = statistics.median(plain) * 1e3
+    traced_ms = statistics.median(traced) * 1e3
+    overhead_ms = traced_ms - plain_ms
+    llm_calls = RequestTimings()
+    instrumented.invoke({"user_message": "Plan a trip to Paris"}, timings=llm_calls)
+    request_ms = plain_ms + llm_calls.llm_calls * args.first_token_ms
+    percent = overhead_ms / request_ms * 100
+
+    print(f"graph run without handler: {plain_ms:8.2f} ms (median of {len(plain)})")
+    print(f"graph run with handler:    {traced_ms:8.2f} ms (median of {len(traced)})")
+    print(f"overhead: {overhead_ms * 1e3:.0f} us/request = {overhead_ms / plain_ms * 100:.1f}% of a zero-latency run, "
+          f"{percent:.2f}% of a request with {llm_calls.llm_calls} LLM calls at {args.first_token_ms:.0f} ms")
+    status = "OK" if percent < TARGET_OVERHEAD_PERCENT else "ABOVE TARGET"
+    print(f"overhead {percent:.2f}% vs. target {TARGET_OVERHEAD_PERCENT}% -> {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Load test for the /generate-itinerary service with the fake Bedrock backend.
+
+Drives the endpoint at increasing concurrency in two ways:
+
+- uvicorn: the FastAPI app is served by uvicorn in a subprocess and hit over HTTP.
+  Event-loop lag is measured by a probe on the server's own loop.
+- mangum: every concurrent client is its own process (like one Lambda instance each)
+  calling server.handler with synthetic API Gateway HTTP API events. Each invocation
+  runs its own event loop, so the lag probe runs on a side thread and mostly shows
+  GIL contention.
+
+Reports RPS, p50/p95/p99 latency, event-loop lag and RSS, and compares them with a
+stored baseline:
+
+    python bench/bench_itinerary_service.py --mode both --concurrency 1,4,16
+    python bench/bench_itinerary_service.py --save-baseline
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import types
+import uuid
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+SERVER_DIR = os.path.join(ROOT, "3_deploy_langGraph_agent")
+DEFAULT_BASELINE = os.path.join(ROOT, "bench", "baselines", "itinerary_service.json")
+PROMPTS = [
+    "Plan a trip to Paris, I love museums and food",
+    "I want to visit Tokyo for temples and street food",
+    "Plan three days in New York with parks and shows",
+    "Suggest an itinerary in Barcelona for architecture fans",
+]
+LAG_INTERVAL_S = 0.01
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round((len(values) - 1) * p / 100)))]
+
+
+def rss_mb():
+    """
+    Current resident set size of this process in MB.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    # ru_maxrss is the peak, in KB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+class LagProbe:
+    """
+    Measures event-loop lag as the overshoot of a periodic asyncio.sleep.
+    """
+
+    def __init__(self, interval=LAG_INTERVAL_S):
+        self.interval = interval
+        self.samples = []
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - start - self.interval) * 1000)
+
+    def start_thread(self):
+        thread = threading.Thread(target=lambda: asyncio.run(self.run()), daemon=True)
+        thread.start()
+        return thread
+
+    def reset(self):
+        self.samples = []
+
+    def summary(self):
+        return {
+            "lag_p50_ms": round(percentile(self.samples, 50) or 0.0, 2),
+            "lag_p99_ms": round(percentile(self.samples, 99) or 0.0, 2),
+            "lag_max_ms": round(max(self.samples, default=0.0), 2),
+        }
+
+
+def configure_fake_llm(args):
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_LATENCY"] = args.latency
+    os.environ["FAKE_LLM_FIRST_TOKEN_MS"] = str(args.first_token_ms)
+    os.environ["FAKE_LLM_JITTER_MS"] = str(args.jitter_ms)
+    os.environ["FAKE_LLM_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+    os.environ["FAKE_LLM_SEED"] = str(args.seed)
+
+
+def import_server():
+    # The mock tools read data/*.json relative to the working directory
+    os.chdir(ROOT)
+    if SERVER_DIR not in sys.path:
+        sys.path.insert(0, SERVER_DIR)
+    import server
+    return server
+
+
+def summarize(latencies, elapsed, errors):
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 50) or 0.0, 1),
+        "p95_ms": round(percentile(latencies, 95) or 0.0, 1),
+        "p99_ms": round(percentile(latencies, 99) or 0.0, 1),
+    }
+
+
+# ---- uvicorn mode ----
+
+def serve(port):
+    """
+    Entry point of the server subprocess: the app plus a lag probe and a stats route.
+    """
+    import uvicorn
+
+    server = import_server()
+    app = server.fastAPI_app
+    probe = LagProbe()
+
+    @app.post("/__bench/reset")
+    async def reset_stats():
+        # The probe is started from the first request so it runs on uvicorn's loop
+        if not hasattr(app.state, "lag_probe_task"):
+            app.state.lag_probe_task = asyncio.create_task(probe.run())
+        probe.reset()
+        return {}
+
+    @app.get("/__bench/stats")
+    async def stats():
+        return {**probe.summary(), "rss_mb": round(rss_mb(), 1)}
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def drive_http(base_url, concurrency, num_requests):
+    import httpx
+
+    latencies = []
+    errors = 0
+    counter = iter(range(num_requests))
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=httpx.Limits(max_connections=concurrency)) as client:
+        await client.post("/__bench/reset")
+
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                start = time.perf_counter()
+                response = await client.post("/generate-itinerary", json={"user_message": PROMPTS[i % len(PROMPTS)]})
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        server_stats = (await client.get("/__bench/stats")).json()
+    return {**summarize(latencies, elapsed, errors), **server_stats}
+
+
+def run_uvicorn(args, levels):
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        raise ImportError("The uvicorn mode requires httpx. Install it with `pip install httpx`.")
+
+    port = free_port()
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port)], env=os.environ.copy())
+    base_url = f"http://127.0.0.1:{port}"
+    results = {}
+    try:
+        wait_for_server(base_url, process)
+        # The graph is built lazily by the first request
+        asyncio.run(drive_http(base_url, 1, 1))
+        for concurrency in levels:
+            results[str(concurrency)] = asyncio.run(drive_http(base_url, concurrency, args.requests or concurrency * args.requests_per_client))
+            print_row("uvicorn", concurrency, results[str(concurrency)])
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return results
+
+
+def wait_for_server(base_url, process, timeout=120.0):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The server process exited during startup")
+        try:
+            httpx.get(base_url + "/", timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise TimeoutError("The server did not start in time")
+
+
+# ---- Mangum mode ----
+
+def api_gateway_event(user_message):
+    """
+    A synthetic API Gateway HTTP API (payload format 2.0) event for POST /prod/generate-itinerary.
+    """
+    now = time.time()
+    return {
+        "version": "2.0",
+        "routeKey": "POST /generate-itinerary",
+        "rawPath": "/prod/generate-itinerary",
+        "rawQueryString": "",
+        "headers": {"content-type": "application/json", "host": "bench.execute-api.us-east-1.amazonaws.com"},
+        "requestContext": {
+            "accountId": "123456789012",
+            "apiId": "bench",
+            "domainName": "bench.execute-api.us-east-1.amazonaws.com",
+            "http": {
+                "method": "POST",
+                "path": "/prod/generate-itinerary",
+                "protocol": "HTTP/1.1",
+                "sourceIp": "127.0.0.1",
+                "userAgent": "bench",
+            },
+            "requestId": str(uuid.uuid4()),
+            "routeKey": "POST /generate-itinerary",
+            "stage": "prod",
+            "time": time.strftime("%d/%b/%Y:%H:%M:%S +0000", time.gmtime(now)),
+            "timeEpoch": int(now * 1000),
+        },
+        "body": json.dumps({"user_message": user_message}),
+        "isBase64Encoded": False,
+    }
+
+
+def lambda_context(timeout_ms=90_000):
+    deadline = time.monotonic() + timeout_ms / 1000
+    return types.SimpleNamespace(
+        function_name="itinerary-bench",
+        aws_request_id=str(uuid.uuid4()),
+        get_remaining_time_in_millis=lambda: int((deadline - time.monotonic()) * 1000),
+    )
+
+
+def mangum_worker(worker_id, num_requests, barrier, results):
+    """
+    One simulated Lambda instance: cold start, then `num_requests` warm invocations.
+    """
+    probe = LagProbe()
+    probe.start_thread()
+    start = time.perf_counter()
+    server = import_server()
+    response = server.handler(api_gateway_event(PROMPTS[0]), lambda_context())
+    cold_start_ms = (time.perf_counter() - start) * 1000
+    if response["statusCode"] != 200:
+        raise RuntimeError(f"Warm-up invocation failed: {response}")
+
+    barrier.wait()
+    probe.reset()
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for i in range(num_requests):
+        request_start = time.perf_counter()
+        response = server.handler(api_gateway_event(PROMPTS[(worker_id + i) % len(PROMPTS)]), lambda_context())
+        latencies.append((time.perf_counter() - request_start) * 1000)
+        errors += response["statusCode"] != 200
+    results.put({
+        "latencies": latencies,
+        "errors": errors,
+        "started": started,
+        "finished": time.perf_counter(),
+        "cold_start_ms": cold_start_ms,
+        "rss_mb": rss_mb(),
+        "lag": probe.samples,
+    })
+
+
+def run_mangum(args, levels):
+    # fork keeps perf_counter comparable across workers and avoids re-importing this script
+    context = multiprocessing.get_context("fork")
+    results = {}
+    for concurrency in levels:
+        total = args.requests or concurrency * args.requests_per_client
+        per_worker = [total // concurrency + (i < total % concurrency) for i in range(concurrency)]
+        barrier = context.Barrier(concurrency)
+        queue = context.Queue()
+        workers = [context.Process(target=mangum_worker, args=(i, per_worker[i], barrier, queue)) for i in range(concurrency)]
+        for worker in workers:
+            worker.start()
+        outputs = [queue.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+
+        latencies = [latency for output in outputs for latency in output["latencies"]]
+        elapsed = max(o["finished"] for o in outputs) - min(o["started"] for o in outputs)
+        lag = LagProbe()
+        lag.samples = [sample for output in outputs for sample in output["lag"]]
+        results[str(concurrency)] = {
+            **summarize(latencies, elapsed, sum(o["errors"] for o in outputs)),
+            **lag.summary(),
+            "rss_mb": round(max(o["rss_mb"] for o in outputs), 1),
+            "cold_start_ms": round(statistics.median(o["cold_start_ms"] for o in outputs), 1),
+        }
+        print_row("mangum", concurrency, results[str(concurrency)])
+    return results
+
+
+# ---- Reporting ----
+
+def print_header():
+    print(f"{'mode':<8} {'conc':>5} {'reqs':>6} {'err':>4} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'lag p99':>8} {'lag max':>8} {'rss MB':>8}")
+
+
+def print_row(mode, concurrency, r):
+    print(f"{mode:<8} {concurrency:>5} {r['requests']:>6} {r['errors']:>4} {r['rps']:>8.1f} {r['p50_ms']:>8.1f} "
+          f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['lag_p99_ms']:>8.1f} {r['lag_max_ms']:>8.1f} {r['rss_mb']:>8.1f}")
+
+
+def compare(results, baseline, tolerance):
+    """
+    Regressions against the baseline: lower RPS or higher p95 latency / RSS beyond `tolerance`.
+
+    Returns:
+        list: Human-readable regression descriptions
+    """
+    regressions = []
+    for mode, levels in results.items():
+        for concurrency, current in levels.items():
+            previous = baseline.get(mode, {}).get(concurrency)
+            if not previous:
+                continue
+            checks = [
+                ("rps", current["rps"] < previous["rps"] * (1 - tolerance)),
+                ("p95_ms", current["p95_ms"] > previous["p95_ms"] * (1 + tolerance)),
+                ("rss_mb", current["rss_mb"] > previous["rss_mb"] * (1 + tolerance)),
+            ]
+            for metric, regressed in checks:
+                if regressed:
+                    regressions.append(f"{mode} c={concurrency} {metric}: {previous[metric]} -> {current[metric]}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /generate-itinerary with the fake Bedrock backend")
+    parser.add_argument("--mode", choices=["uvicorn", "mangum", "both"], default="both", help="How the app is driven")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests-per-client", type=int, default=10, help="Requests per concurrent client at each level")
+    parser.add_argument("--requests", type=int, default=None, help="Fixed number of requests per level (overrides --requests-per-client)")
+    parser.add_argument("--latency", choices=["fixed", "uniform", "normal", "lognormal"], default="lognormal", help="Fake LLM latency distribution")
+    parser.add_argument("--first-token-ms", type=float, default=50.0, help="Fake LLM time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="Fake LLM latency spread")
+    parser.add_argument("--tokens-per-second", type=float, default=500.0, help="Fake LLM output rate")
+    parser.add_argument("--seed", type=int, default=0, help="Fake LLM latency seed")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run's results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative change before a regression is reported")
+    parser.add_argument("--output", default=None, help="Also write this run's results to a JSON file")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    configure_fake_llm(args)
+    if args.serve:
+        serve(args.port)
+        return
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    results = {}
+    print_header()
+    if args.mode in ("uvicorn", "both"):
+        results["uvicorn"] = run_uvicorn(args, levels)
+    if args.mode in ("mangum", "both"):
+        results["mangum"] = run_mangum(args, levels)
+    for level in results.get("mangum", {}).values():
+        print(f"mangum cold start (median per instance): {level['cold_start_ms']:.0f} ms")
+        break
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    if regressions:
+        print(f"REGRESSIONS vs {os.path.relpath(args.baseline, ROOT)} (tolerance {args.tolerance:.0%}):")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"No regressions vs {os.path.relpath(args.baseline, ROOT)} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
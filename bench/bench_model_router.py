@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark: model routing by request complexity.
+
+Classifies a labelled synthetic mix of simple lookups and complex itinerary requests,
+then runs them through RoutedChatModel over fake models whose latency mimics a small
+and a large Bedrock model, and compares latency and cost with sending everything to
+the large model.
+
+    python bench/bench_model_router.py --requests 400 --complex-share 0.3
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from langchain_core.messages import HumanMessage
+
+from fake_llm import FakeBedrockChatModel
+from model_router import DEFAULT_ROUTES, RoutedChatModel, classify_request, request_cost
+
+CITIES = ["Paris", "Rome", "Tokyo", "New York", "Barcelona", "Lisbon", "Prague", "Vienna", "Berlin", "Amsterdam"]
+SIMPLE = [
+    "What's the weather in {a} this weekend?",
+    "Top attractions in {a}",
+    "Is {a} expensive for tourists?",
+    "Best time of year to visit {a}?",
+    "Plan a trip to {a}",
+    "Any good museums in {a}?",
+]
+COMPLEX = [
+    "Plan a {n} day itinerary across {a}, {b} and {c} with kids on a budget",
+    "I want a {n}-day trip to {a} with museums, nightlife and vegetarian food, day by day",
+    "Create a schedule for {n} nights in {a} then {b}, we are a family of four and need accessible hotels",
+    "Two weeks road trip from {a} to {b} via {c}, luxury hotels, hiking and beaches",
+]
+
+
+def sample_requests(rng, count, complex_share):
+    requests = []
+    for _ in range(count):
+        a, b, c = rng.sample(CITIES, 3)
+        kind = "complex" if rng.random() < complex_share else "simple"
+        template = rng.choice(COMPLEX if kind == "complex" else SIMPLE)
+        requests.append((template.format(a=a, b=b, c=c, n=rng.randint(3, 12)), kind))
+    return requests
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def run(model, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, costs = [], []
+
+    async def one(message):
+        async with semaphore:
+            start = time.perf_counter()
+            result = await model.ainvoke([HumanMessage(content=message)])
+            latencies.append(time.perf_counter() - start)
+            route = next(r for r in DEFAULT_ROUTES.values() if r.model_id == result.response_metadata["model_name"])
+            costs.append(request_cost(route, result.usage_metadata))
+
+    await asyncio.gather(*(one(message) for message, _ in requests))
+    return latencies, costs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model routing")
+    parser.add_argument("--requests", type=int, default=400, help="Requests in the mix")
+    parser.add_argument("--complex-share", type=float, default=0.3, help="Fraction of complex requests")
+    parser.add_argument("--small-ms", type=float, default=250, help="Fake latency of the small model")
+    parser.add_argument("--large-ms", type=float, default=900, help="Fake latency of the large model")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent calls")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    requests = sample_requests(random.Random(args.seed), args.requests, args.complex_share)
+    classify_request.cache_clear()
+    start = time.perf_counter()
+    routes = [classify_request(message).route for message, _ in requests]
+    classify_us = (time.perf_counter() - start) / len(requests) * 1e6
+    correct = sum(route == kind for route, (_, kind) in zip(routes, requests))
+    under = sum(route == "simple" and kind == "complex" for route, (_, kind) in zip(routes, requests))
+    print(f"classification: {correct}/{len(requests)} correct ({correct / len(requests):.1%}), "
+          f"{under} complex requests sent to the small model, {classify_us:.1f} us/request uncached")
+
+    def fake(route, ms):
+        return FakeBedrockChatModel(model=route.model_id, first_token_ms=ms, latency_distribution="lognormal",
+                                    latency_jitter_ms=ms / 4, seed=args.seed)
+
+    small, large = DEFAULT_ROUTES["simple"], DEFAULT_ROUTES["complex"]
+    routed = RoutedChatModel(models={"simple": fake(small, args.small_ms), "complex": fake(large, args.large_ms)})
+    large_only = RoutedChatModel(models={"simple": fake(large, args.large_ms), "complex": fake(large, args.large_ms)},
+                                 routes={"simple": large._replace(name="simple"), "complex": large})
+    for name, model in (("all requests -> large model", large_only), ("routed by complexity", routed)):
+        latencies, costs = asyncio.run(run(model, requests, args.concurrency))
+        print(f"{name:<28} p50 {statistics.median(latencies) * 1e3:6.0f} ms | p95 {percentile(latencies, 95) * 1e3:6.0f} ms | "
+              f"cost ${sum(costs):.4f} (${sum(costs) / len(costs) * 1000:.3f} per 1k requests)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: multi-city itinerary requests through the single ReAct loop vs. the
+map-reduce multi-city mode of the itinerary graph (multi_city.py), with the fake
+Bedrock backend.
+
+The single loop is scripted the way a tool-calling model walks through the cities:
+one turn per city calling the weather and attractions tools for it, then the answer,
+so N cities cost N + 1 sequential LLM calls. In multi-city mode every city worker
+makes 2 calls in parallel (at most --workers at once), followed by one merge call.
+
+    python bench/bench_multi_city.py --cities 1,2,4,8 --first-token-ms 400
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "3_deploy_langGraph_agent"))
+
+CITIES = ["Paris", "Rome", "Venice", "Barcelona", "London", "Vienna", "Prague", "Lisbon"]
+
+
+def request(cities):
+    if len(cities) == 1:
+        return f"Plan 3 days in {cities[0]}, we like museums and food"
+    return f"Plan a trip across {', '.join(cities[:-1])} and {cities[-1]}, 2 days each, we like museums and food"
+
+
+def sequential_script(cities):
+    turns = [
+        {"tool_calls": [
+            {"name": "mock_get_weather_forecast", "args": {"city": city}},
+            {"name": "mock_search_tourist_attractions", "args": {"city": city}},
+        ]}
+        for city in cities
+    ]
+    return turns + [{"text": "Here is your itinerary: " + ", ".join(f"2 days in {city}" for city in cities)}]
+
+
+async def measure(graph, message, runs):
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = await graph.ainvoke({"user_message": message})
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the multi-city map-reduce itinerary mode")
+    parser.add_argument("--cities", default="1,2,4,6,8", help="Comma-separated numbers of cities")
+    parser.add_argument("--first-token-ms", type=float, default=400, help="Fake Bedrock latency per LLM call")
+    parser.add_argument("--workers", type=int, default=4, help="City workers running at once (MULTI_CITY_WORKERS)")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per point; the median is reported")
+    args = parser.parse_args()
+
+    os.environ["MULTI_CITY_WORKERS"] = str(args.workers)
+    # The scripted single loop takes 2 steps per city; the default step limit would cut it short
+    os.environ["ITINERARY_MAX_STEPS"] = "50"
+    import server
+    from fake_llm import FakeBedrockChatModel
+
+    os.chdir(ROOT)  # the mock tools read data/*.json
+    print(f"fake LLM latency {args.first_token_ms:.0f} ms per call, {args.workers} city workers")
+    print(f"{'cities':>6} | {'single loop':>11} | {'multi-city':>10} | speedup | cities planned")
+    for count in (int(n) for n in args.cities.split(",")):
+        cities = CITIES[:count]
+        message = request(cities)
+
+        os.environ["MULTI_CITY"] = "0"
+        single = server.build_itinerary_graph(
+            FakeBedrockChatModel(responses=sequential_script(cities), first_token_ms=args.first_token_ms)
+        )
+        os.environ["MULTI_CITY"] = "1"
+        multi = server.build_itinerary_graph(FakeBedrockChatModel(first_token_ms=args.first_token_ms))
+
+        single_seconds, _ = asyncio.run(measure(single, message, args.runs))
+        multi_seconds, result = asyncio.run(measure(multi, message, args.runs))
+        planned = len(result.get("cities") or []) or 1
+        print(f"{count:>6} | {single_seconds * 1e3:>8.0f} ms | {multi_seconds * 1e3:>7.0f} ms | "
+              f"{single_seconds / multi_seconds:>6.1f}x | {planned}")
+
+
+if __name__ == "__main__":
+    main()
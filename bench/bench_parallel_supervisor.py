@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the notebook's serial supervisor vs. the Send-based parallel supervisor
+(parallel_supervisor.py) with the fake Bedrock backend.
+
+The serial supervisor is rebuilt as in 2_advance-langgraph-multi-agent-setup.ipynb: a
+structured-output router picks one agent per hop until it returns FINISH. Its routing
+decisions are scripted, since the fake model cannot reason about them.
+
+    python bench/bench_parallel_supervisor.py --runs 10 --first-token-ms 400
+"""
+import argparse
+import functools
+import os
+import statistics
+import sys
+import time
+from typing import Annotated, Literal, TypedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import HumanMessage
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.tools import tool
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+from langgraph.prebuilt import create_react_agent
+from pydantic import BaseModel
+
+from fake_llm import FakeBedrockChatModel
+from parallel_supervisor import build_parallel_supervisor
+
+REQUESTS = {
+    "flight and hotel": ("Cancel my flight booking 200 and my hotel booking 193", ["flight_agent", "hotel_agent"]),
+    "flight only": ("Get details of my flight booking id 200", ["flight_agent"]),
+}
+
+
+@tool
+def cancel_flight_booking(request: str) -> str:
+    """Cancel or look up a flight booking."""
+    return "Flight booking 200 handled. FINISHED"
+
+
+@tool
+def cancel_hotel_booking(request: str) -> str:
+    """Cancel or look up a hotel booking."""
+    return "Hotel booking 193 handled. FINISHED"
+
+
+class routeResponse(BaseModel):
+    next: Literal["FINISH", "flight_agent", "hotel_agent"]
+
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+    next: str
+
+
+class SupervisorCalls(BaseCallbackHandler):
+    def __init__(self):
+        self.calls = 0
+
+    def on_chat_model_start(self, serialized, messages, *, metadata=None, **kwargs):
+        if (metadata or {}).get("ls_model_name") == "supervisor":
+            self.calls += 1
+
+
+def serial_supervisor(llm, flight_agent, hotel_agent):
+    """
+    The notebook's supervisor workflow: one routing LLM call per hop.
+    """
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "Given the conversation below who should act next? Return one of FINISH, flight_agent, hotel_agent."),
+        ("placeholder", "{messages}"),
+    ])
+    chain = prompt | llm.with_structured_output(routeResponse)
+
+    def supervisor_agent(state):
+        return {"next": chain.invoke(state).next}
+
+    def agent_node(state, agent, name):
+        result = agent.invoke(state)
+        return {"messages": [HumanMessage(content=result["messages"][-1].content, name=name)]}
+
+    workflow = StateGraph(State)
+    workflow.add_node("supervisor", supervisor_agent)
+    workflow.add_node("flight_agent", functools.partial(agent_node, agent=flight_agent, name="flight_agent"))
+    workflow.add_node("hotel_agent", functools.partial(agent_node, agent=hotel_agent, name="hotel_agent"))
+    workflow.add_edge(START, "supervisor")
+    workflow.add_edge("flight_agent", "supervisor")
+    workflow.add_edge("hotel_agent", "supervisor")
+    workflow.add_conditional_edges("supervisor", lambda x: x["next"], {"flight_agent": "flight_agent", "hotel_agent": "hotel_agent", "FINISH": END})
+    return workflow.compile()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial vs. parallel supervisor graphs")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per request and graph")
+    parser.add_argument("--first-token-ms", type=float, default=400, help="Fake Bedrock latency per LLM call")
+    args = parser.parse_args()
+
+    def fake(model, responses=None):
+        return FakeBedrockChatModel(model=model, responses=responses, first_token_ms=args.first_token_ms)
+
+    flight_agent = create_react_agent(fake("agent"), tools=[cancel_flight_booking])
+    hotel_agent = create_react_agent(fake("agent"), tools=[cancel_hotel_booking])
+    parallel = build_parallel_supervisor(fake("supervisor"), flight_agent, hotel_agent)
+
+    print(f"fake LLM latency {args.first_token_ms:.0f} ms per call, {args.runs} runs each")
+    for name, (message, agents) in REQUESTS.items():
+        routes = [{"tool_calls": [{"name": "routeResponse", "args": {"next": agent}}]} for agent in agents + ["FINISH"]]
+        serial = serial_supervisor(fake("supervisor", routes), flight_agent, hotel_agent)
+        for graph_name, graph in (("serial supervisor", serial), ("parallel supervisor", parallel)):
+            latencies, calls = [], []
+            for _ in range(args.runs):
+                counter = SupervisorCalls()
+                start = time.perf_counter()
+                graph.invoke({"messages": [("user", message)]}, {"callbacks": [counter]})
+                latencies.append(time.perf_counter() - start)
+                calls.append(counter.calls)
+            print(f"{name:<18} {graph_name:<20} {statistics.mean(latencies) * 1e3:7.0f} ms | "
+                  f"{statistics.mean(calls):.1f} supervisor LLM calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: convert_message_langchain_to_ragas vs. the batch convert_messages API.
+
+    python bench/bench_ragas_conversion.py --traces 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from utils import convert_message_langchain_to_ragas, convert_messages
+
+
+def synthetic_trace(i):
+    """
+    A ReAct-style trace in the shape Bedrock Converse returns: a list-content AI
+    message with text and a tool_use block, a tool result and a plain-text answer.
+    """
+    return [
+        HumanMessage(content=f"Plan a trip to Paris for traveller {i}"),
+        AIMessage(
+            content=[
+                {"type": "text", "text": "Let me look up the travel guide."},
+                {"type": "tool_use", "id": f"tool-{i}", "name": "travel_guide", "input": {"query": "Paris"}},
+            ],
+            tool_calls=[{"name": "travel_guide", "args": {"query": "Paris"}, "id": f"tool-{i}"}],
+        ),
+        ToolMessage(content="Paris is the capital of France." * 20, name="travel_guide", tool_call_id=f"tool-{i}"),
+        AIMessage(
+            content="Day 1: Louvre. Day 2: Eiffel Tower.",
+            usage_metadata={"input_tokens": 812, "output_tokens": 64, "total_tokens": 876},
+        ),
+    ]
+
+
+def time_it(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LangChain to RAGAS message conversion")
+    parser.add_argument("--traces", type=int, default=2000, help="Number of synthetic traces")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions, best time is reported")
+    args = parser.parse_args()
+
+    messages = [message for i in range(args.traces) for message in synthetic_trace(i)]
+
+    # Both converters must agree on traces with a single tool call
+    assert [convert_message_langchain_to_ragas(m) for m in messages[:4]] == list(convert_messages(messages[:4]))
+
+    legacy = time_it(lambda: [convert_message_langchain_to_ragas(m) for m in messages], args.repeat)
+    batch = time_it(lambda: list(convert_messages(messages)), args.repeat)
+
+    print(f"Messages: {len(messages)}")
+    print(f"convert_message_langchain_to_ragas: {legacy * 1000:8.1f} ms ({len(messages) / legacy:,.0f} msg/s)")
+    print(f"convert_messages:                   {batch * 1000:8.1f} ms ({len(messages) / batch:,.0f} msg/s)")
+    print(f"Speedup: {legacy / batch:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
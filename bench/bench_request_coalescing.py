@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Bedrock calls saved by coalescing identical in-flight itinerary requests.
+
+Bursts of concurrent requests for a few popular queries (Zipf-distributed, with
+random case and spacing) are sent to the FastAPI app in-process with the fake
+Bedrock backend, once with COALESCE_REQUESTS=0 and once with coalescing on.
+
+    python bench/bench_request_coalescing.py --bursts 20 --burst-size 50 --first-token-ms 400
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "3_deploy_langGraph_agent"))
+
+CITIES = ["Paris", "Rome", "Tokyo", "New York", "Barcelona", "Lisbon", "Prague", "Vienna", "Berlin", "Amsterdam"]
+LLM_CALLS = re.compile(r"^llm_request_duration_seconds_count\{.*\} (\S+)$", re.MULTILINE)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def burst_messages(rng, size, distinct, zipf_s):
+    weights = [1 / (rank + 1) ** zipf_s for rank in range(distinct)]
+    messages = []
+    for index in rng.choices(range(distinct), weights=weights, k=size):
+        city = CITIES[index % len(CITIES)]
+        text = f"Plan a {index // len(CITIES) + 2} day trip to {city}, I love museums and food"
+        if rng.random() < 0.5:
+            text = text.lower()
+        if rng.random() < 0.3:
+            text = "  " + text.replace(" ", "  ", 1)
+        messages.append(text)
+    return messages
+
+
+async def llm_calls(client):
+    text = (await client.get("/metrics")).text
+    return sum(float(value) for value in LLM_CALLS.findall(text))
+
+
+async def run(client, bursts, gap_seconds):
+    latencies = []
+    statuses = []
+
+    async def one(message):
+        start = time.perf_counter()
+        response = await client.post("/generate-itinerary", json={"user_message": message})
+        latencies.append(time.perf_counter() - start)
+        statuses.append(response.status_code)
+
+    calls_before = await llm_calls(client)
+    start = time.perf_counter()
+    for messages in bursts:
+        await asyncio.gather(*(one(message) for message in messages))
+        await asyncio.sleep(gap_seconds)
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(latencies),
+        "errors": sum(status != 200 for status in statuses),
+        "llm_calls": int(await llm_calls(client) - calls_before),
+        "p50_ms": statistics.median(latencies) * 1e3,
+        "p99_ms": percentile(latencies, 99) * 1e3,
+        "seconds": elapsed,
+    }
+
+
+async def main_async(args):
+    import httpx
+
+    import server
+
+    rng = random.Random(args.seed)
+    bursts = [burst_messages(rng, args.burst_size, args.distinct, args.zipf) for _ in range(args.bursts)]
+    transport = httpx.ASGITransport(app=server.fastAPI_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        await client.post("/generate-itinerary", json={"user_message": "warm up"})
+        results = {}
+        for name, enabled in (("without coalescing", "0"), ("with coalescing", "1")):
+            os.environ["COALESCE_REQUESTS"] = enabled
+            results[name] = await run(client, bursts, args.gap_ms / 1e3)
+
+    print(f"{args.bursts} bursts x {args.burst_size} concurrent requests over {args.distinct} popular queries (zipf s={args.zipf})")
+    for name, r in results.items():
+        print(f"{name:<20} {r['requests']} requests {r['errors']} errors | {r['llm_calls']:>5} LLM calls | "
+              f"p50 {r['p50_ms']:7.0f} ms | p99 {r['p99_ms']:7.0f} ms | {r['seconds']:.1f}s")
+    before = results["without coalescing"]["llm_calls"]
+    after = results["with coalescing"]["llm_calls"]
+    print(f"LLM call reduction: {before} -> {after} ({(1 - after / before) * 100:.1f}% fewer)")
+    print(f"coalescer: {server.get_single_flight().stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark request coalescing under bursty load")
+    parser.add_argument("--bursts", type=int, default=20, help="Number of bursts")
+    parser.add_argument("--burst-size", type=int, default=50, help="Concurrent requests per burst")
+    parser.add_argument("--distinct", type=int, default=30, help="Distinct popular queries")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of query popularity")
+    parser.add_argument("--gap-ms", type=float, default=100, help="Pause between bursts")
+    parser.add_argument("--first-token-ms", type=float, default=400, help="Fake Bedrock time to first token")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_FIRST_TOKEN_MS"] = str(args.first_token_ms)
+    os.environ.setdefault("FAKE_LLM_LATENCY", "lognormal")
+    os.environ.setdefault("FAKE_LLM_JITTER_MS", str(args.first_token_ms / 4))
+    os.environ.setdefault("FAKE_LLM_SEED", str(args.seed))
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark: route_optimizer.py on random trips of N cities from the route table.
+
+For every N it reports the time of Held-Karp (exact, only up to --exact-max cities) and
+of nearest neighbor + 2-opt, how far the heuristic is above the optimum, and how much
+shorter the optimized route is than visiting the cities in the order they were given.
+
+    python bench/bench_route_optimizer.py --sizes 5,10,15,20,25 --objective distance
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from route_optimizer import OBJECTIVES, held_karp, nearest_neighbor, route_cost, two_opt
+from route_table import get_route_table
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the trip route optimizer")
+    parser.add_argument("--sizes", default="5,8,10,12,13,15,20,25", help="Comma-separated numbers of cities")
+    parser.add_argument("--objective", default="distance", choices=sorted(OBJECTIVES), help="What to minimize")
+    parser.add_argument("--trips", type=int, default=5, help="Random trips per size; medians are reported")
+    parser.add_argument("--exact-max", type=int, default=16, help="Largest trip solved with Held-Karp too")
+    parser.add_argument("--round-trip", action="store_true", help="Return to the first city")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    table = get_route_table()
+    matrix = getattr(table, OBJECTIVES[args.objective]).astype(np.float64)
+    rng = np.random.default_rng(args.seed)
+
+    print(f"objective {args.objective}, {args.trips} random trips per size, medians")
+    print(f"{'cities':>6} | {'held-karp':>10} | {'nn+2-opt':>9} | {'gap':>6} | vs. given order")
+    for size in (int(n) for n in args.sizes.split(",")):
+        exact_times, heuristic_times, gaps, savings = [], [], [], []
+        for _ in range(args.trips):
+            indices = rng.choice(len(table), size=size, replace=False)
+            cost = matrix[np.ix_(indices, indices)]
+            order, seconds = timed(lambda: two_opt(cost, nearest_neighbor(cost), args.round_trip))
+            heuristic = route_cost(cost, order, args.round_trip)
+            heuristic_times.append(seconds)
+            best = heuristic
+            if size <= args.exact_max:
+                order, seconds = timed(held_karp, cost, args.round_trip)
+                best = route_cost(cost, order, args.round_trip)
+                exact_times.append(seconds)
+                gaps.append(heuristic / best - 1)
+            savings.append(1 - best / route_cost(cost, range(size), args.round_trip))
+
+        exact = f"{statistics.median(exact_times) * 1e3:>7.1f} ms" if exact_times else f"{'-':>10}"
+        gap = f"{statistics.median(gaps):>6.1%}" if gaps else f"{'-':>6}"
+        print(f"{size:>6} | {exact} | {statistics.median(heuristic_times) * 1e3:>6.1f} ms | {gap} | "
+              f"{statistics.median(savings):.0%} shorter")
+
+
+if __name__ == "__main__":
+    main()
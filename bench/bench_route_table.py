@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark: scalar distance/duration/price functions in utils.py vs. RouteTable lookups.
+
+    python bench/bench_route_table.py --lookups 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from route_table import RouteTable
+from utils import calculate_distance, calculate_flight_duration, calculate_flight_price, city_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark route lookups")
+    parser.add_argument("--lookups", type=int, default=1_000_000, help="Number of route lookups")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    start = time.perf_counter()
+    table = RouteTable(city_data)
+    build = time.perf_counter() - start
+
+    n = len(table)
+    origin_idx = rng.integers(0, n, args.lookups)
+    destination_idx = (origin_idx + rng.integers(1, n, args.lookups)) % n
+    pairs = [(table.cities[i], table.cities[j]) for i, j in zip(origin_idx.tolist(), destination_idx.tolist())]
+
+    start = time.perf_counter()
+    for origin, destination in pairs:
+        o = city_data[origin]
+        d = city_data[destination]
+        distance = calculate_distance(o[0], o[1], d[0], d[1])
+        calculate_flight_duration(distance)
+        calculate_flight_price(distance)
+    scalar = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lookup = table.lookup
+    for origin, destination in pairs:
+        lookup(origin, destination)
+    table_scalar = time.perf_counter() - start
+
+    start = time.perf_counter()
+    table.lookup_indices(origin_idx, destination_idx)
+    table_vector = time.perf_counter() - start
+
+    # The table must agree with the scalar functions
+    origin, destination = pairs[0]
+    o, d = city_data[origin], city_data[destination]
+    distance = calculate_distance(o[0], o[1], d[0], d[1])
+    expected = (distance, int(calculate_flight_duration(distance).total_seconds() // 60), calculate_flight_price(distance))
+    assert np.allclose(table.lookup(origin, destination), expected)
+
+    print(f"Cities: {n} | lookups: {args.lookups:,} | table build: {build * 1000:.2f} ms")
+    print(f"utils scalar functions:     {scalar:8.3f} s ({args.lookups / scalar:12,.0f} lookups/s)")
+    print(f"RouteTable.lookup:          {table_scalar:8.3f} s ({args.lookups / table_scalar:12,.0f} lookups/s)")
+    print(f"RouteTable.lookup_indices:  {table_vector:8.3f} s ({args.lookups / table_vector:12,.0f} lookups/s)")
+    print(f"Speedup: {scalar / table_scalar:.1f}x scalar, {scalar / table_vector:.1f}x vectorized")
+
+
+if __name__ == "__main__":
+    main()
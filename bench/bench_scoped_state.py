@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark: prompt tokens per hop over a long session, for the notebook's supervisor
+graph (every node sees the whole shared state) vs. scoped state channels
+(scoped_state.py).
+
+One checkpointed thread runs --turns user turns alternating between flight and hotel
+requests, with the fake Bedrock backend. Input tokens of every LLM call are read from
+its usage metadata and reported per hop for the supervisor and the sub-agents.
+
+    python bench/bench_scoped_state.py --turns 40
+"""
+import argparse
+import functools
+import os
+import sys
+from collections import defaultdict
+from typing import Annotated, Literal, TypedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import HumanMessage
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+from langgraph.prebuilt import create_react_agent
+from pydantic import BaseModel
+
+from fake_llm import FakeBedrockChatModel
+from scoped_state import ScopedSupervisorState, scoped_agent_node, scoped_supervisor
+
+REQUESTS = [
+    ("flight_agent", "Get details of my flight booking id {id}"),
+    ("hotel_agent", "Suggest hotels in Paris for booking {id} and check in on 2025-07-{day}"),
+]
+REPORT_TURNS = (1, 10, 20, 40)
+
+
+@tool
+def lookup_flight_booking(request: str) -> str:
+    """Look up or change a flight booking."""
+    return ("Flight booking found: departure SEA 08:15, arrival JFK 16:40, seat 14C, economy, "
+            "one checked bag, confirmation code ZX81QP, status confirmed. FINISHED")
+
+
+@tool
+def suggest_hotels(request: str) -> str:
+    """Suggest hotels or look up a hotel booking."""
+    return ("Hotels available: Hotel Lumiere (4 stars, 210 EUR/night, Le Marais), Maison Clery "
+            "(3 stars, 145 EUR/night, Montorgueil), Le Petit Parc (3 stars, 120 EUR/night, Bastille). FINISHED")
+
+
+class routeResponse(BaseModel):
+    next: Literal["FINISH", "flight_agent", "hotel_agent"]
+
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+    next: str
+
+
+class PromptTokens(BaseCallbackHandler):
+    """
+    Input tokens of each LLM call, grouped into supervisor and agent calls.
+    """
+
+    def __init__(self):
+        self.roles = {}
+        self.tokens = defaultdict(list)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self.roles[run_id] = "supervisor" if (metadata or {}).get("ls_model_name") == "supervisor" else "agent"
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage = getattr(response.generations[0][0].message, "usage_metadata", None) or {}
+        self.tokens[self.roles.pop(run_id, "agent")].append(usage.get("input_tokens", 0))
+
+
+def supervisor_node(llm):
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "Given the conversation below who should act next? Return one of FINISH, flight_agent, hotel_agent."),
+        ("placeholder", "{messages}"),
+    ])
+    chain = prompt | llm.with_structured_output(routeResponse)
+    return lambda state: {"next": chain.invoke(state).next}
+
+
+def build_graph(state_schema, supervisor, agent_nodes):
+    workflow = StateGraph(state_schema)
+    workflow.add_node("supervisor", supervisor)
+    for name, node in agent_nodes.items():
+        workflow.add_node(name, node)
+        workflow.add_edge(name, "supervisor")
+    workflow.add_edge(START, "supervisor")
+    workflow.add_conditional_edges("supervisor", lambda x: x["next"], {**{name: name for name in agent_nodes}, "FINISH": END})
+    return workflow.compile(checkpointer=MemorySaver())
+
+
+def notebook_graph(supervisor, agents):
+    """
+    As in the notebook: agents get the whole state, the supervisor the whole conversation.
+    """
+
+    def agent_node(state, agent, name):
+        result = agent.invoke(state)
+        return {"messages": [HumanMessage(content=result["messages"][-1].content, name=name)]}
+
+    nodes = {name: functools.partial(agent_node, agent=agent, name=name) for name, agent in agents.items()}
+    return build_graph(State, supervisor, nodes)
+
+
+def scoped_graph(supervisor, agents, max_turns):
+    nodes = {name: scoped_agent_node(agent, name) for name, agent in agents.items()}
+    return build_graph(ScopedSupervisorState, scoped_supervisor(supervisor, max_turns), nodes)
+
+
+def run_session(graph, turns):
+    """
+    Per turn: (supervisor input tokens per hop, agent input tokens per call).
+    """
+    config = {"configurable": {"thread_id": "long-session"}}
+    per_turn = []
+    for turn in range(turns):
+        _, request = REQUESTS[turn % len(REQUESTS)]
+        counter = PromptTokens()
+        graph.invoke({"messages": [("user", request.format(id=200 + turn, day=10 + turn % 20))]}, {**config, "callbacks": [counter]})
+        supervisor, agent = counter.tokens["supervisor"], counter.tokens["agent"]
+        per_turn.append((sum(supervisor) / len(supervisor), sum(agent) / max(1, len(agent))))
+    return per_turn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prompt growth of notebook vs. scoped supervisor state")
+    parser.add_argument("--turns", type=int, default=40, help="User turns in the session")
+    parser.add_argument("--max-turns", type=int, default=3, help="User turns the scoped supervisor sees")
+    args = parser.parse_args()
+
+    # Turns alternate flight and hotel, so the scripted routes do too
+    routes = [{"tool_calls": [{"name": "routeResponse", "args": {"next": next_}}]}
+              for agent, _ in REQUESTS for next_ in (agent, "FINISH")]
+    agents = {
+        "flight_agent": create_react_agent(FakeBedrockChatModel(model="agent"), tools=[lookup_flight_booking]),
+        "hotel_agent": create_react_agent(FakeBedrockChatModel(model="agent"), tools=[suggest_hotels]),
+    }
+    results = {}
+    for name, build in (("notebook state", notebook_graph), ("scoped state", scoped_graph)):
+        supervisor = supervisor_node(FakeBedrockChatModel(model="supervisor", responses=routes))
+        graph = build(supervisor, agents) if build is notebook_graph else build(supervisor, agents, args.max_turns)
+        results[name] = run_session(graph, args.turns)
+
+    print(f"input tokens per LLM call over a {args.turns}-turn session")
+    print(f"{'turn':>5} | {'supervisor: notebook':>20} {'scoped':>7} | {'agent: notebook':>15} {'scoped':>7}")
+    for turn in (t for t in REPORT_TURNS if t <= args.turns):
+        (sup_a, agent_a), (sup_b, agent_b) = results["notebook state"][turn - 1], results["scoped state"][turn - 1]
+        print(f"{turn:>5} | {sup_a:>20.0f} {sup_b:>7.0f} | {agent_a:>15.0f} {agent_b:>7.0f}")
+    for name, per_turn in results.items():
+        total = sum(sup + agent for sup, agent in per_turn)
+        print(f"{name:<15} mean input tokens per call {total / (2 * len(per_turn)):.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark: tiered supervisor routing (rules -> TF-IDF classifier -> LLM) vs. an LLM
+call on every hop.
+
+Synthetic supervisor hops are labelled with the correct next step. The "LLM" is an
+oracle that returns that label after a simulated Bedrock latency, so the numbers show
+how often the cheaper tiers skip it, how accurate they are and how much routing time
+they save. The classifier is trained on the route log of separate training sessions.
+
+    python bench/bench_supervisor_router.py --train-sessions 2000 --test-sessions 1000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from langchain_core.messages import HumanMessage
+
+from supervisor_router import RouteClassifier, TieredRouter, read_route_log
+
+CITIES = ["Paris", "Rome", "Nice", "Amsterdam", "Tokyo", "Lisbon", "Berlin", "Vienna", "Prague", "Madrid"]
+EXPLICIT = {
+    ("flight_agent",): ["Cancel my flight booking {id}", "Get details of my flight booking id {id}",
+                        "Find flights to {a} from {b}", "Change my flight {id} to {date}"],
+    ("hotel_agent",): ["Cancel my hotel booking id {id}", "Suggest hotels in {a} for {date}",
+                       "Get details of my hotel booking {id}", "Change my hotel check-in for booking {id} to {date}"],
+    ("flight_agent", "hotel_agent"): ["Cancel my flight {id} and my hotel {id2}", "Find a flight to {a} and a hotel there for {date}"],
+}
+IMPLICIT = {
+    ("flight_agent",): ["What are my options from {b} to {a} on {date}?", "I need to get to {a} from {b} next week",
+                        "Is there anything leaving {b} for {a} tomorrow morning?", "How much is a ticket from {b} to {a}?"],
+    ("hotel_agent",): ["Somewhere to sleep in {a} for three nights", "I need a place to stay near the center of {a}",
+                       "Find me a room in {a} from {date}", "Any cheap place to stay in {a}?"],
+    (): ["Thanks, that's all", "Hello there", "What can you do?"],
+}
+QUESTION = "Could you share the booking id so I can look it up?"
+
+
+def sample_session(rng):
+    """
+    Hops of one session: (messages so far, correct next step).
+    """
+    table = EXPLICIT if rng.random() < 0.6 else IMPLICIT
+    agents = rng.choice(list(table))
+    a, b = rng.sample(CITIES, 2)
+    request = rng.choice(table[agents]).format(
+        id=rng.randint(1, 999), id2=rng.randint(1, 999), a=a, b=b, date=f"2025-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}"
+    )
+    messages = [HumanMessage(content=request)]
+    hops = []
+    for agent in agents:
+        hops.append((list(messages), agent))
+        if rng.random() < 0.15:
+            # The agent needs more details, so the supervisor hands back to the user
+            messages.append(HumanMessage(content=QUESTION, name=agent))
+            hops.append((list(messages), "FINISH"))
+            return hops
+        messages.append(HumanMessage(content=f"Done: {request.lower()[:40]}. FINISHED", name=agent))
+    hops.append((list(messages), "FINISH"))
+    return hops
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tiered supervisor router")
+    parser.add_argument("--train-sessions", type=int, default=2000, help="Sessions whose LLM routes train the classifier")
+    parser.add_argument("--test-sessions", type=int, default=1000, help="Sessions routed in the benchmark")
+    parser.add_argument("--llm-ms", type=float, default=600, help="Simulated latency of the LLM routing call")
+    parser.add_argument("--threshold", type=float, default=0.85, help="Classifier confidence needed to skip the LLM")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    log_path = os.path.join(tempfile.mkdtemp(), "supervisor_routes.jsonl")
+    # Training: hops the rules cannot decide go to the (oracle) LLM, which logs its decisions
+    logger = TieredRouter(lambda state: {"next": state["label"]}, log_path=log_path)
+    for _ in range(args.train_sessions):
+        for messages, label in sample_session(rng):
+            logger.route({"messages": messages, "label": label})
+    texts, labels = read_route_log(log_path)
+    start = time.perf_counter()
+    classifier = RouteClassifier().fit(texts, labels)
+    print(f"classifier trained on {len(texts)} logged LLM routes in {time.perf_counter() - start:.2f}s "
+          f"({len(classifier.vocabulary)} terms)")
+
+    hops = [hop for _ in range(args.test_sessions) for hop in sample_session(rng)]
+    llm_calls = 0
+
+    def oracle(state):
+        nonlocal llm_calls
+        llm_calls += 1
+        return {"next": state["label"]}
+
+    router = TieredRouter(oracle, classifier=classifier, threshold=args.threshold)
+    correct = {"rules": [0, 0], "classifier": [0, 0], "llm": [0, 0]}
+    local_seconds = 0.0
+    for messages, label in hops:
+        start = time.perf_counter()
+        decision, tier = router.route({"messages": messages, "label": label})
+        if tier != "llm":
+            local_seconds += time.perf_counter() - start
+        router.decisions[tier] += 1
+        correct[tier][0] += decision == label
+        correct[tier][1] += 1
+
+    stats = router.stats()
+    print(f"{len(hops)} hops from {args.test_sessions} sessions")
+    for tier, (ok, total) in correct.items():
+        if total:
+            print(f"  {tier:<10} {total:>6} hops ({total / len(hops):6.1%}) | accuracy {ok / total:6.1%}")
+    all_llm = len(hops) * args.llm_ms / 1e3
+    tiered = llm_calls * args.llm_ms / 1e3 + local_seconds
+    print(f"LLM skipped on {stats['llm_skipped']:.1%} of hops; local tiers averaged {local_seconds / max(1, len(hops) - llm_calls) * 1e6:.0f} us/hop")
+    print(f"routing time at {args.llm_ms:.0f} ms per LLM call: {all_llm:.0f} s -> {tiered:.0f} s "
+          f"({(1 - tiered / all_llm):.1%} saved, {(all_llm - tiered) / len(hops) * 1e3:.0f} ms per hop)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Soak test for BoundedCheckpointSaver.
+
+Simulates many concurrent conversation threads against a small LangGraph graph (no LLM)
+and checks that the number of threads and checkpoints held in memory stays bounded
+while evicted threads are spilled to SQLite and can be resumed.
+
+    python bench/soak_checkpointer.py --threads 10000 --turns 3
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from typing import Annotated, TypedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, StateGraph
+from langgraph.graph.message import add_messages
+
+from checkpointer import BoundedCheckpointSaver
+
+
+class ChatState(TypedDict):
+    messages: Annotated[list, add_messages]
+
+
+def echo(state: ChatState):
+    return {"messages": [AIMessage(content=f"echo: {state['messages'][-1].content}")]}
+
+
+def build_graph(checkpointer):
+    workflow = StateGraph(ChatState)
+    workflow.add_node("echo", echo)
+    workflow.set_entry_point("echo")
+    workflow.add_edge("echo", END)
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test the bounded checkpointer")
+    parser.add_argument("--threads", type=int, default=10000, help="Number of simulated conversation threads")
+    parser.add_argument("--turns", type=int, default=3, help="Turns per thread")
+    parser.add_argument("--max-hot-threads", type=int, default=500, help="Threads kept in memory")
+    parser.add_argument("--max-checkpoints", type=int, default=4, help="Checkpoints retained per thread")
+    parser.add_argument("--batch-size", type=int, default=200, help="Spill batch size")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    db_path = os.path.join(tempfile.mkdtemp(), "soak_checkpoints.db")
+    saver = BoundedCheckpointSaver(
+        db_path=db_path,
+        max_checkpoints_per_thread=args.max_checkpoints,
+        max_threads=args.max_hot_threads,
+        idle_ttl_seconds=None,
+        batch_size=args.batch_size,
+    )
+    graph = build_graph(saver)
+
+    # Interleave turns across threads so most turns hit an evicted thread
+    schedule = [thread for thread in range(args.threads) for _ in range(args.turns)]
+    random.shuffle(schedule)
+
+    turns_seen = {}
+    max_hot_threads = 0
+    max_hot_checkpoints = 0
+    start = time.perf_counter()
+    for i, thread in enumerate(schedule, 1):
+        config = {"configurable": {"thread_id": f"thread-{thread}"}}
+        result = graph.invoke({"messages": [HumanMessage(content=f"turn {turns_seen.get(thread, 0)}")]}, config)
+        turns_seen[thread] = turns_seen.get(thread, 0) + 1
+        # Every turn must see the full history of the thread, including spilled turns
+        assert len(result["messages"]) == 2 * turns_seen[thread], f"thread-{thread} lost history"
+        if i % 1000 == 0:
+            stats = saver.stats()
+            max_hot_threads = max(max_hot_threads, stats["hot_threads"])
+            max_hot_checkpoints = max(max_hot_checkpoints, stats["hot_checkpoints"])
+            print(
+                f"{i:>8} turns | hot threads {stats['hot_threads']:>5} | hot checkpoints {stats['hot_checkpoints']:>6} "
+                f"| hot bytes {stats['hot_bytes']:>10} | sqlite rows {stats['sqlite_rows']:>6} | rss {rss_mb():.1f} MB"
+            )
+    elapsed = time.perf_counter() - start
+    saver.flush()
+    stats = saver.stats()
+    saver.close()
+
+    print("=" * 80)
+    print(f"Turns: {len(schedule)} in {elapsed:.1f}s ({len(schedule) / elapsed:.0f} turns/s)")
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+    print(f"Peak RSS: {rss_mb():.1f} MB")
+
+    bounded = (
+        max_hot_threads <= args.max_hot_threads
+        and max_hot_checkpoints <= args.max_hot_threads * args.max_checkpoints
+        and stats["sqlite_rows"] <= args.threads
+    )
+    print("PASS" if bounded else "FAIL: checkpointer exceeded its bounds")
+    sys.exit(0 if bounded else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,484 @@
+"""
+Data-access layer for the travel bookings SQLite database (data/travel_bookings.db).
+
+The booking tools used to open a new sqlite3 connection per call and every lookup
+other than by booking_id was a full table scan. BookingRepository keeps a small
+thread-safe pool of connections and reuses prepared statements (sqlite3 caches
+compiled statements per connection by SQL text, so all queries are module constants).
+The secondary indexes and WAL mode are set up with the schema (create_database and
+generate_bookings.py); opening a database never changes it. Async wrappers run the
+queries in a worker thread so they can be awaited from the FastAPI server.
+"""
+import asyncio
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from functools import partial
+
+DEFAULT_DB_PATH = "data/travel_bookings.db"
+
+# Secondary indexes created together with the schema (see create_database)
+INDEX_STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS idx_flight_bookings_user ON flight_bookings (user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_flight_bookings_route_date ON flight_bookings (origin, destination, departure_date)",
+    "CREATE INDEX IF NOT EXISTS idx_flight_bookings_departure_date ON flight_bookings (departure_date)",
+    "CREATE INDEX IF NOT EXISTS idx_hotel_bookings_user ON hotel_bookings (user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_hotel_bookings_city_check_in ON hotel_bookings (city, check_in_date)",
+    "CREATE INDEX IF NOT EXISTS idx_hotel_bookings_check_in ON hotel_bookings (check_in_date)",
+]
+
+SELECT_FLIGHT_BOOKING = "SELECT * FROM flight_bookings WHERE booking_id = ?"
+SELECT_HOTEL_BOOKING = "SELECT * FROM hotel_bookings WHERE booking_id = ?"
+# Keyset pagination: pages are fetched after the last booking_id seen, so deep pages stay cheap
+SELECT_FLIGHT_BOOKINGS_FOR_USER = "SELECT * FROM flight_bookings WHERE user_id = ? AND booking_id > ? ORDER BY booking_id LIMIT ?"
+SELECT_HOTEL_BOOKINGS_FOR_USER = "SELECT * FROM hotel_bookings WHERE user_id = ? AND booking_id > ? ORDER BY booking_id LIMIT ?"
+# Batch lookups pass the IDs as one JSON array, so the statement text (and its cached plan) never changes
+SELECT_FLIGHT_BOOKINGS = "SELECT * FROM flight_bookings WHERE booking_id IN (SELECT value FROM json_each(?))"
+SELECT_HOTEL_BOOKINGS = "SELECT * FROM hotel_bookings WHERE booking_id IN (SELECT value FROM json_each(?))"
+SELECT_FLIGHT_BOOKING_IDS = "SELECT booking_id FROM flight_bookings WHERE booking_id IN (SELECT value FROM json_each(?))"
+SELECT_HOTEL_BOOKING_IDS = "SELECT booking_id FROM hotel_bookings WHERE booking_id IN (SELECT value FROM json_each(?))"
+SELECT_FLIGHTS_ON_ROUTE = """
+SELECT * FROM flight_bookings
+WHERE origin = ? AND destination = ? AND departure_date BETWEEN ? AND ?
+ORDER BY departure_date, departure_time
+LIMIT ?
+"""
+UPDATE_FLIGHT_DATE = "UPDATE flight_bookings SET departure_date = ? WHERE booking_id = ?"
+DELETE_FLIGHT_BOOKING = "DELETE FROM flight_bookings WHERE booking_id = ?"
+UPDATE_HOTEL_DATES = """
+UPDATE hotel_bookings
+SET check_in_date = ?, check_out_date = ?, nights = ?, total_price = ?
+WHERE booking_id = ?
+"""
+DELETE_HOTEL_BOOKING = "DELETE FROM hotel_bookings WHERE booking_id = ?"
+
+FLIGHT_COLUMNS = (
+    "booking_id", "user_id", "user_name", "origin", "destination", "price", "flight_duration",
+    "departure_date", "departure_time", "arrival_date", "arrival_time", "distance", "booking_date",
+)
+HOTEL_COLUMNS = (
+    "booking_id", "user_id", "user_name", "city", "hotel_name", "check_in_date", "check_out_date",
+    "nights", "price_per_night", "total_price", "num_guests", "room_type",
+)
+
+
+def create_indexes(cursor):
+    """
+    Create the secondary indexes on the booking tables if they do not exist yet.
+    """
+    for statement in INDEX_STATEMENTS:
+        cursor.execute(statement)
+
+
+def create_database(db_path=DEFAULT_DB_PATH, with_indexes=True):
+    """
+    Create an empty bookings database at db_path in WAL mode, replacing any existing file.
+
+    Args:
+        db_path (str): Path of the SQLite database
+        with_indexes (bool): Create the secondary indexes too; bulk loaders create them after inserting
+    Returns:
+        tuple: (connection, cursor)
+    """
+    try:
+        os.remove(db_path)
+    except OSError:
+        pass
+    conn = sqlite3.connect(db_path)
+    # WAL lets the pooled readers run while a writer commits; the mode is stored in the
+    # file, so it is set here, once, rather than by every connection that opens it
+    conn.execute("PRAGMA journal_mode=WAL")
+    cursor = conn.cursor()
+
+    cursor.execute(
+        """
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY,
+        name TEXT,
+        age INTEGER,
+        home_location TEXT
+    )
+    """
+    )
+
+    cursor.execute(
+        """
+    CREATE TABLE IF NOT EXISTS flight_bookings (
+        booking_id INTEGER PRIMARY KEY,
+        user_id INTEGER,
+        user_name TEXT,
+        origin TEXT,
+        destination TEXT,
+        price REAL,
+        flight_duration INTEGER,
+        departure_date TEXT,
+        departure_time TEXT,
+        arrival_date TEXT,
+        arrival_time TEXT,
+        distance REAL,
+        booking_date TEXT,
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    )
+    """
+    )
+
+    cursor.execute(
+        """
+    CREATE TABLE IF NOT EXISTS hotel_bookings (
+        booking_id INTEGER PRIMARY KEY,
+        user_id INTEGER,
+        user_name TEXT,
+        city TEXT,
+        hotel_name TEXT,
+        check_in_date TEXT,
+        check_out_date TEXT,
+        nights INTEGER,
+        price_per_night REAL,
+        total_price REAL,
+        num_guests INTEGER,
+        room_type TEXT,
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    )
+    """
+    )
+
+    if with_indexes:
+        create_indexes(cursor)
+
+    conn.commit()
+    return conn, cursor
+
+
+def _existing_ids(conn, statement, booking_ids):
+    return {row[0] for row in conn.execute(statement, (json.dumps(list(booking_ids)),))}
+
+
+def _new_hotel_dates(booking, new_checkin_date, new_checkout_date):
+    """
+    New (check_in_date, check_out_date, nights, total_price) for a hotel booking row.
+    """
+    check_in_date = new_checkin_date or booking[5]
+    check_out_date = new_checkout_date or booking[6]
+    price_per_night = booking[8]
+    nights = (datetime.strptime(check_out_date, "%Y-%m-%d") - datetime.strptime(check_in_date, "%Y-%m-%d")).days
+    return check_in_date, check_out_date, nights, nights * price_per_night
+
+
+class ConnectionPool:
+    """
+    A fixed-size, thread-safe pool of SQLite connections.
+
+    Connections are opened lazily up to `max_size`; callers block (up to `timeout`
+    seconds) when all of them are checked out.
+
+    Args:
+        db_path (str): Path of the SQLite database
+        max_size (int): Maximum number of open connections
+        timeout (float): Seconds to wait for a free connection (also used as SQLite busy timeout)
+    """
+
+    def __init__(self, db_path, max_size=8, timeout=10.0):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False, cached_statements=256)
+        # journal_mode is left as it is: it would persist in the database file
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_open = self._opened < self.max_size
+            if can_open:
+                self._opened += 1
+        if can_open:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No database connection available after {self.timeout}s")
+
+    @contextmanager
+    def connection(self):
+        """
+        Check out a connection; the transaction is committed on success and rolled back on error.
+        """
+        conn = self._acquire()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._opened = 0
+
+
+class BookingRepository:
+    """
+    Queries and updates for flight and hotel bookings over a pooled connection.
+
+    Rows are returned as tuples in table column order, the same shape the booking
+    tools have always returned.
+
+    Args:
+        db_path (str): Path of the SQLite database
+        pool_size (int): Maximum number of pooled connections
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, pool_size=8):
+        self.db_path = db_path
+        self.pool = ConnectionPool(db_path, max_size=pool_size)
+
+    def close(self):
+        self.pool.close()
+
+    # ---- Flight bookings ----
+
+    def get_flight_booking(self, booking_id):
+        with self.pool.connection() as conn:
+            return conn.execute(SELECT_FLIGHT_BOOKING, (booking_id,)).fetchone()
+
+    def flight_bookings_for_user(self, user_id, limit=50, after_booking_id=0):
+        """
+        One page of a user's flight bookings ordered by booking_id. Pass the last booking_id
+        of a page as `after_booking_id` to get the next one.
+        """
+        with self.pool.connection() as conn:
+            return conn.execute(SELECT_FLIGHT_BOOKINGS_FOR_USER, (user_id, after_booking_id, limit)).fetchall()
+
+    def flights_on_route(self, origin, destination, start_date, end_date=None, limit=50):
+        """
+        Flight bookings on a route departing between start_date and end_date (inclusive, YYYY-MM-DD).
+        """
+        with self.pool.connection() as conn:
+            return conn.execute(
+                SELECT_FLIGHTS_ON_ROUTE, (origin, destination, start_date, end_date or start_date, limit)
+            ).fetchall()
+
+    def change_flight_date(self, booking_id, new_date):
+        """
+        Returns:
+            bool: True if the booking exists and was updated
+        """
+        with self.pool.connection() as conn:
+            return conn.execute(UPDATE_FLIGHT_DATE, (new_date, booking_id)).rowcount > 0
+
+    def cancel_flight_booking(self, booking_id):
+        """
+        Returns:
+            bool: True if the booking existed and was deleted
+        """
+        with self.pool.connection() as conn:
+            return conn.execute(DELETE_FLIGHT_BOOKING, (booking_id,)).rowcount > 0
+
+    # ---- Hotel bookings ----
+
+    def get_hotel_booking(self, booking_id):
+        with self.pool.connection() as conn:
+            return conn.execute(SELECT_HOTEL_BOOKING, (booking_id,)).fetchone()
+
+    def hotel_bookings_for_user(self, user_id, limit=50, after_booking_id=0):
+        """
+        One page of a user's hotel bookings ordered by booking_id. Pass the last booking_id
+        of a page as `after_booking_id` to get the next one.
+        """
+        with self.pool.connection() as conn:
+            return conn.execute(SELECT_HOTEL_BOOKINGS_FOR_USER, (user_id, after_booking_id, limit)).fetchall()
+
+    def change_hotel_dates(self, booking_id, new_checkin_date=None, new_checkout_date=None):
+        """
+        Change the check-in and/or check-out date and recalculate nights and total price.
+
+        Returns:
+            tuple: (check_in_date, check_out_date, nights, total_price), or None if the booking does not exist
+        """
+        with self.pool.connection() as conn:
+            booking = conn.execute(SELECT_HOTEL_BOOKING, (booking_id,)).fetchone()
+            if booking is None:
+                return None
+            updated = _new_hotel_dates(booking, new_checkin_date, new_checkout_date)
+            conn.execute(UPDATE_HOTEL_DATES, (*updated, booking_id))
+            return updated
+
+    def cancel_hotel_booking(self, booking_id):
+        """
+        Returns:
+            bool: True if the booking existed and was deleted
+        """
+        with self.pool.connection() as conn:
+            return conn.execute(DELETE_HOTEL_BOOKING, (booking_id,)).rowcount > 0
+
+    # ---- Batch operations, each in a single transaction ----
+
+    def get_flight_bookings(self, booking_ids):
+        """
+        Returns:
+            dict: booking_id -> row for the bookings that exist
+        """
+        with self.pool.connection() as conn:
+            return {row[0]: row for row in conn.execute(SELECT_FLIGHT_BOOKINGS, (json.dumps(list(booking_ids)),))}
+
+    def get_hotel_bookings(self, booking_ids):
+        """
+        Returns:
+            dict: booking_id -> row for the bookings that exist
+        """
+        with self.pool.connection() as conn:
+            return {row[0]: row for row in conn.execute(SELECT_HOTEL_BOOKINGS, (json.dumps(list(booking_ids)),))}
+
+    def change_flight_dates(self, changes):
+        """
+        Change the departure date of several flight bookings.
+
+        Args:
+            changes (list): (booking_id, new_date) pairs
+        Returns:
+            dict: booking_id -> True if the booking existed and was updated
+        """
+        changes = list(changes)
+        with self.pool.connection() as conn:
+            existing = _existing_ids(conn, SELECT_FLIGHT_BOOKING_IDS, [booking_id for booking_id, _ in changes])
+            conn.executemany(
+                UPDATE_FLIGHT_DATE,
+                [(new_date, booking_id) for booking_id, new_date in changes if booking_id in existing],
+            )
+        return {booking_id: booking_id in existing for booking_id, _ in changes}
+
+    def cancel_flight_bookings(self, booking_ids):
+        """
+        Returns:
+            dict: booking_id -> True if the booking existed and was deleted
+        """
+        booking_ids = list(booking_ids)
+        with self.pool.connection() as conn:
+            existing = _existing_ids(conn, SELECT_FLIGHT_BOOKING_IDS, booking_ids)
+            conn.executemany(DELETE_FLIGHT_BOOKING, [(booking_id,) for booking_id in existing])
+        return {booking_id: booking_id in existing for booking_id in booking_ids}
+
+    def change_hotel_dates_many(self, changes):
+        """
+        Change the dates of several hotel bookings and recalculate nights and total price.
+
+        Args:
+            changes (list): (booking_id, new_checkin_date, new_checkout_date) tuples; dates may be None
+        Returns:
+            dict: booking_id -> (check_in_date, check_out_date, nights, total_price), or None if not found
+        """
+        changes = list(changes)
+        results = {}
+        with self.pool.connection() as conn:
+            ids = json.dumps([booking_id for booking_id, _, _ in changes])
+            bookings = {row[0]: row for row in conn.execute(SELECT_HOTEL_BOOKINGS, (ids,))}
+            updates = []
+            for booking_id, new_checkin_date, new_checkout_date in changes:
+                booking = bookings.get(booking_id)
+                if booking is None:
+                    results[booking_id] = None
+                    continue
+                results[booking_id] = _new_hotel_dates(booking, new_checkin_date, new_checkout_date)
+                updates.append((*results[booking_id], booking_id))
+            conn.executemany(UPDATE_HOTEL_DATES, updates)
+        return results
+
+    def cancel_hotel_bookings(self, booking_ids):
+        """
+        Returns:
+            dict: booking_id -> True if the booking existed and was deleted
+        """
+        booking_ids = list(booking_ids)
+        with self.pool.connection() as conn:
+            existing = _existing_ids(conn, SELECT_HOTEL_BOOKING_IDS, booking_ids)
+            conn.executemany(DELETE_HOTEL_BOOKING, [(booking_id,) for booking_id in existing])
+        return {booking_id: booking_id in existing for booking_id in booking_ids}
+
+    # ---- Async wrappers for the FastAPI server ----
+
+    async def _run(self, method, *args, **kwargs):
+        return await asyncio.to_thread(partial(method, *args, **kwargs))
+
+    async def aget_flight_booking(self, booking_id):
+        return await self._run(self.get_flight_booking, booking_id)
+
+    async def aflight_bookings_for_user(self, user_id, limit=50, after_booking_id=0):
+        return await self._run(self.flight_bookings_for_user, user_id, limit, after_booking_id)
+
+    async def aflights_on_route(self, origin, destination, start_date, end_date=None, limit=50):
+        return await self._run(self.flights_on_route, origin, destination, start_date, end_date, limit)
+
+    async def achange_flight_date(self, booking_id, new_date):
+        return await self._run(self.change_flight_date, booking_id, new_date)
+
+    async def acancel_flight_booking(self, booking_id):
+        return await self._run(self.cancel_flight_booking, booking_id)
+
+    async def aget_hotel_booking(self, booking_id):
+        return await self._run(self.get_hotel_booking, booking_id)
+
+    async def ahotel_bookings_for_user(self, user_id, limit=50, after_booking_id=0):
+        return await self._run(self.hotel_bookings_for_user, user_id, limit, after_booking_id)
+
+    async def achange_hotel_dates(self, booking_id, new_checkin_date=None, new_checkout_date=None):
+        return await self._run(self.change_hotel_dates, booking_id, new_checkin_date, new_checkout_date)
+
+    async def acancel_hotel_booking(self, booking_id):
+        return await self._run(self.cancel_hotel_booking, booking_id)
+
+    async def aget_flight_bookings(self, booking_ids):
+        return await self._run(self.get_flight_bookings, booking_ids)
+
+    async def aget_hotel_bookings(self, booking_ids):
+        return await self._run(self.get_hotel_bookings, booking_ids)
+
+    async def achange_flight_dates(self, changes):
+        return await self._run(self.change_flight_dates, changes)
+
+    async def acancel_flight_bookings(self, booking_ids):
+        return await self._run(self.cancel_flight_bookings, booking_ids)
+
+    async def achange_hotel_dates_many(self, changes):
+        return await self._run(self.change_hotel_dates_many, changes)
+
+    async def acancel_hotel_bookings(self, booking_ids):
+        return await self._run(self.cancel_hotel_bookings, booking_ids)
+
+
+_repositories = {}
+_repositories_lock = threading.Lock()
+
+
+def get_booking_repository(db_path=DEFAULT_DB_PATH):
+    """
+    Shared BookingRepository per database path, so all tools in a process use one pool.
+    """
+    with _repositories_lock:
+        if db_path not in _repositories:
+            _repositories[db_path] = BookingRepository(db_path)
+        return _repositories[db_path]
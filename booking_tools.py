@@ -0,0 +1,218 @@
+"""
+Batch booking tools for the LangGraph agents.
+
+The notebook tools act on one booking_id per call, so an agent re-dating or cancelling
+several bookings needs one LLM turn per booking. These tools take lists of IDs (or
+changes) and run each batch in a single transaction through BookingRepository.
+
+    from booking_tools import BATCH_BOOKING_TOOLS
+    flight_agent = create_react_agent(llm, tools=[search_flights, *BATCH_BOOKING_TOOLS])
+"""
+import os
+import sqlite3
+from typing import List, Optional
+
+from langchain_core.runnables.config import RunnableConfig
+from langchain_core.tools import tool
+from pydantic import BaseModel, Field
+
+from booking_repository import DEFAULT_DB_PATH, get_booking_repository
+
+
+class FlightDateChange(BaseModel):
+    booking_id: int = Field(..., description="The unique identifier of the flight booking")
+    new_date: str = Field(..., description="The new departure date in YYYY-MM-DD format")
+
+
+class HotelDateChange(BaseModel):
+    booking_id: int = Field(..., description="The unique identifier of the hotel booking")
+    new_checkin_date: Optional[str] = Field(None, description="The new check-in date in YYYY-MM-DD format")
+    new_checkout_date: Optional[str] = Field(None, description="The new check-out date in YYYY-MM-DD format")
+
+
+def _repository():
+    # TRAVEL_BOOKINGS_DB lets load tests point the tools at a generated database
+    return get_booking_repository(os.environ.get("TRAVEL_BOOKINGS_DB", DEFAULT_DB_PATH))
+
+
+def _lines(results, found, missing):
+    return "\n".join(found(booking_id, result) if result else missing(booking_id) for booking_id, result in results.items())
+
+
+@tool
+def retrieve_flight_bookings(booking_ids: List[int]) -> str:
+    """
+    Retrieve several flight bookings by ID in one call
+
+    Args:
+        booking_ids (List[int]): The unique identifiers of the bookings to retrieve
+
+    Returns:
+        str: One line per booking with its information, or a message that it was not found
+    """
+    try:
+        bookings = _repository().get_flight_bookings(booking_ids)
+    except sqlite3.Error as e:
+        return f"An error occurred: {str(e)} FINISHED"
+    results = {booking_id: bookings.get(booking_id) for booking_id in booking_ids}
+    return _lines(
+        results,
+        lambda booking_id, booking: f"Booking found: {booking}",
+        lambda booking_id: f"No booking found with ID: {booking_id}",
+    ) + " FINISHED"
+
+
+@tool
+def change_flight_bookings(changes: List[FlightDateChange]) -> str:
+    """
+    Change the dates of several flight bookings in one call
+
+    Args:
+        changes (List[FlightDateChange]): The booking IDs and their new dates
+
+    Returns:
+        str: One line per booking indicating the result of the change
+    """
+    new_dates = {change.booking_id: change.new_date for change in changes}
+    try:
+        results = _repository().change_flight_dates(new_dates.items())
+    except sqlite3.Error as e:
+        return f"An error occurred: {str(e)} FINISHED"
+    return _lines(
+        results,
+        lambda booking_id, _: f"Booking updated with ID: {booking_id}, new date: {new_dates[booking_id]}",
+        lambda booking_id: f"No booking found with ID: {booking_id}",
+    ) + " FINISHED"
+
+
+@tool
+def cancel_flight_bookings(booking_ids: List[int]) -> str:
+    """
+    Cancel several flight bookings in one call
+
+    Args:
+        booking_ids (List[int]): The unique identifiers of the bookings to cancel
+
+    Returns:
+        str: One line per booking indicating the result of the cancellation
+    """
+    try:
+        results = _repository().cancel_flight_bookings(booking_ids)
+    except sqlite3.Error as e:
+        return f"An error occurred: {str(e)} FINISHED"
+    return _lines(
+        results,
+        lambda booking_id, _: f"Booking canceled with ID: {booking_id}",
+        lambda booking_id: f"No booking found with ID: {booking_id}",
+    ) + " FINISHED"
+
+
+@tool
+def retrieve_hotel_bookings(booking_ids: List[int]) -> str:
+    """
+    Retrieve several hotel bookings by ID in one call
+
+    Args:
+        booking_ids (List[int]): The unique identifiers of the hotel bookings to retrieve
+
+    Returns:
+        str: One line per booking with its information, or a message that it was not found
+    """
+    try:
+        bookings = _repository().get_hotel_bookings(booking_ids)
+    except sqlite3.Error as e:
+        return f"An error occurred: {str(e)} FINISHED"
+    results = {booking_id: bookings.get(booking_id) for booking_id in booking_ids}
+    return _lines(
+        results,
+        lambda booking_id, booking: f"Booking found: {booking}",
+        lambda booking_id: f"No hotel booking found with ID: {booking_id}",
+    ) + " FINISHED"
+
+
+@tool
+def change_hotel_bookings(changes: List[HotelDateChange]) -> str:
+    """
+    Change the dates of several hotel bookings in one call. Nights and total price are recalculated.
+
+    Args:
+        changes (List[HotelDateChange]): The booking IDs and their new check-in and/or check-out dates
+
+    Returns:
+        str: One line per booking indicating the result of the change
+    """
+    try:
+        results = _repository().change_hotel_dates_many(
+            (change.booking_id, change.new_checkin_date, change.new_checkout_date) for change in changes
+        )
+    except (sqlite3.Error, ValueError) as e:
+        return f"An error occurred: {str(e)} FINISHED"
+    return _lines(
+        results,
+        lambda booking_id, updated: (
+            f"Hotel booking updated: Booking ID {booking_id}, New check-in: {updated[0]}, "
+            f"New check-out: {updated[1]}, Nights: {updated[2]}, Total Price: {updated[3]}"
+        ),
+        lambda booking_id: f"No hotel booking found with ID: {booking_id}",
+    ) + " FINISHED"
+
+
+@tool
+def cancel_hotel_bookings(booking_ids: List[int]) -> str:
+    """
+    Cancel several hotel bookings in one call
+
+    Args:
+        booking_ids (List[int]): The unique identifiers of the hotel bookings to cancel
+
+    Returns:
+        str: One line per booking indicating the result of the cancellation
+    """
+    try:
+        results = _repository().cancel_hotel_bookings(booking_ids)
+    except sqlite3.Error as e:
+        return f"An error occurred: {str(e)} FINISHED"
+    return _lines(
+        results,
+        lambda booking_id, _: f"Hotel booking canceled with ID: {booking_id}",
+        lambda booking_id: f"No hotel booking found with ID: {booking_id}",
+    ) + " FINISHED"
+
+
+@tool
+def list_user_bookings(config: RunnableConfig, kind: str = "flight", page_size: int = 20, after_booking_id: int = 0) -> str:
+    """
+    List the current user's flight or hotel bookings, one page at a time
+
+    Args:
+        kind (str): "flight" or "hotel"
+        page_size (int): Maximum number of bookings to return
+        after_booking_id (int): Return bookings after this booking ID; use the value from the previous page to continue
+
+    Returns:
+        str: The bookings on this page and the after_booking_id for the next page, if there is one
+    """
+    user_id = config.get("configurable", {}).get("user_id")
+    if user_id is None:
+        return "No user_id in the configuration. FINISHED"
+
+    repository = _repository()
+    try:
+        if kind == "hotel":
+            bookings = repository.hotel_bookings_for_user(user_id, page_size, after_booking_id)
+        else:
+            bookings = repository.flight_bookings_for_user(user_id, page_size, after_booking_id)
+    except sqlite3.Error as e:
+        return f"An error occurred: {str(e)} FINISHED"
+
+    if not bookings:
+        return f"No {kind} bookings found for user {user_id}. FINISHED"
+    lines = [f"Booking found: {booking}" for booking in bookings]
+    if len(bookings) == page_size:
+        lines.append(f"More bookings available, next after_booking_id: {bookings[-1][0]}")
+    return "\n".join(lines) + " FINISHED"
+
+
+FLIGHT_BATCH_TOOLS = [retrieve_flight_bookings, change_flight_bookings, cancel_flight_bookings]
+HOTEL_BATCH_TOOLS = [retrieve_hotel_bookings, change_hotel_bookings, cancel_hotel_bookings]
+BATCH_BOOKING_TOOLS = [*FLIGHT_BATCH_TOOLS, *HOTEL_BATCH_TOOLS, list_user_bookings]
@@ -0,0 +1,675 @@
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    WRITES_IDX_MAP,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.types import TASKS
+
+logger = logging.getLogger(__name__)
+
+
+class _ThreadSlot:
+    """
+    Hot state for a single thread: its own InMemorySaver plus the last access time
+    used for LRU/TTL eviction.
+    """
+    __slots__ = ("saver", "last_access")
+
+    def __init__(self, saver, last_access):
+        self.saver = saver
+        self.last_access = last_access
+
+
+class BoundedCheckpointSaver(BaseCheckpointSaver):
+    """
+    A bounded checkpoint saver that can be used in place of `MemorySaver`.
+
+    Every thread keeps its checkpoints in its own `InMemorySaver` so that the
+    LangGraph read/write semantics stay exactly the same, but:
+
+    1. Only the latest `max_checkpoints_per_thread` checkpoints (and their pending
+       writes) are retained per thread and checkpoint namespace.
+    2. At most `max_threads` threads are kept in memory. The least recently used
+       threads, and any thread idle for longer than `idle_ttl_seconds`, are evicted.
+    3. Evicted threads are spilled to a SQLite database (WAL mode) in batches of
+       `batch_size` rows and transparently loaded back on the next access. If no
+       `db_path` is given, evicted threads are dropped.
+
+    Args:
+        db_path (str): Path of the SQLite spill database. None disables spilling.
+        max_checkpoints_per_thread (int): Checkpoints retained per thread/namespace.
+        max_threads (int): Maximum number of threads kept in memory.
+        idle_ttl_seconds (float): Idle time after which a thread is evicted. None disables TTL eviction.
+        batch_size (int): Number of spilled threads buffered before they are written to SQLite.
+        serde (SerializerProtocol): Serializer used for checkpoints and writes.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_checkpoints_per_thread: int = 10,
+        max_threads: int = 1000,
+        idle_ttl_seconds: Optional[float] = 3600,
+        batch_size: int = 100,
+        serde: Optional[SerializerProtocol] = None,
+    ) -> None:
+        super().__init__(serde=serde)
+        # The parent checkpoint is needed to rebuild pending sends of the latest one
+        self.max_checkpoints_per_thread = max(2, max_checkpoints_per_thread)
+        self.max_threads = max(1, max_threads)
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.batch_size = max(1, batch_size)
+        self.db_path = db_path
+
+        self._threads: "OrderedDict[str, _ThreadSlot]" = OrderedDict()
+        self._spill_buffer: dict[str, tuple[bytes, int, float]] = {}
+        self._lock = threading.RLock()
+        self._counters = {"evicted_threads": 0, "expired_threads": 0, "pruned_checkpoints": 0, "loaded_threads": 0, "flushes": 0}
+
+        self._conn = None
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+            CREATE TABLE IF NOT EXISTS thread_checkpoints (
+                thread_id TEXT PRIMARY KEY,
+                payload BLOB,
+                num_checkpoints INTEGER,
+                last_access REAL
+            )
+            """
+            )
+
+    # ---- Thread slot management ----
+
+    def _new_saver(self) -> InMemorySaver:
+        return InMemorySaver(serde=self.serde)
+
+    def _dump_slot(self, thread_id: str, slot: _ThreadSlot) -> tuple[bytes, int]:
+        saver = slot.saver
+        storage = {ns: dict(checkpoints) for ns, checkpoints in saver.storage[thread_id].items()}
+        writes = dict(saver.writes)
+        blobs = dict(getattr(saver, "blobs", {}))
+        num_checkpoints = sum(len(checkpoints) for checkpoints in storage.values())
+        return pickle.dumps((storage, writes, blobs), protocol=pickle.HIGHEST_PROTOCOL), num_checkpoints
+
+    def _load_slot(self, thread_id: str, payload: bytes) -> _ThreadSlot:
+        storage, writes, blobs = pickle.loads(payload)
+        saver = self._new_saver()
+        for ns, checkpoints in storage.items():
+            saver.storage[thread_id][ns].update(checkpoints)
+        saver.writes.update(writes)
+        if blobs and hasattr(saver, "blobs"):
+            saver.blobs.update(blobs)
+        self._counters["loaded_threads"] += 1
+        return _ThreadSlot(saver, time.monotonic())
+
+    def _get_slot(self, thread_id: str, create: bool) -> Optional[_ThreadSlot]:
+        """
+        Return the hot slot for a thread, loading it back from the spill buffer or SQLite
+        if it was evicted. Must be called with the lock held.
+        """
+        slot = self._threads.get(thread_id)
+        if slot is None:
+            payload = None
+            if thread_id in self._spill_buffer:
+                payload = self._spill_buffer.pop(thread_id)[0]
+            elif self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT payload FROM thread_checkpoints WHERE thread_id = ?", (thread_id,)
+                ).fetchone()
+                if row:
+                    payload = row[0]
+            if payload is not None:
+                slot = self._load_slot(thread_id, payload)
+            elif create:
+                slot = _ThreadSlot(self._new_saver(), time.monotonic())
+            else:
+                return None
+            self._threads[thread_id] = slot
+        else:
+            self._threads.move_to_end(thread_id)
+        slot.last_access = time.monotonic()
+        return slot
+
+    def _prune(self, thread_id: str, checkpoint_ns: str, slot: _ThreadSlot) -> None:
+        """
+        Drop the oldest checkpoints of a thread/namespace beyond the retention limit.
+        """
+        saver = slot.saver
+        checkpoints = saver.storage[thread_id][checkpoint_ns]
+        excess = len(checkpoints) - self.max_checkpoints_per_thread
+        if excess <= 0:
+            return
+        # Checkpoint IDs are time-ordered UUIDs, so sorting gives creation order
+        for checkpoint_id in sorted(checkpoints)[:excess]:
+            del checkpoints[checkpoint_id]
+            saver.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+        self._counters["pruned_checkpoints"] += excess
+
+        # Newer langgraph versions keep channel values as versioned blobs
+        blobs = getattr(saver, "blobs", None)
+        if blobs:
+            live = set()
+            for checkpoint, _, _ in checkpoints.values():
+                live.update(self.serde.loads_typed(checkpoint)["channel_versions"].items())
+            for key in [k for k in blobs if k[1] == checkpoint_ns and (k[2], k[3]) not in live]:
+                del blobs[key]
+
+    def _evict(self) -> None:
+        """
+        Evict idle threads past their TTL and least recently used threads over the limit.
+        """
+        now = time.monotonic()
+        while self._threads:
+            thread_id, slot = next(iter(self._threads.items()))
+            if len(self._threads) > self.max_threads:
+                self._counters["evicted_threads"] += 1
+            elif self.idle_ttl_seconds is not None and now - slot.last_access > self.idle_ttl_seconds:
+                self._counters["expired_threads"] += 1
+            else:
+                break
+            del self._threads[thread_id]
+            self._spill(thread_id, slot)
+
+    def _spill(self, thread_id: str, slot: _ThreadSlot) -> None:
+        if self._conn is None:
+            return
+        payload, num_checkpoints = self._dump_slot(thread_id, slot)
+        self._spill_buffer[thread_id] = (payload, num_checkpoints, time.time())
+        if len(self._spill_buffer) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._conn is None or not self._spill_buffer:
+            return
+        rows = [
+            (thread_id, payload, num_checkpoints, last_access)
+            for thread_id, (payload, num_checkpoints, last_access) in self._spill_buffer.items()
+        ]
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                """
+            INSERT OR REPLACE INTO thread_checkpoints (thread_id, payload, num_checkpoints, last_access)
+            VALUES (?, ?, ?, ?)
+            """,
+                rows,
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._spill_buffer.clear()
+        self._counters["flushes"] += 1
+
+    # ---- Public helpers ----
+
+    def flush(self) -> None:
+        """
+        Write all buffered spilled threads to SQLite.
+        """
+        with self._lock:
+            self._flush()
+
+    def evict_idle(self) -> None:
+        """
+        Run TTL/LRU eviction without waiting for the next write, e.g. from a background task.
+        """
+        with self._lock:
+            self._evict()
+
+    def close(self) -> None:
+        """
+        Spill every hot thread to SQLite and close the connection.
+        """
+        with self._lock:
+            if self._conn is None:
+                self._threads.clear()
+                return
+            while self._threads:
+                thread_id, slot = self._threads.popitem(last=False)
+                self._spill(thread_id, slot)
+            self._flush()
+            self._conn.close()
+            self._conn = None
+
+    def delete_thread(self, thread_id: str) -> None:
+        """
+        Delete all checkpoints and writes of a thread from memory and SQLite.
+        """
+        with self._lock:
+            self._threads.pop(thread_id, None)
+            self._spill_buffer.pop(thread_id, None)
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM thread_checkpoints WHERE thread_id = ?", (thread_id,))
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Memory and row-count gauges for the checkpointer.
+
+        Returns:
+            dict: Hot thread/checkpoint counts, approximate serialized bytes held in memory,
+            spill buffer size, SQLite row count and size, and eviction counters.
+        """
+        with self._lock:
+            hot_checkpoints = 0
+            hot_bytes = 0
+            for thread_id, slot in self._threads.items():
+                for checkpoints in slot.saver.storage[thread_id].values():
+                    hot_checkpoints += len(checkpoints)
+                    for checkpoint, metadata, _ in checkpoints.values():
+                        hot_bytes += len(checkpoint[1]) + len(metadata[1])
+                for writes in slot.saver.writes.values():
+                    hot_bytes += sum(len(write[2][1]) for write in writes.values())
+                hot_bytes += sum(len(blob[1]) for blob in getattr(slot.saver, "blobs", {}).values())
+
+            sqlite_rows = 0
+            sqlite_bytes = 0
+            if self._conn is not None:
+                sqlite_rows = self._conn.execute("SELECT COUNT(*) FROM thread_checkpoints").fetchone()[0]
+                page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+                page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+                sqlite_bytes = page_count * page_size
+
+            return {
+                "hot_threads": len(self._threads),
+                "hot_checkpoints": hot_checkpoints,
+                "hot_bytes": hot_bytes,
+                "spill_buffer_threads": len(self._spill_buffer),
+                "sqlite_rows": sqlite_rows,
+                "sqlite_bytes": sqlite_bytes,
+                **self._counters,
+            }
+
+    # ---- BaseCheckpointSaver interface ----
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            slot = self._get_slot(thread_id, create=False)
+            if slot is None:
+                return None
+            return slot.saver.get_tuple(config)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        with self._lock:
+            if config:
+                slot = self._get_slot(config["configurable"]["thread_id"], create=False)
+                savers = [slot.saver] if slot else []
+            else:
+                # Listing across all threads reads spilled threads without promoting them
+                self._flush()
+                savers = [slot.saver for slot in self._threads.values()]
+                if self._conn is not None:
+                    hot = set(self._threads)
+                    for thread_id, payload in self._conn.execute("SELECT thread_id, payload FROM thread_checkpoints"):
+                        if thread_id not in hot:
+                            savers.append(self._load_slot(thread_id, payload).saver)
+            results = []
+            for saver in savers:
+                remaining = None if limit is None else limit - len(results)
+                if remaining is not None and remaining <= 0:
+                    break
+                results.extend(saver.list(config, filter=filter, before=before, limit=remaining))
+        yield from results
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            slot = self._get_slot(thread_id, create=True)
+            saved_config = slot.saver.put(config, checkpoint, metadata, new_versions)
+            self._prune(thread_id, checkpoint_ns, slot)
+            self._evict()
+            return saved_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            slot = self._get_slot(thread_id, create=True)
+            slot.saver.put_writes(config, writes, task_id, task_path)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        return self.put_writes(config, writes, task_id, task_path)
+
+    def get_next_version(self, current, channel):
+        # Same version scheme as InMemorySaver so checkpoints stay interchangeable
+        return InMemorySaver.get_next_version(self, current, channel)
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver):
+    """
+    A durable checkpoint saver that writes every checkpoint and pending write to SQLite.
+
+    Unlike `BoundedCheckpointSaver`, nothing is held in memory between calls, so a graph
+    stopped at an `interrupt` can be resumed by another request, worker or process long
+    after the request that started it has returned. Nothing is deleted either: callers
+    drop the history of finished threads with `prune_thread` and old threads with
+    `stale_threads` and `delete_thread`.
+
+    Args:
+        db_path (str): Path of the SQLite database (WAL mode).
+        serde (SerializerProtocol): Serializer used for checkpoints and writes.
+    """
+
+    def __init__(self, db_path: str, serde: Optional[SerializerProtocol] = None) -> None:
+        super().__init__(serde=serde)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                type TEXT,
+                checkpoint BLOB,
+                metadata_type TEXT,
+                metadata BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                type TEXT,
+                value BLOB,
+                task_path TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+            CREATE TABLE IF NOT EXISTS threads (
+                thread_id TEXT PRIMARY KEY,
+                updated_at REAL NOT NULL
+            );
+            """
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._transaction():
+            self._conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            self._conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+            self._conn.execute("DELETE FROM threads WHERE thread_id = ?", (thread_id,))
+
+    def prune_thread(self, thread_id: str) -> None:
+        """
+        Keep only the latest checkpoint of a thread's root graph, without its history,
+        subgraph checkpoints or pending writes. For threads whose run has completed: their
+        state stays readable but can no longer be resumed or replayed from an earlier step.
+        """
+        with self._transaction():
+            row = self._conn.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ''"
+                " ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id,),
+            ).fetchone()
+            if row is None:
+                return
+            self._conn.execute(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND NOT (checkpoint_ns = '' AND checkpoint_id = ?)",
+                (thread_id, row[0]),
+            )
+            self._conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+
+    def stale_threads(self, prefix: str, max_age_seconds: float) -> list[str]:
+        """
+        IDs of the threads starting with `prefix` that have not been written to for more
+        than `max_age_seconds`.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT thread_id FROM threads WHERE substr(thread_id, 1, ?) = ? AND updated_at < ?",
+                (len(prefix), prefix, time.time() - max_age_seconds),
+            ).fetchall()
+        return [thread_id for thread_id, in rows]
+
+    def _checkpoint_tuple(self, row) -> CheckpointTuple:
+        """
+        Build a CheckpointTuple from a checkpoints row, with its pending writes and the
+        sends of its parent. Must be called with the lock held.
+        """
+        thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type_, checkpoint, metadata_type, metadata = row
+        writes = self._conn.execute(
+            "SELECT task_id, channel, type, value FROM writes"
+            " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        sends = []
+        if parent_checkpoint_id:
+            sends = self._conn.execute(
+                "SELECT type, value FROM writes"
+                " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? AND channel = ?"
+                " ORDER BY task_path, task_id, idx",
+                (thread_id, checkpoint_ns, parent_checkpoint_id, TASKS),
+            ).fetchall()
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint={
+                **self.serde.loads_typed((type_, checkpoint)),
+                "pending_sends": [self.serde.loads_typed(send) for send in sends],
+            },
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_checkpoint_id}}
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[(task_id, channel, self.serde.loads_typed((t, v))) for task_id, channel, t, v in writes],
+        )
+
+    # ---- BaseCheckpointSaver interface ----
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = "SELECT * FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        params = [thread_id, checkpoint_ns]
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        with self._lock:
+            row = self._conn.execute(query + " ORDER BY checkpoint_id DESC LIMIT 1", params).fetchone()
+            return self._checkpoint_tuple(row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_checkpoint_id)
+        query = "SELECT * FROM checkpoints"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+        results = []
+        with self._lock:
+            for row in self._conn.execute(query, params).fetchall():
+                if limit is not None and len(results) >= limit:
+                    break
+                # Metadata filters are rare (history views), so they are applied after decoding
+                checkpoint_tuple = self._checkpoint_tuple(row)
+                if filter and not all(checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                results.append(checkpoint_tuple)
+        yield from results
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        stored.pop("pending_sends", None)
+        type_, payload = self.serde.dumps_typed(stored)
+        metadata_type, metadata_payload = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._transaction():
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 type_, payload, metadata_type, metadata_payload),
+            )
+            self._conn.execute("INSERT OR REPLACE INTO threads VALUES (?, ?)", (thread_id, time.time()))
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = {True: [], False: []}
+        for idx, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, idx)
+            type_, payload = self.serde.dumps_typed(value)
+            # Regular writes are kept from the first attempt; special channels (errors, interrupts, resumes) are overwritten
+            rows[idx < 0].append((thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type_, payload, task_path))
+        with self._transaction():
+            self._conn.executemany("INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows[False])
+            self._conn.executemany("INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows[True])
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        return self.put_writes(config, writes, task_id, task_path)
+
+    def get_next_version(self, current, channel):
+        return InMemorySaver.get_next_version(self, current, channel)
@@ -0,0 +1,54 @@
+"""
+Latitude and longitude of the cities known to the booking data and the route table.
+
+Kept apart from route_table.py so that code which only needs the city names (such as
+multi_city.extract_cities) does not load NumPy.
+"""
+
+# City coordinates (latitude, longitude), also available as utils.city_data and route_table.CITY_COORDINATES
+CITY_COORDINATES = {
+    "New York": (40.7128, -74.0060),
+    "Los Angeles": (34.0522, -118.2437),
+    "Chicago": (41.8781, -87.6298),
+    "Las Vegas": (36.1699, -115.1398),
+    "San Francisco": (37.7749, -122.4194),
+    "Orlando": (28.5383, -81.3792),
+    "Miami": (25.7617, -80.1918),
+    "Washington": (38.9072, -77.0369),
+    "New Orleans": (29.9511, -90.0715),
+    "Boston": (42.3601, -71.0589),
+    "Seattle": (47.6062, -122.3321),
+    "San Diego": (32.7157, -117.1611),
+    "Honolulu": (21.3069, -157.8583),
+    "Nashville": (36.1627, -86.7816),
+    "Denver": (39.7392, -104.9903),
+    "Austin": (30.2672, -97.7431),
+    "Philadelphia": (39.9526, -75.1652),
+    "Atlanta": (33.7490, -84.3880),
+    "San Antonio": (29.4241, -98.4936),
+    "Portland": (45.5155, -122.6789),
+    "Paris": (48.8566, 2.3522),
+    "London": (51.5074, -0.1278),
+    "Rome": (41.9028, 12.4964),
+    "Barcelona": (41.3851, 2.1734),
+    "Amsterdam": (52.3676, 4.9041),
+    "Berlin": (52.5200, 13.4050),
+    "Vienna": (48.2082, 16.3738),
+    "Prague": (50.0755, 14.4378),
+    "Venice": (45.4408, 12.3155),
+    "Florence": (43.7696, 11.2558),
+    "Istanbul": (41.0082, 28.9784),
+    "Madrid": (40.4168, -3.7038),
+    "Lisbon": (38.7223, -9.1393),
+    "Dublin": (53.3498, -6.2603),
+    "Budapest": (47.4979, 19.0402),
+    "Athens": (37.9838, 23.7275),
+    "Edinburgh": (55.9533, -3.1883),
+    "Copenhagen": (55.6761, 12.5683),
+    "Stockholm": (59.3293, 18.0686),
+    "Brussels": (50.8503, 4.3517),
+    "Zurich": (47.3769, 8.5417),
+    "Milan": (45.4642, 9.1900),
+    "Munich": (48.1351, 11.5820),
+    "Seville": (37.3891, -5.9845),
+}
@@ -0,0 +1,373 @@
+"""
+Adaptive concurrency limiting for LLM calls.
+
+`AdaptiveConcurrencyLimiter` caps the number of concurrent calls to the model with
+an AIMD limit: every successful call raises the limit by 1/limit (about +1 per
+round of calls), and a throttling error from the backend multiplies it by
+`backoff_ratio`. Calls over the limit wait in a bounded priority queue where
+interactive callers go before batch callers; when the queue is full the call is
+rejected at once with `LimiterRejected`, which carries a Retry-After estimate.
+
+`LimitedChatModel` wraps any chat model so that every invoke, stream and tool call
+round goes through a limiter. The priority of the calls made while serving a
+request is set with the `llm_priority` context manager.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Iterator, List, Optional, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+THROTTLING_ERROR_CODES = {"ThrottlingException", "TooManyRequestsException", "ServiceUnavailableException"}
+
+_priority = contextvars.ContextVar("llm_priority", default="interactive")
+
+
+@contextmanager
+def llm_priority(priority):
+    """
+    Run the LLM calls made inside the block with the given priority ("interactive" or "batch").
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority {priority!r}, expected one of {sorted(PRIORITIES)}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def is_throttling_error(error):
+    """
+    Whether an exception means the backend is overloaded (a Bedrock ThrottlingException and similar).
+    """
+    response = getattr(error, "response", None)
+    if isinstance(response, dict) and response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES:
+        return True
+    return type(error).__name__ in THROTTLING_ERROR_CODES or "too many requests" in str(error).lower()
+
+
+class LimiterRejected(Exception):
+    """
+    Raised when a call cannot be queued; retry_after is the suggested wait in seconds.
+    """
+
+    def __init__(self, retry_after, reason="LLM request queue is full"):
+        super().__init__(f"{reason}, retry after {retry_after}s")
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class _Waiter:
+    __slots__ = ("priority", "loop", "future", "event", "done", "error")
+
+    def __init__(self, priority, loop):
+        self.priority = priority
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+        self.done = False
+        self.error = None
+
+    def wake(self):
+        if self.loop:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+        else:
+            self.event.set()
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limit with a bounded, prioritized wait queue.
+
+    Works for both threads and coroutines, so sync graph nodes running in executor
+    threads and async nodes share the same limit.
+
+    Args:
+        initial_limit (int): Starting number of concurrent calls
+        min_limit (int): Lowest limit after backing off
+        max_limit (int): Highest limit reached by additive increase
+        max_queue (int): Calls allowed to wait; further calls are rejected
+        backoff_ratio (float): Factor applied to the limit on a throttling error
+        queue_timeout (float): Seconds a call may wait before it is rejected
+    """
+
+    def __init__(self, initial_limit=8, min_limit=1, max_limit=64, max_queue=100, backoff_ratio=0.5, queue_timeout=30.0):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.backoff_ratio = backoff_ratio
+        self.queue_timeout = queue_timeout
+        self.inflight = 0
+        self.throttled = 0
+        self.rejected = {priority: 0 for priority in PRIORITIES}
+        self._queue = []
+        self._queued = {priority: 0 for priority in PRIORITIES}
+        self._seq = itertools.count()
+        self._latency = None
+        self._last_backoff = 0.0
+        self._lock = threading.Lock()
+
+    def queue_depth(self, priority=None):
+        if priority is None:
+            return sum(self._queued.values())
+        return self._queued[priority]
+
+    @property
+    def latency(self):
+        """
+        Smoothed seconds per successful call, None until a call has finished.
+        """
+        return self._latency
+
+    def retry_after(self):
+        """
+        Whole seconds until the current queue has likely drained.
+        """
+        latency = self._latency or 1.0
+        return max(1, math.ceil(latency * (self.queue_depth() + 1) / max(int(self.limit), 1)))
+
+    # ---- Admission ----
+
+    def _enqueue(self, priority, loop):
+        """
+        Take a slot if one is free, otherwise queue a waiter. Returns None when admitted.
+        """
+        priority = priority or _priority.get()
+        with self._lock:
+            if self.inflight < int(self.limit) and not self.queue_depth():
+                self.inflight += 1
+                return None
+            if self.queue_depth() >= self.max_queue and not self._evict_for(priority):
+                self.rejected[priority] += 1
+                raise LimiterRejected(self.retry_after())
+            waiter = _Waiter(priority, loop)
+            heapq.heappush(self._queue, (PRIORITIES[priority], next(self._seq), waiter))
+            self._queued[priority] += 1
+            return waiter
+
+    def _evict_for(self, priority):
+        """
+        Make room in a full queue by rejecting the newest waiter of a lower priority.
+        """
+        candidates = [entry for entry in self._queue if not entry[2].done and entry[0] > PRIORITIES[priority]]
+        if not candidates:
+            return False
+        _, _, waiter = max(candidates)
+        self._finish(waiter, LimiterRejected(self.retry_after(), "Preempted by an interactive request"))
+        self.rejected[waiter.priority] += 1
+        return True
+
+    def _finish(self, waiter, error=None):
+        waiter.done = True
+        waiter.error = error
+        self._queued[waiter.priority] -= 1
+        waiter.wake()
+
+    def _dispatch(self):
+        while self._queue and self.inflight < int(self.limit):
+            _, _, waiter = heapq.heappop(self._queue)
+            if waiter.done:
+                continue
+            self.inflight += 1
+            self._finish(waiter)
+
+    def _abandon(self, waiter):
+        """
+        Remove a waiter that timed out or was cancelled. Returns False if it was admitted meanwhile.
+        """
+        with self._lock:
+            if waiter.done:
+                return False
+            waiter.done = True
+            self._queued[waiter.priority] -= 1
+            self.rejected[waiter.priority] += 1
+            return True
+
+    def _free_slot(self):
+        """
+        Give back a slot without counting a call, e.g. for a waiter cancelled after its admission.
+        """
+        with self._lock:
+            self.inflight -= 1
+            self._dispatch()
+
+    def acquire(self, priority=None, timeout=None):
+        """
+        Block until a slot is free.
+
+        Returns:
+            float: Admission time, to pass to release()
+        Raises:
+            LimiterRejected: If the queue is full or the wait timed out
+        """
+        waiter = self._enqueue(priority, None)
+        if waiter is not None:
+            if not waiter.event.wait(self.queue_timeout if timeout is None else timeout) and self._abandon(waiter):
+                raise LimiterRejected(self.retry_after(), "Timed out waiting for an LLM slot")
+            if waiter.error:
+                raise waiter.error
+        return time.monotonic()
+
+    async def aacquire(self, priority=None, timeout=None):
+        """
+        Async version of acquire().
+        """
+        waiter = self._enqueue(priority, asyncio.get_running_loop())
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout if timeout is None else timeout)
+            except asyncio.TimeoutError:
+                if self._abandon(waiter):
+                    raise LimiterRejected(self.retry_after(), "Timed out waiting for an LLM slot")
+            except asyncio.CancelledError:
+                if not self._abandon(waiter) and waiter.error is None:
+                    # Admitted but never called: no outcome to adapt the limit to
+                    self._free_slot()
+                raise
+            if waiter.error:
+                raise waiter.error
+        return time.monotonic()
+
+    def release(self, started, throttled=False):
+        """
+        Free a slot and adapt the limit to the outcome of the call.
+
+        Args:
+            started (float): Value returned by acquire()
+            throttled (bool): Whether the backend rejected the call as throttled
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.inflight -= 1
+            if throttled:
+                self.throttled += 1
+                # Calls that were already running when the limit dropped report the same congestion event
+                if started >= self._last_backoff:
+                    self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                    self._last_backoff = now
+            else:
+                # Only grow a limit that is actually in use, so idle periods do not inflate it
+                if self.inflight + 1 >= int(self.limit):
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                latency = now - started
+                self._latency = latency if self._latency is None else 0.9 * self._latency + 0.1 * latency
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, priority=None):
+        started = self.acquire(priority)
+        throttled = False
+        try:
+            yield
+        except Exception as error:
+            throttled = is_throttling_error(error)
+            raise
+        finally:
+            self.release(started, throttled)
+
+    @asynccontextmanager
+    async def aslot(self, priority=None):
+        started = await self.aacquire(priority)
+        throttled = False
+        try:
+            yield
+        except Exception as error:
+            throttled = is_throttling_error(error)
+            raise
+        finally:
+            self.release(started, throttled)
+
+    def stats(self):
+        return {
+            "limit": round(self.limit, 2),
+            "inflight": self.inflight,
+            "queued": dict(self._queued),
+            "rejected": dict(self.rejected),
+            "throttled": self.throttled,
+        }
+
+
+class LimitedChatModel(BaseChatModel):
+    """
+    A chat model whose calls go through an AdaptiveConcurrencyLimiter.
+
+    Args:
+        model (BaseChatModel): The wrapped model, e.g. ChatBedrockConverse
+        limiter (AdaptiveConcurrencyLimiter): Limiter shared by every caller of the model
+    """
+
+    model: BaseChatModel
+    limiter: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return self.model._llm_type
+
+    @property
+    def _identifying_params(self) -> dict:
+        return self.model._identifying_params
+
+    def _get_ls_params(self, stop: Optional[List[str]] = None, **kwargs: Any):
+        return self.model._get_ls_params(stop=stop, **kwargs)
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        # Let the wrapped model format the tools, then pass them through on every call
+        return self.bind(**self.model.bind_tools(tools, **kwargs).kwargs)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        with self.limiter.slot():
+            return self.model._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        async with self.limiter.aslot():
+            return await self.model._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        with self.limiter.slot():
+            yield from self.model._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async with self.limiter.aslot():
+            async for chunk in self.model._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                yield chunk
@@ -0,0 +1,193 @@
+"""
+Per-request deadlines for the itinerary graph.
+
+A request that is still running when the Lambda timeout (or the client) gives up returns
+nothing, however much of the itinerary was already gathered. `request_deadline` turns the
+time a request has left (the Lambda context's remaining time, the X-Request-Deadline-Ms
+header or a default) into a `Deadline`, and `deadline_scope` makes it visible to the code
+running the request through `current_deadline()`:
+
+- the itinerary ReAct loop stops before an LLM step that would not finish in time and
+  returns what it has (`partial_itinerary`), or raises `DeadlineExceeded` when it has
+  nothing yet;
+- optional tools wrapped with `skip_when_short` answer "skipped" instead of running when
+  little time is left;
+- city workers get the remaining time as their timeout and the merge of the city plans
+  falls back to joining them.
+
+Each of these is counted in `itinerary_deadline_triggered_total` by action.
+"""
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import StructuredTool
+
+from instrumentation import DEADLINE_TRIGGERED
+from message_utils import final_text
+
+DEADLINE_HEADER = "X-Request-Deadline-Ms"
+
+# What create_react_agent answers when it runs out of steps instead of raising
+OUT_OF_STEPS_ANSWER = "Sorry, need more steps to process this request."
+
+# Time kept for an LLM step until a call has been timed, and the most ever kept
+DEFAULT_STEP_SECONDS = 8.0
+
+_deadline = contextvars.ContextVar("request_deadline", default=None)
+_step_latency = None
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when the deadline comes before the graph has anything to answer with.
+    """
+
+
+class Deadline:
+    """
+    A point in time a request has to answer by.
+
+    Args:
+        seconds (float): Time from now until the deadline
+        clock: Monotonic clock, replaceable for benchmarks
+    """
+
+    def __init__(self, seconds, clock=time.monotonic):
+        self.clock = clock
+        self.seconds = seconds
+        self.expires_at = clock() + seconds
+
+    def remaining(self):
+        """
+        Seconds left, 0 once the deadline has passed.
+        """
+        return max(0.0, self.expires_at - self.clock())
+
+    def short(self, seconds):
+        """
+        Whether less than `seconds` are left.
+        """
+        return self.remaining() < seconds
+
+    def __repr__(self):
+        return f"Deadline(remaining={self.remaining():.1f}s)"
+
+
+def use_step_latency(latency):
+    """
+    Size the time kept for an LLM step from the latency of the calls made so far.
+
+    Args:
+        latency (Callable): Returns the smoothed seconds per LLM call, or None before the
+            first one, e.g. the `latency` of the LLM concurrency limiter
+    """
+    global _step_latency
+    _step_latency = latency
+
+
+def step_seconds():
+    """
+    Time kept for one LLM step: the loop does not start a step with less than this left.
+    DEADLINE_STEP_SECONDS fixes it; otherwise it is twice the observed LLM latency, capped
+    at DEFAULT_STEP_SECONDS, which also applies until a call has been timed.
+    """
+    configured = os.environ.get("DEADLINE_STEP_SECONDS")
+    if configured:
+        return float(configured)
+    latency = _step_latency() if _step_latency is not None else None
+    if latency is None:
+        return DEFAULT_STEP_SECONDS
+    return min(DEFAULT_STEP_SECONDS, 2 * latency)
+
+
+def request_deadline(default_seconds, lambda_context=None, header=None, margin_seconds=None):
+    """
+    The deadline of a request: the earliest of the default, the Lambda remaining time and
+    the client's header, the last two minus a margin for sending the response.
+
+    Args:
+        default_seconds (float): Budget when nothing tighter is known
+        lambda_context: The Lambda context (Mangum's scope["aws.context"]), if any
+        header (str, optional): Value of the X-Request-Deadline-Ms header, milliseconds left
+        margin_seconds (float, optional): Defaults to DEADLINE_MARGIN_SECONDS or 2
+    Returns:
+        Deadline
+    Raises:
+        ValueError: If the header is not a number
+    """
+    if margin_seconds is None:
+        margin_seconds = float(os.environ.get("DEADLINE_MARGIN_SECONDS", "2"))
+    budgets = [default_seconds]
+    if lambda_context is not None and hasattr(lambda_context, "get_remaining_time_in_millis"):
+        budgets.append(lambda_context.get_remaining_time_in_millis() / 1000 - margin_seconds)
+    if header:
+        try:
+            budgets.append(float(header) / 1000 - margin_seconds)
+        except ValueError:
+            raise ValueError(f"{DEADLINE_HEADER} must be a number of milliseconds, got {header!r}")
+    return Deadline(max(0.0, min(budgets)))
+
+
+def current_deadline():
+    """
+    The deadline of the request being served, or None outside a request.
+    """
+    return _deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline):
+    """
+    Run the block, and the graph nodes and tools it starts, under the given deadline.
+    """
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def skip_when_short(tool, seconds=None):
+    """
+    Wrap an optional tool so it answers "skipped" instead of running when less than
+    `seconds` (default two LLM steps) are left before the request deadline.
+    """
+
+    def run(**kwargs):
+        deadline = current_deadline()
+        if deadline is not None and deadline.short(seconds or 2 * step_seconds()):
+            DEADLINE_TRIGGERED.inc("tool_skipped")
+            return f"Skipped {tool.name}: not enough time left to run it. Answer with what you have."
+        return tool.func(**kwargs)
+
+    return StructuredTool.from_function(
+        func=run, name=tool.name, description=tool.description, args_schema=tool.args_schema
+    )
+
+
+def ran_out_of_steps(messages):
+    """
+    Whether a ReAct loop ended because it reached its recursion limit.
+    """
+    return bool(messages) and isinstance(messages[-1], AIMessage) and final_text(messages[-1:]) == OUT_OF_STEPS_ANSWER
+
+
+def partial_itinerary(messages):
+    """
+    The best answer from an interrupted ReAct loop: its last answer if it gave one,
+    otherwise the tool results gathered so far.
+
+    Raises:
+        DeadlineExceeded: If the loop has neither, so that the request fails instead of
+            answering without an itinerary
+    """
+    last = messages[-1] if messages else None
+    if isinstance(last, AIMessage) and not last.tool_calls and final_text([last]) not in ("", OUT_OF_STEPS_ANSWER):
+        return final_text([last])
+    findings = [f"- {m.name}: {str(m.content).strip()}" for m in messages if isinstance(m, ToolMessage) and m.content]
+    if not findings:
+        raise DeadlineExceeded("There was not enough time to plan this itinerary")
+    return "There was not enough time to finish your itinerary. Here is what I found so far:\n" + "\n".join(findings)
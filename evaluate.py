@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Offline evaluation harness for the LangGraph agents in this repo.
+
+Streams a JSONL corpus (e.g. requests.jsonl) through the itinerary graph from
+3_deploy_langGraph_agent/server.py or the travel agent from utils.create_agent with
+bounded concurrency, converts each trace to RAGAS messages, scores it and appends
+the results to a JSONL file (or a directory of Parquet parts). Entries that are
+already in the output are skipped, so an interrupted run can be resumed.
+
+    python evaluate.py --corpus requests.jsonl --graph itinerary --fake-llm --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+from batch_itinerary import parse_entry
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "3_deploy_langGraph_agent")
+
+
+def iter_corpus(path):
+    """
+    Lazily read a JSONL corpus.
+
+    Each line needs a prompt in `user_message`, `question` or `body` (with an optional `title`),
+    and may carry a `request_id`/`id`, a `user_id` and `reference_tool_calls` for scoring. Reference
+    arguments use the same shape as the RAGAS conversion in utils.py, i.e. {"query": <first argument>}.
+
+    Yields:
+        tuple: (entry id, prompt, entry dict)
+    """
+    with open(path, "r") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            entry_id, prompt = parse_entry(entry, line_number)
+            yield entry_id, prompt, entry
+
+
+def load_graph(name, fake_llm=False):
+    """
+    Build the graph to evaluate.
+
+    Args:
+        name (str): "itinerary" for the FastAPI itinerary graph or "travel-agent" for utils.create_agent
+        fake_llm (bool): Use the deterministic FakeBedrockChatModel instead of Bedrock
+    """
+    llm = None
+    if fake_llm:
+        from fake_llm import FakeBedrockChatModel
+        llm = FakeBedrockChatModel()
+
+    if name == "itinerary":
+        sys.path.insert(0, SERVER_DIR)
+        import server
+        if llm is None:
+            return server.initialize_resources()
+        return server.build_itinerary_graph(llm)
+
+    from utils import create_agent
+    embeddings_model = None
+    if fake_llm:
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        # Same dimension as amazon.titan-embed-text-v1 so the stored FAISS index can be queried
+        embeddings_model = DeterministicFakeEmbedding(size=1536)
+    return create_agent(llm=llm, embeddings_model=embeddings_model)
+
+
+def _merge_parallel_tool_results(rg_messages):
+    """
+    RAGAS expects every ToolMessage to directly follow an AIMessage, so results of
+    parallel tool calls are merged into a single ToolMessage for scoring.
+    """
+    from ragas.messages import ToolMessage as RGToolMessage
+
+    merged = []
+    for message in rg_messages:
+        if isinstance(message, RGToolMessage) and merged and isinstance(merged[-1], RGToolMessage):
+            merged[-1] = RGToolMessage(content=merged[-1].content + "\n" + message.content, metadata=merged[-1].metadata)
+        else:
+            merged.append(message)
+    return merged
+
+
+async def score_trace(entry, rg_messages):
+    """
+    Score a converted trace. Trace statistics are always computed; RAGAS ToolCallAccuracy
+    is added when the corpus entry has `reference_tool_calls`.
+    """
+    from ragas.messages import AIMessage as RGAIMessage
+
+    ai_messages = [m for m in rg_messages if isinstance(m, RGAIMessage)]
+    tool_calls = [tc for m in ai_messages for tc in (m.tool_calls or [])]
+    scores = {
+        "num_messages": len(rg_messages),
+        "num_tool_calls": len(tool_calls),
+        "tools_used": sorted({tc.name for tc in tool_calls}),
+        "answer_chars": len(ai_messages[-1].content) if ai_messages else 0,
+    }
+    reference = entry.get("reference_tool_calls")
+    if reference:
+        from ragas.dataset_schema import MultiTurnSample
+        from ragas.messages import ToolCall as RGToolCall
+        from ragas.metrics import ToolCallAccuracy
+
+        sample = MultiTurnSample(
+            user_input=_merge_parallel_tool_results(rg_messages),
+            reference_tool_calls=[RGToolCall(name=tc["name"], args=tc.get("args", {})) for tc in reference],
+        )
+        # ToolCallAccuracy compares tool names and arguments, no judge LLM needed
+        scores["tool_call_accuracy"] = await ToolCallAccuracy().multi_turn_ascore(sample)
+    return scores
+
+
+async def run_trace(graph, prompt, entry):
+    """
+    Run one prompt through the graph and return the most complete message trace.
+
+    The itinerary graph runs its ReAct agent inside a node, so subgraph values are
+    streamed as well and the longest message list seen in any namespace is kept.
+    """
+    from langchain_core.messages import HumanMessage
+
+    graph_input = {"user_message": prompt, "messages": [HumanMessage(content=prompt)]}
+    config = {"configurable": {"user_id": entry.get("user_id"), "thread_id": entry.get("thread_id", "eval")}}
+    latest = {}
+    async for namespace, chunk in graph.astream(graph_input, config, stream_mode="values", subgraphs=True):
+        if isinstance(chunk, dict) and chunk.get("messages"):
+            latest[namespace] = chunk["messages"]
+    return max(latest.values(), key=len, default=[])
+
+
+class JsonlResultWriter:
+    """
+    Append-only JSONL results file, flushed after every record.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def done_ids(self):
+        done = set()
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                for line in f:
+                    if line.strip():
+                        done.add(json.loads(line)["id"])
+        return done
+
+    def open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._f = open(self.path, "a")
+
+    def write(self, record):
+        self._f.write(json.dumps(record, default=str) + "\n")
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+
+class ParquetResultWriter:
+    """
+    Writes results as a directory of Parquet part files, one part per `flush_every` records.
+    """
+
+    def __init__(self, path, flush_every=100):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("Parquet output requires pyarrow. Install it with `pip install pyarrow`.")
+        self.path = path
+        self.flush_every = flush_every
+        self._rows = []
+
+    def done_ids(self):
+        import pyarrow.parquet as pq
+
+        done = set()
+        if os.path.isdir(self.path):
+            for name in sorted(os.listdir(self.path)):
+                if name.endswith(".parquet"):
+                    done.update(pq.read_table(os.path.join(self.path, name), columns=["id"]).column("id").to_pylist())
+        return done
+
+    def open(self):
+        os.makedirs(self.path, exist_ok=True)
+        self._part = len([n for n in os.listdir(self.path) if n.endswith(".parquet")])
+
+    def write(self, record):
+        # Nested score values are stored as JSON strings to keep a flat schema across parts
+        self._rows.append({k: json.dumps(v) if isinstance(v, (dict, list)) else v for k, v in record.items()})
+        if len(self._rows) >= self.flush_every:
+            self._flush()
+
+    def _flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if not self._rows:
+            return
+        pq.write_table(pa.Table.from_pylist(self._rows), os.path.join(self.path, f"part-{self._part:05d}.parquet"))
+        self._part += 1
+        self._rows = []
+
+    def close(self):
+        self._flush()
+
+
+async def evaluate(graph, corpus, writer, concurrency=4, limit=None):
+    """
+    Run the corpus through the graph with at most `concurrency` entries in flight.
+
+    Returns:
+        dict: Throughput and latency summary of this run
+    """
+    from utils import convert_messages
+
+    done = writer.done_ids()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+    skipped = 0
+    tasks = set()
+
+    async def run_one(entry_id, prompt, entry):
+        nonlocal errors
+        start = time.perf_counter()
+        record = {"id": entry_id, "prompt": prompt}
+        try:
+            try:
+                trace = await run_trace(graph, prompt, entry)
+                rg_messages = list(convert_messages(trace))
+                record["scores"] = await score_trace(entry, rg_messages)
+                record["trace"] = [m.model_dump() for m in rg_messages]
+                record["error"] = None
+            except Exception as e:
+                errors += 1
+                record["scores"] = {}
+                record["trace"] = []
+                record["error"] = f"{type(e).__name__}: {e}"
+            record["latency_s"] = round(time.perf_counter() - start, 4)
+            latencies.append(record["latency_s"])
+            writer.write(record)
+        finally:
+            # A failed write must not keep the slot, or the loop would wait for it forever
+            semaphore.release()
+
+    writer.open()
+    start = time.perf_counter()
+    try:
+        for count, (entry_id, prompt, entry) in enumerate(corpus):
+            if limit is not None and count >= limit:
+                break
+            if entry_id in done:
+                skipped += 1
+                continue
+            # Acquire before creating the task so only `concurrency` entries are read ahead
+            await semaphore.acquire()
+            task = asyncio.create_task(run_one(entry_id, prompt, entry))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+    finally:
+        # Stop the entries still running (e.g. after a failed write) before closing the writer
+        for task in list(tasks):
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        writer.close()
+    elapsed = time.perf_counter() - start
+
+    completed = len(latencies)
+    return {
+        "completed": completed,
+        "errors": errors,
+        "skipped": skipped,
+        "elapsed_s": round(elapsed, 3),
+        "items_per_s": round(completed / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_p50_s": round(statistics.median(latencies), 4) if latencies else None,
+        "latency_p95_s": round(statistics.quantiles(latencies, n=20)[-1], 4) if len(latencies) > 1 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an offline evaluation over a JSONL corpus")
+    parser.add_argument("--corpus", default="requests.jsonl", help="Path to the JSONL corpus")
+    parser.add_argument("--graph", choices=["itinerary", "travel-agent"], default="itinerary", help="Graph to evaluate")
+    parser.add_argument("--output", default="eval_results/results.jsonl", help="Results path (.jsonl file, or .parquet directory)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum entries evaluated concurrently")
+    parser.add_argument("--limit", type=int, default=None, help="Only evaluate the first N corpus entries")
+    parser.add_argument("--fake-llm", action="store_true", help="Use the deterministic fake LLM (no AWS calls)")
+    args = parser.parse_args()
+
+    graph = load_graph(args.graph, fake_llm=args.fake_llm)
+    if args.output.endswith(".parquet"):
+        writer = ParquetResultWriter(args.output)
+    else:
+        writer = JsonlResultWriter(args.output)
+
+    summary = asyncio.run(
+        evaluate(graph, iter_corpus(args.corpus), writer, concurrency=args.concurrency, limit=args.limit)
+    )
+    print("=" * 80)
+    print(f"Evaluated {summary['completed']} entries ({summary['errors']} errors, {summary['skipped']} already done) "
+          f"in {summary['elapsed_s']}s")
+    print(f"Throughput: {summary['items_per_s']} items/s | p50 {summary['latency_p50_s']}s | p95 {summary['latency_p95_s']}s")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""
+A deterministic stand-in for ChatBedrockConverse so graphs can run offline.
+
+The fake model follows a simple ReAct policy: on a new user turn it calls every
+bound tool once (with arguments guessed from the user message), and once the tool
+results are in it answers with a summary of them. Responses are shaped like the
+Bedrock Converse output (text and tool_use content blocks plus usage metadata),
+so downstream code such as the RAGAS conversion in utils.py sees realistic messages.
+
+For load testing, the model can also simulate Bedrock timing: a time to first token
+drawn from a latency distribution, then output at a fixed token rate, in both
+invoke and streaming mode. `llm_from_env()` builds it from environment variables,
+which is how server.py and utils.create_agent select it:
+
+    LLM_BACKEND=fake FAKE_LLM_LATENCY=lognormal FAKE_LLM_FIRST_TOKEN_MS=400 FAKE_LLM_TOKENS_PER_SECOND=80 uvicorn server:fastAPI_app
+"""
+import asyncio
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Iterator, List, Literal, Optional, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+# Environment variables read by llm_from_env
+LLM_BACKEND_ENV = "LLM_BACKEND"
+_ENV_FIELDS = {
+    "FAKE_LLM_LATENCY": ("latency_distribution", str),
+    "FAKE_LLM_FIRST_TOKEN_MS": ("first_token_ms", float),
+    "FAKE_LLM_JITTER_MS": ("latency_jitter_ms", float),
+    "FAKE_LLM_TOKENS_PER_SECOND": ("output_tokens_per_second", float),
+    "FAKE_LLM_SEED": ("seed", int),
+    "FAKE_LLM_MAX_CONCURRENCY": ("max_concurrency", int),
+}
+
+# Words that usually introduce the place or topic of a travel request
+_SUBJECT_PATTERN = re.compile(r"\b(?:to|in|visit|visiting|for|at|about)\s+([A-Z][\w'-]+(?:\s+[A-Z][\w'-]+)*)")
+_CAPITALIZED_PATTERN = re.compile(r"\b([A-Z][a-z][\w'-]*)")
+
+
+def guess_subject(text: str) -> str:
+    """
+    Guess the city/topic of a user message, e.g. "Plan a trip to Paris" -> "Paris".
+    """
+    match = _SUBJECT_PATTERN.search(text)
+    if match:
+        return match.group(1)
+    # Skip the first word since it is capitalized at the start of a sentence
+    words = _CAPITALIZED_PATTERN.findall(text)
+    if len(words) > 1:
+        return words[1]
+    return text.strip()[:40]
+
+
+def approximate_tokens(text: str) -> int:
+    # Roughly 4 characters per token for English text
+    return max(1, len(text) // 4)
+
+
+def _message_text(message: BaseMessage) -> str:
+    if isinstance(message.content, str):
+        return message.content
+    parts = []
+    for block in message.content:
+        if isinstance(block, str):
+            parts.append(block)
+        elif block.get("type") == "text":
+            parts.append(block.get("text", ""))
+    return " ".join(parts)
+
+
+def _scripted_message(response) -> AIMessage:
+    """
+    A scripted response as an AIMessage. Scripts loaded from JSON use
+    {"text": "...", "tool_calls": [{"name": "...", "args": {...}}]} entries.
+    """
+    if isinstance(response, AIMessage):
+        return response.model_copy()
+    if isinstance(response, str):
+        return AIMessage(content=response)
+    text = response.get("text", "")
+    tool_calls = []
+    content = [{"type": "text", "text": text}] if text else []
+    for index, call in enumerate(response.get("tool_calls", [])):
+        args = call.get("args", {})
+        digest = hashlib.sha1(f"{call['name']}|{json.dumps(args, sort_keys=True)}|{index}".encode()).hexdigest()[:20]
+        tool_call_id = call.get("id", f"tooluse_{digest}")
+        content.append({"type": "tool_use", "id": tool_call_id, "name": call["name"], "input": args})
+        tool_calls.append({"name": call["name"], "args": args, "id": tool_call_id, "type": "tool_call"})
+    return AIMessage(content=content if tool_calls else text, tool_calls=tool_calls)
+
+
+class FakeBedrockChatModel(BaseChatModel):
+    """
+    Deterministic fake chat model with the ChatBedrockConverse tool-calling shape.
+
+    Args:
+        model (str): Model name reported in the response metadata.
+        responses (list): Optional scripted responses returned in order and cycled, instead of
+            the default ReAct policy. Entries are str, AIMessage or {"text", "tool_calls"} dicts.
+        latency_distribution (str): "fixed", "uniform", "normal" or "lognormal" time to first token.
+        first_token_ms (float): Mean (median for lognormal) time to first token in milliseconds.
+        latency_jitter_ms (float): Half-width (uniform) or standard deviation (normal, lognormal)
+            of the time to first token.
+        output_tokens_per_second (float): Output rate after the first token; None for instant output.
+        seed (int): Seed for the latency samples.
+        max_concurrency (int): Concurrent calls above which a call fails with a Bedrock
+            ThrottlingException, like an account at its quota; None never throttles.
+    """
+
+    model: str = "fake.bedrock-converse-v1:0"
+    responses: Optional[List[Any]] = None
+    latency_distribution: Literal["fixed", "uniform", "normal", "lognormal"] = "fixed"
+    first_token_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    output_tokens_per_second: Optional[float] = None
+    seed: Optional[int] = None
+    max_concurrency: Optional[int] = None
+
+    _counter: Any = PrivateAttr(default_factory=itertools.count)
+    _rng: Any = PrivateAttr(default=None)
+    _inflight: int = PrivateAttr(default=0)
+    _inflight_lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-bedrock-converse"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model": self.model}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _respond(self, messages: List[BaseMessage], tools: List[dict]) -> AIMessage:
+        if self.responses:
+            message = _scripted_message(self.responses[next(self._counter) % len(self.responses)])
+        else:
+            message = self._react_step(messages, tools)
+        message.usage_metadata = self._usage(messages, message)
+        message.response_metadata = {"model_name": self.model, "stopReason": "tool_use" if message.tool_calls else "end_turn"}
+        return message
+
+    # ---- Simulated latency ----
+
+    def sample_first_token_seconds(self) -> float:
+        mean, jitter = self.first_token_ms, self.latency_jitter_ms
+        if self.latency_distribution == "uniform":
+            ms = self._rng.uniform(mean - jitter, mean + jitter)
+        elif self.latency_distribution == "normal":
+            ms = self._rng.gauss(mean, jitter)
+        elif self.latency_distribution == "lognormal" and mean > 0:
+            # Median `mean`, with sigma chosen so the standard deviation is roughly `jitter`
+            ms = self._rng.lognormvariate(math.log(mean), jitter / mean)
+        else:
+            ms = mean
+        return max(ms, 0.0) / 1000
+
+    @contextmanager
+    def _quota(self):
+        """
+        Count the call as in flight, failing it like Bedrock does when over max_concurrency.
+        """
+        with self._inflight_lock:
+            self._inflight += 1
+            throttled = self.max_concurrency is not None and self._inflight > self.max_concurrency
+            if throttled:
+                self._inflight -= 1
+        if throttled:
+            raise throttling_error()
+        try:
+            yield
+        finally:
+            with self._inflight_lock:
+                self._inflight -= 1
+
+    def _token_seconds(self, tokens: int) -> float:
+        if not self.output_tokens_per_second:
+            return 0.0
+        return tokens / self.output_tokens_per_second
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._respond(messages, kwargs.get("tools") or [])
+        delay = self.sample_first_token_seconds() + self._token_seconds(message.usage_metadata["output_tokens"])
+        with self._quota():
+            if delay:
+                time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._respond(messages, kwargs.get("tools") or [])
+        delay = self.sample_first_token_seconds() + self._token_seconds(message.usage_metadata["output_tokens"])
+        with self._quota():
+            if delay:
+                # Non-blocking, so concurrent requests overlap like real Bedrock calls
+                await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    # ---- Streaming ----
+
+    def _chunks(self, message: AIMessage):
+        """
+        Split a response into (chunk, seconds to wait before it): text word by word, then
+        one chunk with the tool calls and usage, like a Converse stream.
+        """
+        first = True
+        for word in re.findall(r"\S+\s*", _message_text(message)):
+            delay = self.sample_first_token_seconds() if first else self._token_seconds(approximate_tokens(word))
+            first = False
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word)), delay
+        tool_call_chunks = [
+            {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": index, "type": "tool_call_chunk"}
+            for index, call in enumerate(message.tool_calls)
+        ]
+        tool_tokens = approximate_tokens(str(message.tool_calls)) if message.tool_calls else 0
+        final = AIMessageChunk(
+            content="",
+            tool_call_chunks=tool_call_chunks,
+            usage_metadata=message.usage_metadata,
+            response_metadata=message.response_metadata,
+        )
+        yield ChatGenerationChunk(message=final), (self.sample_first_token_seconds() if first else self._token_seconds(tool_tokens))
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        message = self._respond(messages, kwargs.get("tools") or [])
+        with self._quota():
+            for chunk, delay in self._chunks(message):
+                if delay:
+                    time.sleep(delay)
+                if run_manager:
+                    run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._respond(messages, kwargs.get("tools") or [])
+        with self._quota():
+            for chunk, delay in self._chunks(message):
+                if delay:
+                    await asyncio.sleep(delay)
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+
+    def _react_step(self, messages: List[BaseMessage], tools: List[dict]) -> AIMessage:
+        # Only look at the current user turn
+        last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+        user_text = _message_text(messages[last_human]) if last_human >= 0 else ""
+        turn = messages[last_human + 1:]
+        tool_results = [m for m in turn if isinstance(m, ToolMessage)]
+        subject = guess_subject(user_text)
+
+        if tools and not any(isinstance(m, AIMessage) and m.tool_calls for m in turn):
+            return self._tool_call_message(user_text, subject, tools)
+
+        lines = [f"Here is what I found for {subject}:"]
+        for result in tool_results:
+            lines.append(f"- {result.name}: {_message_text(result).strip()[:200]}")
+        if not tool_results:
+            lines.append(f"- A plan based on your request: {user_text.strip()[:200]}")
+        return AIMessage(content="\n".join(lines))
+
+    def _tool_call_message(self, user_text: str, subject: str, tools: List[dict]) -> AIMessage:
+        content = [{"type": "text", "text": f"I will gather information about {subject}."}]
+        tool_calls = []
+        for index, spec in enumerate(tools):
+            function = spec["function"]
+            args = {}
+            properties = function.get("parameters", {}).get("properties", {})
+            for name in function.get("parameters", {}).get("required", list(properties)):
+                if properties.get(name, {}).get("type", "string") == "string":
+                    args[name] = subject
+            digest = hashlib.sha1(f"{user_text}|{function['name']}|{index}".encode()).hexdigest()[:20]
+            tool_call_id = f"tooluse_{digest}"
+            content.append({"type": "tool_use", "id": tool_call_id, "name": function["name"], "input": args})
+            tool_calls.append({"name": function["name"], "args": args, "id": tool_call_id, "type": "tool_call"})
+        return AIMessage(content=content, tool_calls=tool_calls)
+
+    def _usage(self, messages: List[BaseMessage], message: AIMessage) -> dict:
+        input_tokens = sum(approximate_tokens(_message_text(m)) for m in messages)
+        output_tokens = approximate_tokens(_message_text(message) + str(message.tool_calls or ""))
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+
+def throttling_error():
+    """
+    The error botocore raises when Bedrock throttles a Converse call.
+    """
+    from botocore.exceptions import ClientError
+
+    return ClientError(
+        {"Error": {"Code": "ThrottlingException", "Message": "Too many requests, please wait before trying again."},
+         "ResponseMetadata": {"HTTPStatusCode": 429}},
+        "Converse",
+    )
+
+
+def llm_from_env():
+    """
+    A FakeBedrockChatModel configured from FAKE_LLM_* environment variables when
+    LLM_BACKEND=fake, otherwise None (use the real Bedrock model).
+
+    FAKE_LLM_SCRIPT may point to a JSON list of scripted responses.
+    """
+    if os.environ.get(LLM_BACKEND_ENV, "bedrock").lower() != "fake":
+        return None
+    params = {}
+    for env_name, (field, cast) in _ENV_FIELDS.items():
+        if os.environ.get(env_name):
+            params[field] = cast(os.environ[env_name])
+    if os.environ.get("FAKE_LLM_SCRIPT"):
+        with open(os.environ["FAKE_LLM_SCRIPT"], "r") as f:
+            params["responses"] = json.load(f)
+    return FakeBedrockChatModel(**params)
@@ -0,0 +1,161 @@
+"""
+In-memory flight search index.
+
+The notebook search_flights tool used to read synthetic_travel_data.csv with pandas
+and filter it on every call. FlightSearchIndex loads flights once, from the
+flight_bookings table and/or the CSV, keyed by (departure city, arrival city, date).
+Each route also keeps its flights in a date-sorted array, so date ranges are two
+bisects. Query results are cached until the index is modified.
+"""
+import csv
+import sqlite3
+import sys
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from contextlib import closing
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+
+class Flight(NamedTuple):
+    flight_number: str
+    departure_city: str
+    arrival_city: str
+    date: str
+    departure_time: Optional[str]
+    arrival_time: Optional[str]
+    duration_minutes: Optional[int]
+    price: Optional[float]
+
+
+def _city_key(city):
+    # Case-insensitive city matching ("new york" finds "New York")
+    return city.strip().casefold()
+
+
+class FlightSearchIndex:
+    """
+    Flights grouped per route, sorted by date and departure time.
+
+    Args:
+        cache_size (int): Number of distinct queries whose results are cached
+    """
+
+    def __init__(self, cache_size=4096):
+        self._routes = defaultdict(list)
+        # (departure, arrival) -> (sorted dates, flights in the same order), re-sorted lazily after add()
+        self._sorted = {}
+        # user_id -> home city; the first source loaded wins for IDs present in both
+        self.user_locations = {}
+        self._search = lru_cache(maxsize=cache_size)(self._search_uncached)
+
+    def __len__(self):
+        return sum(len(flights) for flights in self._routes.values())
+
+    def add(self, flight):
+        route = (_city_key(flight.departure_city), _city_key(flight.arrival_city))
+        self._routes[route].append(flight)
+        self._sorted.pop(route, None)
+        self._search.cache_clear()
+
+    def load_database(self, db_path="data/travel_bookings.db"):
+        """
+        Add every flight in the flight_bookings table and the users' home locations.
+        """
+        with closing(sqlite3.connect(db_path)) as conn:
+            rows = conn.execute(
+                "SELECT CAST(booking_id AS TEXT), origin, destination, departure_date, departure_time, arrival_time, "
+                "flight_duration, price FROM flight_bookings"
+            )
+            for flight in map(Flight._make, rows):
+                self._routes[(_city_key(flight.departure_city), _city_key(flight.arrival_city))].append(flight)
+            for user_id, home_location in conn.execute("SELECT user_id, home_location FROM users"):
+                self.user_locations.setdefault(user_id, home_location)
+        self._invalidate()
+        return self
+
+    def load_csv(self, file_path="data/synthetic_travel_data.csv", routes=None):
+        """
+        Add the flights and users' current locations from the synthetic travel CSV.
+
+        Args:
+            file_path (str): Path of the CSV
+            routes (RouteTable, optional): The CSV has no times or prices; when given, duration
+                and price are filled in for routes between cities known to the table
+        """
+        with open(file_path, newline="") as f:
+            for row in csv.DictReader(f):
+                origin, destination = row["Departure_City"], row["Arrival_City"]
+                duration = price = None
+                if routes is not None and origin in routes and destination in routes:
+                    _, duration, price = routes.lookup(origin, destination)
+                self._routes[(_city_key(origin), _city_key(destination))].append(
+                    Flight(row["Flight_Number"], origin, destination, row["Flight_Date"], None, None, duration, price)
+                )
+                # Many rows are flights without a traveller profile
+                if row["Id"]:
+                    self.user_locations.setdefault(int(row["Id"]), row["Current_Location"])
+        self._invalidate()
+        return self
+
+    def _invalidate(self):
+        # Bulk loads sort every route up front so the first search on a route is not slow
+        self._sorted.clear()
+        for route in self._routes:
+            self._route(route)
+        self._search.cache_clear()
+
+    def _route(self, route):
+        if route not in self._sorted:
+            # ISO dates sort lexicographically, so plain string comparison orders them
+            flights = sorted(self._routes.get(route, ()), key=lambda f: (f.date, f.departure_time or ""))
+            # Few distinct dates repeat across many flights; interning keeps the bisect working set small
+            self._sorted[route] = ([sys.intern(f.date) for f in flights], flights)
+        return self._sorted[route]
+
+    def user_location(self, user_id):
+        return self.user_locations.get(user_id)
+
+    def on_date(self, departure_city, arrival_city, date):
+        """
+        Flights on one route and date.
+        """
+        return self.search(departure_city, arrival_city, date, date)
+
+    def search(self, departure_city, arrival_city, date_from=None, date_to=None, limit=None):
+        """
+        Flights on a route departing between `date_from` and `date_to` (inclusive, YYYY-MM-DD).
+
+        Either bound may be omitted. Results are ordered by date and departure time, and
+        repeated queries are answered from the cache.
+
+        Returns:
+            tuple: Matching Flight tuples
+        """
+        return self._search(departure_city, arrival_city, date_from, date_to, limit)
+
+    def _search_uncached(self, departure_city, arrival_city, date_from, date_to, limit):
+        # Cities are normalized here, behind the cache, so cache hits skip it
+        dates, flights = self._route((_city_key(departure_city), _city_key(arrival_city)))
+        lo = bisect_left(dates, date_from) if date_from else 0
+        hi = bisect_right(dates, date_to) if date_to else len(dates)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return tuple(flights[lo:hi])
+
+    def cache_info(self):
+        return self._search.cache_info()
+
+
+@lru_cache(maxsize=None)
+def get_flight_search_index(db_path="data/travel_bookings.db", csv_path="data/synthetic_travel_data.csv"):
+    """
+    A FlightSearchIndex over the bookings database and the travel CSV, built once per process.
+    Pass None for either path to skip that source.
+    """
+    index = FlightSearchIndex()
+    if csv_path:
+        index.load_csv(csv_path)
+    if db_path:
+        index.load_database(db_path)
+    return index
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Vectorized synthetic booking generator for large load-test databases.
+
+Produces the same schema as booking_repository.create_database / utils.insert_sample_data, but
+samples users, routes, dates and prices in NumPy chunks and writes them with
+`executemany` inside a single transaction with journaling and fsync disabled.
+
+    python generate_bookings.py --db-path data/load_test.db --users 100000 --flights 10000000 --hotels 10000000 --seed 42
+"""
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+from faker import Faker
+
+from booking_repository import create_database, create_indexes
+from route_table import CITY_COORDINATES, RouteTable
+
+ROOM_TYPES = np.array(["Single", "Double", "Suite", "Deluxe"])
+# "HH:MM" for every minute of the day, indexed by minute
+TIME_STRINGS = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(1440)])
+
+
+class BookingGenerator:
+    """
+    Samples users, flight bookings and hotel bookings in NumPy chunks.
+
+    Names come from small Faker-generated pools so the generator does not call
+    Faker per row; hotels are a fixed pool per city with a stable base price.
+
+    Args:
+        seed (int): Seed for NumPy and Faker so datasets are reproducible
+        hotels_per_city (int): Number of distinct hotels generated for every city
+        name_pool_size (int): Number of distinct user names to sample from
+    """
+
+    def __init__(self, seed=0, hotels_per_city=25, name_pool_size=5000):
+        self.rng = np.random.default_rng(seed)
+        fake = Faker()
+        fake.seed_instance(seed)
+
+        self.routes = RouteTable(CITY_COORDINATES)
+        self.cities = np.array(self.routes.cities)
+
+        self.user_names = np.array([fake.name() for _ in range(name_pool_size)])
+        self.hotels_per_city = hotels_per_city
+        self.hotel_names = np.array(
+            [[fake.company() + " Hotel" for _ in range(hotels_per_city)] for _ in self.cities]
+        )
+        self.hotel_base_prices = np.round(self.rng.uniform(50, 500, size=self.hotel_names.shape), 2)
+
+        # Dates are only ever a few weeks ahead, so they are formatted through a lookup table
+        today = np.datetime64(datetime.now().date(), "D")
+        self.date_strings = np.datetime_as_string(today + np.arange(0, 120))
+
+    def users(self, start_id, count):
+        ids = np.arange(start_id, start_id + count)
+        names = self.user_names[self.rng.integers(0, len(self.user_names), count)]
+        ages = self.rng.integers(18, 81, count)
+        homes = self.cities[self.rng.integers(0, len(self.cities), count)]
+        return ids, names, ages, homes
+
+    def flight_bookings(self, start_id, count, user_ids, user_names):
+        n = len(self.cities)
+        users = self.rng.integers(0, len(user_ids), count)
+        origin = self.rng.integers(0, n, count)
+        # Shift by 1..n-1 so the destination is uniform over all other cities
+        destination = (origin + self.rng.integers(1, n, count)) % n
+
+        booking_days = self.rng.integers(0, 15, count)
+        departure_days = booking_days + self.rng.integers(1, 31, count)
+        departure_minute = self.rng.integers(0, 1440, count)
+        distance, duration, price = self.routes.lookup_indices(origin, destination)
+        # Minutes since the start of today, so arrivals can roll over to the next day
+        arrival = departure_days * 1440 + departure_minute + duration
+
+        return zip(
+            range(start_id, start_id + count),
+            user_ids[users].tolist(),
+            user_names[users].tolist(),
+            self.cities[origin].tolist(),
+            self.cities[destination].tolist(),
+            price.tolist(),
+            duration.tolist(),
+            self.date_strings[departure_days].tolist(),
+            TIME_STRINGS[departure_minute].tolist(),
+            self.date_strings[arrival // 1440].tolist(),
+            TIME_STRINGS[arrival % 1440].tolist(),
+            np.round(distance, 2).tolist(),
+            self.date_strings[booking_days].tolist(),
+        )
+
+    def hotel_bookings(self, start_id, count, user_ids, user_names):
+        users = self.rng.integers(0, len(user_ids), count)
+        city = self.rng.integers(0, len(self.cities), count)
+        hotel = self.rng.integers(0, self.hotels_per_city, count)
+
+        check_in_days = self.rng.integers(1, 61, count)
+        nights = self.rng.integers(1, 15, count)
+        # Seasonal jitter around the hotel's base price
+        price_per_night = np.round(self.hotel_base_prices[city, hotel] * self.rng.uniform(0.9, 1.1, count), 2)
+
+        return zip(
+            range(start_id, start_id + count),
+            user_ids[users].tolist(),
+            user_names[users].tolist(),
+            self.cities[city].tolist(),
+            self.hotel_names[city, hotel].tolist(),
+            self.date_strings[check_in_days].tolist(),
+            self.date_strings[check_in_days + nights].tolist(),
+            nights.tolist(),
+            price_per_night.tolist(),
+            np.round(price_per_night * nights, 2).tolist(),
+            self.rng.integers(1, 5, count).tolist(),
+            ROOM_TYPES[self.rng.integers(0, len(ROOM_TYPES), count)].tolist(),
+        )
+
+
+def _chunks(total, chunk_size):
+    for start in range(0, total, chunk_size):
+        yield start, min(chunk_size, total - start)
+
+
+def generate_database(db_path, num_users, num_flight_bookings, num_hotel_bookings, seed=0, chunk_size=100_000):
+    """
+    Create a fresh booking database at `db_path` and fill it with synthetic data.
+
+    Args:
+        db_path (str): Path of the SQLite database (it is recreated)
+        num_users (int): Number of users
+        num_flight_bookings (int): Number of flight bookings
+        num_hotel_bookings (int): Number of hotel bookings
+        seed (int): Random seed
+        chunk_size (int): Rows generated and inserted per executemany call
+    """
+    # Indexes are built once after the bulk load, which is much faster than maintaining them per insert
+    conn, cursor = create_database(db_path, with_indexes=False)
+    # Load-test data can always be regenerated, so trade durability for speed
+    cursor.execute("PRAGMA journal_mode=OFF")
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.execute("PRAGMA cache_size=-262144")
+
+    generator = BookingGenerator(seed=seed)
+    user_ids = np.empty(0, dtype=np.int64)
+    user_names = np.empty(0, dtype=generator.user_names.dtype)
+
+    cursor.execute("BEGIN")
+    for start, count in _chunks(num_users, chunk_size):
+        ids, names, ages, homes = generator.users(start + 1, count)
+        cursor.executemany(
+            "INSERT INTO users (user_id, name, age, home_location) VALUES (?, ?, ?, ?)",
+            zip(ids.tolist(), names.tolist(), ages.tolist(), homes.tolist()),
+        )
+        user_ids = np.concatenate([user_ids, ids])
+        user_names = np.concatenate([user_names, names])
+
+    for start, count in _chunks(num_flight_bookings, chunk_size):
+        cursor.executemany(
+            """
+        INSERT INTO flight_bookings (booking_id, user_id, user_name, origin, destination, price, flight_duration, departure_date, departure_time, arrival_date, arrival_time, distance, booking_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+            generator.flight_bookings(start + 1, count, user_ids, user_names),
+        )
+
+    for start, count in _chunks(num_hotel_bookings, chunk_size):
+        cursor.executemany(
+            """
+        INSERT INTO hotel_bookings (booking_id, user_id, user_name, city, hotel_name, check_in_date, check_out_date, nights, price_per_night, total_price, num_guests, room_type)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+            generator.hotel_bookings(start + 1, count, user_ids, user_names),
+        )
+    create_indexes(cursor)
+    conn.commit()
+    # Back to the WAL mode of create_database now that the bulk load is done
+    cursor.execute("PRAGMA journal_mode=WAL")
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic travel bookings database for load testing")
+    parser.add_argument("--db-path", default="data/load_test_bookings.db", help="Path of the SQLite database to create")
+    parser.add_argument("--users", type=int, default=500, help="Number of users")
+    parser.add_argument("--flights", type=int, default=1000, help="Number of flight bookings")
+    parser.add_argument("--hotels", type=int, default=1000, help="Number of hotel bookings")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Rows per executemany batch")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    generate_database(args.db_path, args.users, args.flights, args.hotels, seed=args.seed, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - start
+    total = args.users + args.flights + args.hotels
+    print(f"Generated {total:,} rows into {args.db_path} in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Hotel catalog and availability built from the hotel_bookings table.
+
+Bookings are aggregated into one entry per (city, hotel): the average nightly price
+and the number of rooms booked on every day. Each city keeps its hotels in an array
+sorted by price, so a search is a price-range `searchsorted` followed by an
+availability check on the occupancy rows of the candidate hotels.
+
+By default the inventory only reads the database and `refresh()` reloads it. With
+`track_changes=True`, triggers record the changes to hotel_bookings in a change log
+table, `refresh()` applies only what changed since the last refresh and then deletes
+the log rows it has applied. That log has one consumer: use it for a database that a
+single inventory follows, and `remove_change_log` to take the triggers out again.
+"""
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+
+CHANGE_LOG_TABLE = "hotel_booking_changes"
+
+# Every insert, update and delete on hotel_bookings is logged as +1 (new values) / -1 (old values) rows
+CHANGE_LOG_STATEMENTS = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {CHANGE_LOG_TABLE} (
+        change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sign INTEGER,
+        city TEXT,
+        hotel_name TEXT,
+        check_in_date TEXT,
+        check_out_date TEXT,
+        price_per_night REAL
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS hotel_bookings_log_insert AFTER INSERT ON hotel_bookings BEGIN
+        INSERT INTO {CHANGE_LOG_TABLE} (sign, city, hotel_name, check_in_date, check_out_date, price_per_night)
+        VALUES (1, NEW.city, NEW.hotel_name, NEW.check_in_date, NEW.check_out_date, NEW.price_per_night);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS hotel_bookings_log_update AFTER UPDATE ON hotel_bookings BEGIN
+        INSERT INTO {CHANGE_LOG_TABLE} (sign, city, hotel_name, check_in_date, check_out_date, price_per_night)
+        VALUES (-1, OLD.city, OLD.hotel_name, OLD.check_in_date, OLD.check_out_date, OLD.price_per_night),
+               (1, NEW.city, NEW.hotel_name, NEW.check_in_date, NEW.check_out_date, NEW.price_per_night);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS hotel_bookings_log_delete AFTER DELETE ON hotel_bookings BEGIN
+        INSERT INTO {CHANGE_LOG_TABLE} (sign, city, hotel_name, check_in_date, check_out_date, price_per_night)
+        VALUES (-1, OLD.city, OLD.hotel_name, OLD.check_in_date, OLD.check_out_date, OLD.price_per_night);
+    END
+    """,
+]
+
+REMOVE_CHANGE_LOG_STATEMENTS = [
+    "DROP TRIGGER IF EXISTS hotel_bookings_log_insert",
+    "DROP TRIGGER IF EXISTS hotel_bookings_log_update",
+    "DROP TRIGGER IF EXISTS hotel_bookings_log_delete",
+    f"DROP TABLE IF EXISTS {CHANGE_LOG_TABLE}",
+]
+
+SELECT_HOTEL_BOOKINGS = "SELECT city, hotel_name, check_in_date, check_out_date, price_per_night FROM hotel_bookings"
+SELECT_CHANGES = (
+    f"SELECT change_id, sign, city, hotel_name, check_in_date, check_out_date, price_per_night "
+    f"FROM {CHANGE_LOG_TABLE} WHERE change_id > ? AND change_id <= ? ORDER BY change_id"
+)
+# Highest change_id ever assigned; AUTOINCREMENT keeps it when the rows are deleted
+SELECT_LAST_CHANGE_ID = "SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = ?"
+TRIM_CHANGES = f"DELETE FROM {CHANGE_LOG_TABLE} WHERE change_id <= ?"
+
+
+def remove_change_log(db_path):
+    """
+    Drop the change log table and its triggers from a database.
+    """
+    with closing(sqlite3.connect(db_path)) as conn:
+        for statement in REMOVE_CHANGE_LOG_STATEMENTS:
+            conn.execute(statement)
+        conn.commit()
+
+
+def _days(dates):
+    """
+    YYYY-MM-DD strings -> days since the epoch.
+    """
+    return np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+
+
+def _city_key(city):
+    return city.strip().casefold()
+
+
+class HotelInventory:
+    """
+    Per-city hotel catalog with nightly prices and daily occupancy.
+
+    The synthetic bookings have no room counts, so every hotel is assumed to have
+    `rooms_per_hotel` rooms; a hotel is available for a stay when fewer than that many
+    rooms are booked on every night of it.
+
+    Args:
+        db_path (str): Path of the travel bookings database
+        rooms_per_hotel (int): Rooms available in every hotel
+        track_changes (bool): Install the change log triggers in the database, so that
+            `refresh()` applies changes instead of reloading
+    """
+
+    def __init__(self, db_path="data/travel_bookings.db", rooms_per_hotel=50, track_changes=False):
+        self.db_path = db_path
+        self.rooms_per_hotel = rooms_per_hotel
+        self.track_changes = track_changes
+        self.load()
+
+    # ---- Loading and incremental refresh ----
+
+    def load(self):
+        """
+        Rebuild the whole inventory from hotel_bookings.
+        """
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            if self.track_changes:
+                # The log must exist before the snapshot is read so no later change is missed
+                for statement in CHANGE_LOG_STATEMENTS:
+                    conn.execute(statement)
+                conn.commit()
+                conn.execute("BEGIN")
+                self._last_change_id = conn.execute(SELECT_LAST_CHANGE_ID, (CHANGE_LOG_TABLE,)).fetchone()[0]
+            rows = conn.execute(SELECT_HOTEL_BOOKINGS).fetchall()
+            conn.rollback()
+
+        self.hotel_names = []
+        self.hotel_cities = []
+        self._hotel_ids = {}
+        self._city_hotels = {}
+        self._city_names = {}
+        self._views = {}
+        self._price_sum = np.zeros(0)
+        self._bookings = np.zeros(0, dtype=np.int64)
+        self._first_day = 0
+        self._occupancy = np.zeros((0, 0), dtype=np.int32)
+
+        if not rows:
+            return self
+        cities, names, check_in, check_out, price = zip(*rows)
+        keys = list(zip(cities, names))
+        for key in dict.fromkeys(keys):
+            self._add_hotel(*key)
+        hotel_ids = np.fromiter((self._hotel_ids[key] for key in keys), dtype=np.int64, count=len(keys))
+
+        n = len(self.hotel_names)
+        self._price_sum = np.bincount(hotel_ids, weights=np.asarray(price, dtype=np.float64), minlength=n)
+        self._bookings = np.bincount(hotel_ids, minlength=n).astype(np.int64)
+
+        check_in_days = _days(check_in)
+        check_out_days = _days(check_out)
+        self._first_day = int(check_in_days.min())
+        num_days = int(check_out_days.max()) - self._first_day + 1
+        # Difference array: +1 on check-in, -1 on check-out, then a running sum over the days
+        occupancy = np.zeros((n, num_days + 1), dtype=np.int32)
+        np.add.at(occupancy, (hotel_ids, check_in_days - self._first_day), 1)
+        np.add.at(occupancy, (hotel_ids, check_out_days - self._first_day), -1)
+        self._occupancy = np.cumsum(occupancy, axis=1, dtype=np.int32)[:, :num_days]
+        return self
+
+    def refresh(self):
+        """
+        Apply the bookings inserted, updated or deleted since the last load or refresh.
+        Without change tracking, or when log rows it has not applied were deleted by
+        another inventory, this reloads everything.
+
+        Returns:
+            int: Number of change log rows applied, or None after a full reload
+        """
+        if not self.track_changes:
+            self.load()
+            return None
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            last_change_id = conn.execute(SELECT_LAST_CHANGE_ID, (CHANGE_LOG_TABLE,)).fetchone()[0]
+            changes = conn.execute(SELECT_CHANGES, (self._last_change_id, last_change_id)).fetchall()
+            # change_ids are consecutive, so a missing one was trimmed before being applied here
+            if len(changes) != last_change_id - self._last_change_id:
+                self.load()
+                return None
+            if changes:
+                conn.execute(TRIM_CHANGES, (changes[-1][0],))
+                conn.commit()
+        for _, sign, city, hotel_name, check_in_date, check_out_date, price_per_night in changes:
+            self._apply(sign, city, hotel_name, check_in_date, check_out_date, price_per_night)
+        if changes:
+            self._last_change_id = changes[-1][0]
+        return len(changes)
+
+    def _add_hotel(self, city, hotel_name):
+        hotel_id = len(self.hotel_names)
+        self._hotel_ids[(city, hotel_name)] = hotel_id
+        self.hotel_names.append(hotel_name)
+        self.hotel_cities.append(city)
+        key = _city_key(city)
+        self._city_hotels.setdefault(key, []).append(hotel_id)
+        self._city_names.setdefault(key, city)
+        return hotel_id
+
+    def _apply(self, sign, city, hotel_name, check_in_date, check_out_date, price_per_night):
+        hotel_id = self._hotel_ids.get((city, hotel_name))
+        if hotel_id is None:
+            hotel_id = self._add_hotel(city, hotel_name)
+            self._price_sum = np.append(self._price_sum, 0.0)
+            self._bookings = np.append(self._bookings, 0)
+            self._occupancy = np.vstack([self._occupancy, np.zeros((1, self._occupancy.shape[1]), dtype=np.int32)])
+
+        check_in_day, check_out_day = (int(day) for day in _days([check_in_date, check_out_date]))
+        self._ensure_days(check_in_day, check_out_day)
+        start, end = check_in_day - self._first_day, check_out_day - self._first_day
+
+        self._price_sum[hotel_id] += sign * price_per_night
+        self._bookings[hotel_id] += sign
+        self._occupancy[hotel_id, start:end] += sign
+        self._views.pop(_city_key(city), None)
+
+    def _ensure_days(self, first_day, end_day):
+        """
+        Grow the occupancy grid so that it covers the days [first_day, end_day).
+        """
+        if self._occupancy.shape[1] == 0:
+            self._first_day = first_day
+        before = max(0, self._first_day - first_day)
+        after = max(0, end_day - (self._first_day + self._occupancy.shape[1]))
+        if before or after:
+            self._occupancy = np.pad(self._occupancy, ((0, 0), (before, after)))
+            self._first_day -= before
+
+    # ---- Queries ----
+
+    def _view(self, key):
+        """
+        The city's hotel IDs and average prices, sorted by price. Rebuilt only after that city changes.
+        """
+        if key not in self._views:
+            hotel_ids = np.asarray(self._city_hotels.get(key, ()), dtype=np.int64)
+            hotel_ids = hotel_ids[self._bookings[hotel_ids] > 0]
+            prices = self._price_sum[hotel_ids] / self._bookings[hotel_ids]
+            order = np.argsort(prices, kind="stable")
+            self._views[key] = (hotel_ids[order], prices[order])
+        return self._views[key]
+
+    def cities(self):
+        return sorted(self._city_names[key] for key in self._city_hotels if len(self._view(key)[0]))
+
+    def search(self, city, check_in_date, check_out_date, min_price=None, max_price=None, k=5, rooms=1):
+        """
+        Cheapest hotels in a city with `rooms` free rooms on every night of the stay.
+
+        Args:
+            city (str): City name (case-insensitive)
+            check_in_date (str): YYYY-MM-DD
+            check_out_date (str): YYYY-MM-DD, after check_in_date
+            min_price (float, optional): Minimum average nightly price
+            max_price (float, optional): Maximum average nightly price
+            k (int): Maximum number of hotels returned
+            rooms (int): Rooms needed
+        Returns:
+            list: Dicts with hotel_name, city, price_per_night, nights, total_price and
+                available_rooms, ordered by price
+        """
+        hotel_ids, prices = self._view(_city_key(city))
+        lo = 0 if min_price is None else int(np.searchsorted(prices, min_price, side="left"))
+        hi = len(prices) if max_price is None else int(np.searchsorted(prices, max_price, side="right"))
+        if lo >= hi:
+            return []
+
+        check_in_day, check_out_day = (int(day) for day in _days([check_in_date, check_out_date]))
+        nights = check_out_day - check_in_day
+        # Nights outside the grid have no bookings, so only the overlapping slice is checked
+        start = min(max(check_in_day - self._first_day, 0), self._occupancy.shape[1])
+        end = min(max(check_out_day - self._first_day, 0), self._occupancy.shape[1])
+        candidates = hotel_ids[lo:hi]
+        if end > start:
+            booked = self._occupancy[candidates, start:end].max(axis=1)
+        else:
+            booked = np.zeros(len(candidates), dtype=np.int32)
+        free = self.rooms_per_hotel - booked
+        available = np.flatnonzero(free >= rooms)[:k]
+
+        return [
+            {
+                "hotel_name": self.hotel_names[candidates[i]],
+                "city": self.hotel_cities[candidates[i]],
+                "price_per_night": round(float(prices[lo + i]), 2),
+                "nights": nights,
+                "total_price": round(float(prices[lo + i]) * nights * rooms, 2),
+                "available_rooms": int(free[i]),
+            }
+            for i in available
+        ]
@@ -0,0 +1,163 @@
+"""
+Human approval of booking changes with LangGraph interrupts.
+
+The notebook's `HumanApprovalToolNode` calls `input()` inside the graph for every change
+or cancel tool call, which blocks whatever runs the graph until someone types an answer.
+`InterruptApprovalToolNode` asks with `interrupt()` instead: the graph stops, its state
+is saved by the checkpointer and the call returns. Whoever decides later resumes the
+thread with `approve()` / `deny()`, from any process sharing the checkpointer:
+
+    graph = build_booking_assistant(llm, checkpointer=SQLiteCheckpointSaver("checkpoints.db"))
+    graph.invoke({"messages": [("user", "cancel my hotel bookings 193 and 194")]}, config)
+    pending_approvals(graph.get_state(config))   # both cancel calls, in one request
+    graph.invoke(approve(), config)              # or approve(["tooluse_..."]), deny("wrong booking")
+
+All tool calls of one assistant turn are put in front of the human together, and one
+decision can cover all of them or a subset; the rest stay pending.
+"""
+from typing import List, Optional
+
+from langchain_core.messages import SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import END, START, MessagesState, StateGraph
+from langgraph.prebuilt import ToolNode
+from langgraph.types import Command, interrupt
+
+from booking_tools import BATCH_BOOKING_TOOLS
+
+APPROVAL_INTERRUPT = "tool_approval"
+# Tools that change or cancel bookings, in the notebook and batch (booking_tools) versions
+APPROVAL_REQUIRED_TOOLS = frozenset({
+    "change_flight_booking", "cancel_flight_booking", "change_hotel_booking", "cancel_hotel_booking",
+    "change_flight_bookings", "cancel_flight_bookings", "change_hotel_bookings", "cancel_hotel_bookings",
+})
+
+BOOKING_ASSISTANT_PROMPT = (
+    "You are a travel booking assistant. Use the tools to look up, change or cancel the user's "
+    "flight and hotel bookings. Changes and cancellations are confirmed by the user before they run. "
+    "If a tool call was denied, do not retry it; tell the user what was not done and why."
+)
+
+
+def approve(tool_call_ids=None):
+    """
+    Resume command approving the given pending tool calls, or all of them.
+    """
+    return Command(resume={"approved": True, "tool_call_ids": tool_call_ids})
+
+
+def deny(reason="", tool_call_ids=None):
+    """
+    Resume command denying the given pending tool calls, or all of them.
+    """
+    return Command(resume={"approved": False, "reason": reason, "tool_call_ids": tool_call_ids})
+
+
+def _decisions(value, calls):
+    """
+    Map a resume value to {tool_call_id: (approved, reason)} for the calls it covers.
+
+    Besides approve()/deny() payloads, the notebook's answers are accepted: "y" approves
+    every call and any other text denies them all with that text as the reason.
+    """
+    if isinstance(value, str):
+        approved = value.strip().lower() in ("y", "yes")
+        return {call["id"]: (approved, None if approved else value) for call in calls}
+    if isinstance(value, bool):
+        return {call["id"]: (value, None) for call in calls}
+    ids = {call["id"] for call in calls}
+    selected = value.get("tool_call_ids") or ids
+    return {i: (bool(value.get("approved")), value.get("reason")) for i in selected if i in ids}
+
+
+class InterruptApprovalToolNode:
+    """
+    Runs the tool calls of the last AIMessage, asking a human first for the ones that
+    need approval. Drop-in replacement for the notebook's HumanApprovalToolNode.
+
+    Args:
+        tools (list): Tools the node can run
+        requires_approval (Iterable[str], optional): Names of the tools that need approval;
+            defaults to every tool of the node
+    """
+
+    def __init__(self, tools: list, requires_approval=None) -> None:
+        self.tools_by_name = {tool.name: tool for tool in tools}
+        self.requires_approval = set(self.tools_by_name if requires_approval is None else requires_approval)
+        self.tool_node = ToolNode(tools)
+
+    def __call__(self, inputs: dict, config: RunnableConfig):
+        if messages := inputs.get("messages", []):
+            message = messages[-1]
+        else:
+            raise ValueError("No message found in input")
+
+        # Nothing runs before every decision is in: the node re-executes from the top on resume
+        needs_approval = [call for call in message.tool_calls if call["name"] in self.requires_approval]
+        decisions = {}
+        while undecided := [call for call in needs_approval if call["id"] not in decisions]:
+            value = interrupt({
+                "type": APPROVAL_INTERRUPT,
+                "tool_calls": [{"id": call["id"], "name": call["name"], "args": call["args"]} for call in undecided],
+            })
+            decisions.update(_decisions(value, undecided))
+
+        approved = [call for call in message.tool_calls if decisions.get(call["id"], (True, None))[0]]
+        outputs = {}
+        if approved:
+            result = self.tool_node.invoke({"messages": [message.model_copy(update={"tool_calls": approved})]}, config)
+            outputs = {output.tool_call_id: output for output in result["messages"]}
+        for call in message.tool_calls:
+            if call["id"] not in outputs:
+                outputs[call["id"]] = ToolMessage(
+                    content=f"API call denied by user. Reasoning: '{decisions[call['id']][1] or 'no reason given'}'. ",
+                    name=call["name"],
+                    tool_call_id=call["id"],
+                )
+        return {"messages": [outputs[call["id"]] for call in message.tool_calls]}
+
+
+def pending_approvals(snapshot) -> List[dict]:
+    """
+    Tool calls waiting for a decision in a thread's StateSnapshot (graph.get_state(config)).
+
+    Returns:
+        List[dict]: {"id", "name", "args"} per tool call
+    """
+    return [
+        call
+        for task in snapshot.tasks
+        for pending in task.interrupts
+        if isinstance(pending.value, dict) and pending.value.get("type") == APPROVAL_INTERRUPT
+        for call in pending.value["tool_calls"]
+    ]
+
+
+def build_booking_assistant(llm, tools: Optional[list] = None, checkpointer=None):
+    """
+    A tool-calling booking assistant whose changes and cancellations wait for approval.
+
+    Args:
+        llm: Chat model that supports tool calling
+        tools (list, optional): Booking tools; defaults to the batch tools of booking_tools
+        checkpointer: Saver for the interrupted threads; required to resume them
+    Returns:
+        The compiled graph
+    """
+    tools = tools or BATCH_BOOKING_TOOLS
+    model = llm.bind_tools(tools)
+
+    def assistant(state: MessagesState, config: RunnableConfig):
+        response = model.invoke([SystemMessage(content=BOOKING_ASSISTANT_PROMPT), *state["messages"]], config)
+        return {"messages": [response]}
+
+    def should_continue(state: MessagesState):
+        return "tools" if state["messages"][-1].tool_calls else END
+
+    workflow = StateGraph(MessagesState)
+    workflow.add_node("assistant", assistant)
+    workflow.add_node("tools", InterruptApprovalToolNode(tools, requires_approval=APPROVAL_REQUIRED_TOOLS))
+    workflow.add_edge(START, "assistant")
+    workflow.add_conditional_edges("assistant", should_continue, ["tools", END])
+    workflow.add_edge("tools", "assistant")
+    return workflow.compile(checkpointer=checkpointer)
@@ -0,0 +1,374 @@
+"""
+Latency and token instrumentation for LangGraph workflows.
+
+`GraphInstrumentation` is a LangChain callback handler that times graph nodes, tool
+calls and LLM calls, and counts LLM tokens, retries and errors. Pass a new one per
+request in the run config (or use `InstrumentedGraph`). Timings are aggregated into
+the process-wide `METRICS` registry, which renders in the Prometheus text format
+for a /metrics endpoint, and into a per-request `RequestTimings` that can be logged
+as one structured line and sent back as a `Server-Timing` header.
+"""
+import bisect
+import json
+import threading
+import time
+from collections import defaultdict
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Seconds; covers tool calls of a few ms up to multi-second LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1.0):
+        with self._lock:
+            self._values[label_values] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    labels = _format_labels(self.labels + ("le",), label_values + (le,))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {total:.6f}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class CallbackMetric:
+    """
+    A gauge or counter whose value is read from a function at render time, for state
+    that already lives elsewhere (queue depths, limits). The function returns a number,
+    or a dict of label values -> number when the metric has labels.
+    """
+
+    def __init__(self, name, help_text, fn, kind="gauge", labels=()):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self.kind = kind
+        self.labels = tuple(labels)
+
+    def render(self):
+        values = self.fn()
+        if not self.labels:
+            values = {(): values}
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for label_values, value in sorted(values.items()):
+            if not isinstance(label_values, tuple):
+                label_values = (label_values,)
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value:g}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    A minimal in-process metrics registry with Prometheus text exposition.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def callback(self, name, help_text, fn, kind="gauge", labels=()):
+        return self._register(CallbackMetric(name, help_text, fn, kind, labels))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+METRICS = MetricsRegistry()
+NODE_DURATION = METRICS.histogram("langgraph_node_duration_seconds", "Wall time of LangGraph node runs", ("node",))
+TOOL_DURATION = METRICS.histogram("langgraph_tool_duration_seconds", "Wall time of tool calls", ("tool", "status"))
+LLM_DURATION = METRICS.histogram("llm_request_duration_seconds", "Wall time of LLM calls", ("model", "status"))
+LLM_TOKENS = METRICS.counter("llm_tokens_total", "LLM tokens by direction", ("model", "direction"))
+RETRIES = METRICS.counter("langchain_retries_total", "Retries of LangChain runnables", ("name",))
+HTTP_DURATION = METRICS.histogram("http_request_duration_seconds", "Wall time of HTTP requests", ("method", "path", "status"))
+MODEL_ROUTE_REQUESTS = METRICS.counter("model_route_requests_total", "LLM calls by model route", ("route",))
+MODEL_ROUTE_DURATION = METRICS.histogram(
+    "model_route_llm_duration_seconds", "Wall time of LLM calls by model route", ("route", "model", "status")
+)
+MODEL_ROUTE_COST = METRICS.counter("model_route_cost_usd_total", "Estimated LLM cost by model route", ("route", "model"))
+MODEL_ROUTE_FALLBACKS = METRICS.counter(
+    "model_route_fallbacks_total", "Throttled LLM calls retried on another route", ("route", "fallback")
+)
+ITINERARY_REQUESTS = METRICS.counter(
+    "itinerary_requests_total", "Itinerary requests by whether they ran the graph or shared an in-flight run", ("execution",)
+)
+DEADLINE_TRIGGERED = METRICS.counter(
+    "itinerary_deadline_triggered_total", "Itinerary work cut short by the request deadline or step limit", ("action",)
+)
+
+
+class RequestTimings:
+    """
+    Timings collected while serving one request.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.nodes = defaultdict(float)
+        self.tools = defaultdict(float)
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.retries = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def add_node(self, node, seconds):
+        with self._lock:
+            self.nodes[node] += seconds
+
+    def add_tool(self, tool, seconds):
+        with self._lock:
+            self.tools[tool] += seconds
+
+    def add_llm(self, seconds, input_tokens, output_tokens):
+        with self._lock:
+            self.llm_calls += 1
+            self.llm_seconds += seconds
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+
+    def to_dict(self):
+        return {
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "nodes_ms": {node: round(seconds * 1000, 2) for node, seconds in self.nodes.items()},
+            "tools_ms": {tool: round(seconds * 1000, 2) for tool, seconds in self.tools.items()},
+            "llm": {
+                "calls": self.llm_calls,
+                "duration_ms": round(self.llm_seconds * 1000, 2),
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "retries": self.retries,
+                "errors": self.errors,
+            },
+        }
+
+    def log_line(self, **fields):
+        return json.dumps({"event": "request_timing", **fields, **self.to_dict()})
+
+    def server_timing(self):
+        """
+        Value for a Server-Timing header, e.g. `node.create_itinerary;dur=812.4, llm;dur=790.1`.
+        """
+        entries = [f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}"]
+        entries += [f"node.{_token(node)};dur={seconds * 1000:.1f}" for node, seconds in self.nodes.items()]
+        entries += [f"tool.{_token(tool)};dur={seconds * 1000:.1f}" for tool, seconds in self.tools.items()]
+        if self.llm_calls:
+            entries.append(f'llm;dur={self.llm_seconds * 1000:.1f};desc="{self.llm_calls} calls"')
+        return ", ".join(entries)
+
+
+def _token(name):
+    # Server-Timing metric names are HTTP tokens
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+
+
+def _node_label(name, metadata):
+    """
+    Qualified node name, e.g. "create_itinerary/agent" for a node inside a subgraph.
+    """
+    namespace = metadata.get("checkpoint_ns") or metadata.get("langgraph_checkpoint_ns") or ""
+    parents = [segment.split(":")[0] for segment in namespace.split("|") if segment]
+    if parents and parents[-1] == name:
+        parents.pop()
+    return "/".join(parents + [name])
+
+
+class GraphInstrumentation(BaseCallbackHandler):
+    """
+    Callback handler recording node, tool and LLM timings into METRICS and a RequestTimings.
+
+    Create one per request: it keeps the start times of the runs in flight.
+
+    Args:
+        timings (RequestTimings, optional): Per-request accumulator; a new one is created if omitted
+    """
+
+    # The handlers only do dict updates, so they run inline instead of in an executor
+    run_inline = True
+    raise_error = False
+
+    def __init__(self, timings=None):
+        self.timings = timings or RequestTimings()
+        # run_id -> (kind, label, start time)
+        self._runs = {}
+
+    def _start(self, run_id, kind, label):
+        self._runs[run_id] = (kind, label, time.perf_counter())
+
+    def _finish(self, run_id):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return None, None, 0.0
+        kind, label, start = run
+        return kind, label, time.perf_counter() - start
+
+    # ---- Graph nodes ----
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        name = kwargs.get("name")
+        # A node's own run carries its name in langgraph_node and a graph:step tag
+        if metadata and name and metadata.get("langgraph_node") == name and any(t.startswith("graph:step:") for t in tags or ()):
+            self._start(run_id, "node", _node_label(name, metadata))
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        if run_id in self._runs:
+            _, node, seconds = self._finish(run_id)
+            NODE_DURATION.observe(seconds, node)
+            self.timings.add_node(node, seconds)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self.on_chain_end(None, run_id=run_id)
+
+    # ---- Tools ----
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id, "tool", kwargs.get("name") or (serialized or {}).get("name", "tool"))
+
+    def _end_tool(self, run_id, status):
+        _, tool, seconds = self._finish(run_id)
+        if tool is not None:
+            TOOL_DURATION.observe(seconds, tool, status)
+            self.timings.add_tool(tool, seconds)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end_tool(run_id, "ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end_tool(run_id, "error")
+
+    # ---- LLM calls ----
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, "llm", (metadata or {}).get("ls_model_name") or kwargs.get("name") or "unknown")
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self.on_chat_model_start(serialized, prompts, run_id=run_id, metadata=metadata, **kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        _, model, seconds = self._finish(run_id)
+        if model is None:
+            return
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+        LLM_DURATION.observe(seconds, model, "ok")
+        LLM_TOKENS.inc(model, "input", amount=input_tokens)
+        LLM_TOKENS.inc(model, "output", amount=output_tokens)
+        self.timings.add_llm(seconds, input_tokens, output_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        _, model, seconds = self._finish(run_id)
+        if model is not None:
+            LLM_DURATION.observe(seconds, model, "error")
+            self.timings.errors += 1
+
+    def on_retry(self, retry_state, *, run_id, **kwargs):
+        RETRIES.inc(kwargs.get("name") or "runnable")
+        self.timings.retries += 1
+
+
+class InstrumentedGraph:
+    """
+    Wraps a compiled graph so every invoke/ainvoke runs with a GraphInstrumentation handler.
+
+    The handler of the last call is not kept; pass `timings` to collect a request's timings.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    @staticmethod
+    def _config(config, timings):
+        config = dict(config or {})
+        handler = GraphInstrumentation(timings)
+        callbacks = config.get("callbacks")
+        if callbacks is None:
+            config["callbacks"] = [handler]
+        elif isinstance(callbacks, list):
+            config["callbacks"] = callbacks + [handler]
+        else:
+            # A callback manager: add the handler to a copy so it is inherited by child runs
+            callbacks = callbacks.copy()
+            callbacks.add_handler(handler, inherit=True)
+            config["callbacks"] = callbacks
+        return config
+
+    def invoke(self, input, config=None, timings=None, **kwargs):
+        return self.graph.invoke(input, self._config(config, timings), **kwargs)
+
+    async def ainvoke(self, input, config=None, timings=None, **kwargs):
+        return await self.graph.ainvoke(input, self._config(config, timings), **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.graph, name)
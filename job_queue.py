@@ -0,0 +1,386 @@
+"""
+A SQLite-backed job queue with an asyncio worker pool, for work that outlives an HTTP request.
+
+`JobQueue` stores jobs in one table (WAL mode), so every process sharing the database
+file sees the same jobs:
+
+    queued -> running -> succeeded | failed
+
+Workers claim the oldest queued job of the most urgent priority. A claim is a lease:
+a job whose worker died (the process crashed or the Lambda froze) is claimed again when
+its lease runs out, up to `max_attempts` times. While a job runs, its handler can record
+progress (`JobQueue.progress`), which readers see as the job's partial output.
+
+`JobWorkerPool` runs `concurrency` worker tasks on the current event loop:
+
+    queue = JobQueue("jobs.db")
+    pool = JobWorkerPool(queue, handler, concurrency=8)   # handler(job, progress) -> result
+    pool.start()
+    job_id = queue.submit({"user_message": "..."})
+    job = await queue.wait(job_id, timeout=60)
+
+Waiting and streaming are woken up in-process when a job changes and otherwise poll the
+database, so jobs run by another process are followed too.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+FINISHED = ("succeeded", "failed")
+# Lower runs first, as in concurrency_limiter.PRIORITIES
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+CLAIM_JOB = """
+SELECT id FROM jobs
+WHERE status = 'queued' OR (status = 'running' AND lease_until < ?)
+ORDER BY priority, created_at
+LIMIT 1
+"""
+
+
+class JobFailed(Exception):
+    """
+    Raised by a job handler to fail the job with an HTTP-style status and detail.
+    """
+
+    def __init__(self, status_code, detail, headers=None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.headers = headers
+
+
+class QueueFull(Exception):
+    """
+    Raised by `JobQueue.submit` when `max_queued` jobs are already waiting.
+    """
+
+
+class JobQueue:
+    """
+    Jobs persisted in SQLite.
+
+    Args:
+        db_path (str): Path of the SQLite database
+        lease_seconds (float): How long a claim lasts before the job can be claimed again
+        max_attempts (int): Claims after which an abandoned job is failed instead
+        retention_seconds (float): Finished jobs older than this are purged
+        max_queued (int, optional): Queued jobs beyond which new ones are rejected; None for no limit
+        poll_interval (float): Seconds between database reads while waiting on a job
+    """
+
+    def __init__(self, db_path, lease_seconds=900.0, max_attempts=3, retention_seconds=86400.0, max_queued=None,
+                 poll_interval=0.25):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self.max_queued = max_queued
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                idempotency_key TEXT UNIQUE,
+                status TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                request TEXT NOT NULL,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                version INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                lease_until REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, priority, created_at);
+            CREATE INDEX IF NOT EXISTS idx_jobs_finished_at ON jobs (finished_at);
+            """
+        )
+        # (loop, event) of every coroutine waiting on a job or, under None, for new jobs
+        self._waiters = {}
+        self._submits = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    @contextmanager
+    def _waiter(self, key):
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        self._waiters.setdefault(key, set()).add(waiter)
+        try:
+            yield waiter[1]
+        finally:
+            self._waiters[key].discard(waiter)
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    def _notify(self, job_id):
+        for loop, event in [*self._waiters.get(job_id, ()), *self._waiters.get(None, ())]:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(event.set)
+
+    def submit(self, request, priority="interactive", idempotency_key=None):
+        """
+        Queue a job.
+
+        Args:
+            request (dict): JSON-serializable input of the job
+            priority (str): "interactive" or "batch"
+            idempotency_key (str, optional): Submitting the same key again returns the first job
+        Returns:
+            tuple: (job_id, created) where created is False for a known idempotency key
+        Raises:
+            QueueFull: When `max_queued` jobs are queued already; a known idempotency key is
+                still answered with its job
+        """
+        job_id = uuid.uuid4().hex
+        with self._transaction() as conn:
+            if idempotency_key is not None:
+                row = conn.execute("SELECT id FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+                if row is not None:
+                    return row["id"], False
+            if self.max_queued is not None:
+                queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+                if queued >= self.max_queued:
+                    raise QueueFull(f"{queued} jobs are queued already")
+            conn.execute(
+                "INSERT INTO jobs (id, idempotency_key, status, priority, request, created_at) VALUES (?, ?, 'queued', ?, ?, ?)",
+                (job_id, idempotency_key, PRIORITIES[priority], json.dumps(request), time.time()),
+            )
+        self._submits += 1
+        if self._submits % 100 == 0:
+            self.purge()
+        self._notify(job_id)
+        return job_id, True
+
+    def claim(self):
+        """
+        Lease the next job to run, or None if there is none.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(CLAIM_JOB, (now,)).fetchone()
+            if row is None:
+                return None
+            job_id = row["id"]
+            attempts = conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()["attempts"]
+            if attempts >= self.max_attempts:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, version = version + 1 WHERE id = ?",
+                    (json.dumps({"status_code": 500, "detail": f"Abandoned after {attempts} attempts"}), now, job_id),
+                )
+                abandoned, job_id = job_id, None
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, lease_until = ?, "
+                    "version = version + 1 WHERE id = ?",
+                    (now, now + self.lease_seconds, job_id),
+                )
+        if job_id is None:
+            self._notify(abandoned)
+            return self.claim()
+        self._notify(job_id)
+        return self.get(job_id)
+
+    def _update(self, job_id, sql, params):
+        with self._lock:
+            self._conn.execute(sql, params)
+        self._notify(job_id)
+
+    def progress(self, job_id, progress):
+        """
+        Record the partial output of a running job.
+        """
+        self._update(
+            job_id,
+            "UPDATE jobs SET progress = ?, version = version + 1 WHERE id = ? AND status = 'running'",
+            (json.dumps(progress), job_id),
+        )
+
+    def complete(self, job_id, result):
+        self._update(
+            job_id,
+            "UPDATE jobs SET status = 'succeeded', result = ?, finished_at = ?, version = version + 1 WHERE id = ?",
+            (json.dumps(result), time.time(), job_id),
+        )
+
+    def fail(self, job_id, status_code, detail, headers=None):
+        error = {"status_code": status_code, "detail": detail, "headers": headers}
+        self._update(
+            job_id,
+            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, version = version + 1 WHERE id = ?",
+            (json.dumps(error), time.time(), job_id),
+        )
+
+    def get(self, job_id) -> Optional[dict]:
+        """
+        The job as a dict with its decoded request, progress, result and error, or None.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for field in ("request", "progress", "result", "error"):
+            job[field] = json.loads(job[field]) if job[field] is not None else None
+        return job
+
+    def counts(self):
+        """
+        Number of jobs per status.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def purge(self):
+        """
+        Delete finished jobs older than the retention period.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE finished_at < ?", (time.time() - self.retention_seconds,))
+
+    async def changes(self, job_id, timeout=None):
+        """
+        Yield the job every time it changes, ending with its finished state.
+
+        Args:
+            job_id (str): The job
+            timeout (float, optional): Stop following it after this many seconds
+        """
+        with self._waiter(job_id) as event:
+            async for job in self._follow(job_id, event, timeout):
+                yield job
+
+    async def _follow(self, job_id, event, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        version = None
+        while True:
+            event.clear()
+            job = self.get(job_id)
+            if job is None:
+                return
+            if job["version"] != version:
+                version = job["version"]
+                yield job
+            if job["status"] in FINISHED:
+                return
+            wait = self.poll_interval if deadline is None else min(self.poll_interval, deadline - time.monotonic())
+            if wait <= 0:
+                return
+            try:
+                await asyncio.wait_for(event.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def wait(self, job_id, timeout=None):
+        """
+        The job once it has finished, or as it is when the timeout runs out.
+        """
+        job = None
+        async for job in self.changes(job_id, timeout=timeout):
+            pass
+        return job
+
+    async def next_job(self):
+        """
+        Claim the next job, waiting for one to be submitted if the queue is empty.
+        """
+        with self._waiter(None) as event:
+            while True:
+                event.clear()
+                job = self.claim()
+                if job is not None:
+                    return job
+                try:
+                    await asyncio.wait_for(event.wait(), self.poll_interval * 4)
+                except asyncio.TimeoutError:
+                    pass
+
+
+class JobWorkerPool:
+    """
+    Worker tasks running queued jobs on the current event loop.
+
+    Args:
+        queue (JobQueue): Where the jobs come from
+        handler: Coroutine function `handler(job, progress)` returning the job's JSON result;
+            `progress(dict)` records partial output. Raising JobFailed fails the job with its
+            status; any other exception fails it with status 500.
+        concurrency (int): Jobs running at once
+    """
+
+    def __init__(self, queue, handler, concurrency=4):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency
+        self.loop = None
+        self.running = 0
+        self._tasks = []
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        self._tasks = [self.loop.create_task(self._work(i)) for i in range(self.concurrency)]
+        logger.info("Started %d job workers", self.concurrency)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def alive(self):
+        """
+        Whether the workers run on the current event loop.
+        """
+        try:
+            return self.loop is asyncio.get_running_loop() and not self.loop.is_closed() and bool(self._tasks)
+        except RuntimeError:
+            return False
+
+    async def _work(self, worker):
+        while True:
+            job = await self.queue.next_job()
+            self.running += 1
+            try:
+                result = await self.handler(job, lambda progress, job_id=job["id"]: self.queue.progress(job_id, progress))
+                self.queue.complete(job["id"], result)
+            except asyncio.CancelledError:
+                # Stopped with the pool: the lease runs out and another worker picks the job up
+                raise
+            except JobFailed as e:
+                self.queue.fail(job["id"], e.status_code, e.detail, e.headers)
+            except Exception as e:
+                logger.exception("Job %s failed", job["id"])
+                self.queue.fail(job["id"], 500, str(e))
+            finally:
+                self.running -= 1
@@ -0,0 +1,30 @@
+"""
+Helpers for reading LangChain message lists, shared by the supervisor and itinerary graphs.
+"""
+from langchain_core.messages import AIMessage, HumanMessage
+
+
+def latest_user_request(messages):
+    """
+    The most recent message from the user (not from an agent or the supervisor).
+    """
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage) and not message.name:
+            return message.content
+        if isinstance(message, tuple) and message[0] == "user":
+            return message[1]
+    return ""
+
+
+def final_text(messages):
+    """
+    Text of the last AI message, joining the text blocks of Converse-style content.
+    """
+    for message in reversed(messages):
+        if isinstance(message, AIMessage):
+            content = message.content
+            if isinstance(content, list):
+                content = " ".join(block.get("text", "") for block in content if isinstance(block, dict))
+            if content:
+                return content
+    return ""
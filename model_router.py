@@ -0,0 +1,314 @@
+"""
+Route each LLM request to a small or a large model by how complex the request is.
+
+`classify_request` scores a user message with cheap local heuristics (length, number
+of places, multi-day planning, planning vocabulary and constraints). Simple lookups
+("weather in Rome tomorrow?") go to a small, fast model and complex itineraries
+("10 days across Paris, Rome and Vienna with kids on a budget") to a larger one.
+
+`RoutedChatModel` does the routing inside the chat model, from the last human
+message of every call, so it drops into any graph that takes an `llm`. Each route
+has its own model and max_tokens; a throttled call is retried once on the route's
+fallback. Latency, cost and fallbacks are recorded per route in the metrics registry.
+"""
+import os
+import re
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from concurrency_limiter import is_throttling_error
+from instrumentation import MODEL_ROUTE_COST, MODEL_ROUTE_DURATION, MODEL_ROUTE_FALLBACKS, MODEL_ROUTE_REQUESTS
+
+
+class ModelRoute(NamedTuple):
+    name: str
+    model_id: str
+    # None leaves the model's own limit
+    max_tokens: Optional[int]
+    # USD per 1,000 tokens (Bedrock on-demand)
+    input_cost_per_1k: float
+    output_cost_per_1k: float
+    fallback: Optional[str] = None
+
+
+DEFAULT_ROUTES = {
+    "simple": ModelRoute("simple", "us.amazon.nova-lite-v1:0", 512, 0.00006, 0.00024, fallback="complex"),
+    "complex": ModelRoute("complex", "us.amazon.nova-pro-v1:0", 2048, 0.0008, 0.0032, fallback="simple"),
+}
+# Used by utils.create_agent, whose prompts were written for Claude
+CLAUDE_ROUTES = {
+    "simple": ModelRoute("simple", "anthropic.claude-3-haiku-20240307-v1:0", None, 0.00025, 0.00125, fallback="complex"),
+    "complex": ModelRoute("complex", "anthropic.claude-3-5-sonnet-20240620-v1:0", None, 0.003, 0.015, fallback="simple"),
+}
+# Environment variables overriding the model of a route, per route set
+ROUTE_MODEL_ENV = {"simple": "MODEL_ROUTE_SIMPLE", "complex": "MODEL_ROUTE_COMPLEX"}
+CLAUDE_ROUTE_MODEL_ENV = {"simple": "CLAUDE_ROUTE_SIMPLE", "complex": "CLAUDE_ROUTE_COMPLEX"}
+
+COMPLEX_SCORE = 3
+
+_NUMBER_WORDS = {
+    "a": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "fourteen": 14, "several": 3, "few": 3,
+}
+_DURATION = re.compile(r"\b(\d+|" + "|".join(_NUMBER_WORDS) + r")[\s-]*(day|night|week)s?\b", re.IGNORECASE)
+_PLANNING = re.compile(r"\b(itinerar(?:y|ies)|schedule|day[\s-]by[\s-]day|each day|every day|multi[\s-]?city|trip|route)\b", re.IGNORECASE)
+_CONSTRAINTS = re.compile(
+    r"\b(budget|cheap|luxury|kids?|children|family|wheelchair|vegetarian|vegan|halal|accessible|pets?|museums?|hiking|nightlife|beach(?:es)?)\b",
+    re.IGNORECASE,
+)
+_PLACE = re.compile(r"(?:\b(?:to|in|across|visit|visiting|from|and|then|via|between)\s+|,\s*)([A-Z][\w'-]+(?:\s+[A-Z][\w'-]+)*)")
+
+
+class Classification(NamedTuple):
+    route: str
+    score: int
+    words: int
+    places: int
+    days: int
+    planning: bool
+    constraints: int
+
+
+@lru_cache(maxsize=4096)
+def classify_request(message):
+    """
+    Pick the route for a user message.
+
+    Args:
+        message (str): The user's request
+    Returns:
+        Classification: The route ("simple" or "complex") and the features behind it
+    """
+    words = len(message.split())
+    places = len({match.group(1) for match in _PLACE.finditer(message)})
+    days = 0
+    for amount, unit in _DURATION.findall(message):
+        count = int(amount) if amount.isdigit() else _NUMBER_WORDS[amount.lower()]
+        days = max(days, count * 7 if unit.lower() == "week" else count)
+    planning = bool(_PLANNING.search(message))
+    constraints = len({match.lower() for match in _CONSTRAINTS.findall(message)})
+
+    score = (words > 25) + (words > 60)
+    score += 2 if places >= 2 else 0
+    score += 2 if days >= 3 else int(days > 1)
+    score += planning + (constraints >= 2)
+    route = "complex" if score >= COMPLEX_SCORE else "simple"
+    return Classification(route, score, words, places, days, planning, constraints)
+
+
+def _last_human_text(messages):
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            content = message.content
+            if isinstance(content, list):
+                return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+            return content
+    return ""
+
+
+def request_cost(route, usage):
+    if not usage:
+        return 0.0
+    return (usage.get("input_tokens", 0) * route.input_cost_per_1k + usage.get("output_tokens", 0) * route.output_cost_per_1k) / 1000
+
+
+class RoutedChatModel(BaseChatModel):
+    """
+    A chat model that sends each call to the model of its route.
+
+    Args:
+        models (dict): Route name -> chat model
+        routes (dict): Route name -> ModelRoute (model IDs, prices and fallbacks)
+    """
+
+    models: Dict[str, BaseChatModel]
+    routes: Dict[str, Any] = DEFAULT_ROUTES
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed-chat-model"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"routes": {name: route.model_id for name, route in self.routes.items()}}
+
+    def _get_ls_params(self, stop: Optional[List[str]] = None, **kwargs: Any):
+        # The model is only known once the messages are classified; per-route metrics carry it
+        params = super()._get_ls_params(stop=stop, **kwargs)
+        params["ls_model_name"] = "routed"
+        return params
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        # Every route is a Converse model, so they share one tool format
+        return self.bind(**next(iter(self.models.values())).bind_tools(tools, **kwargs).kwargs)
+
+    def _plan(self, messages):
+        """
+        The route of a call followed by its fallback.
+        """
+        route = self.routes[classify_request(_last_human_text(messages)).route]
+        MODEL_ROUTE_REQUESTS.inc(route.name)
+        plan = [route]
+        if route.fallback in self.models:
+            plan.append(self.routes[route.fallback])
+        return plan
+
+    def _record(self, route, seconds, status, usage=None):
+        MODEL_ROUTE_DURATION.observe(seconds, route.name, route.model_id, status)
+        if usage:
+            MODEL_ROUTE_COST.inc(route.name, route.model_id, amount=request_cost(route, usage))
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        plan = self._plan(messages)
+        for attempt, route in enumerate(plan):
+            start = time.perf_counter()
+            try:
+                result = self.models[route.name]._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except Exception as error:
+                self._record(route, time.perf_counter() - start, "error")
+                if attempt + 1 == len(plan) or not is_throttling_error(error):
+                    raise
+                MODEL_ROUTE_FALLBACKS.inc(route.name, plan[attempt + 1].name)
+                continue
+            self._record(route, time.perf_counter() - start, "ok", _usage(result))
+            return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        plan = self._plan(messages)
+        for attempt, route in enumerate(plan):
+            start = time.perf_counter()
+            try:
+                result = await self.models[route.name]._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except Exception as error:
+                self._record(route, time.perf_counter() - start, "error")
+                if attempt + 1 == len(plan) or not is_throttling_error(error):
+                    raise
+                MODEL_ROUTE_FALLBACKS.inc(route.name, plan[attempt + 1].name)
+                continue
+            self._record(route, time.perf_counter() - start, "ok", _usage(result))
+            return result
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        plan = self._plan(messages)
+        for attempt, route in enumerate(plan):
+            start, usage, started = time.perf_counter(), None, False
+            try:
+                for chunk in self.models[route.name]._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                    started = True
+                    usage = getattr(chunk.message, "usage_metadata", None) or usage
+                    yield chunk
+            except Exception as error:
+                self._record(route, time.perf_counter() - start, "error")
+                # Only fall back before any output has been sent
+                if started or attempt + 1 == len(plan) or not is_throttling_error(error):
+                    raise
+                MODEL_ROUTE_FALLBACKS.inc(route.name, plan[attempt + 1].name)
+                continue
+            self._record(route, time.perf_counter() - start, "ok", usage)
+            return
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        plan = self._plan(messages)
+        for attempt, route in enumerate(plan):
+            start, usage, started = time.perf_counter(), None, False
+            try:
+                async for chunk in self.models[route.name]._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                    started = True
+                    usage = getattr(chunk.message, "usage_metadata", None) or usage
+                    yield chunk
+            except Exception as error:
+                self._record(route, time.perf_counter() - start, "error")
+                if started or attempt + 1 == len(plan) or not is_throttling_error(error):
+                    raise
+                MODEL_ROUTE_FALLBACKS.inc(route.name, plan[attempt + 1].name)
+                continue
+            self._record(route, time.perf_counter() - start, "ok", usage)
+            return
+
+
+def _usage(result):
+    return getattr(result.generations[0].message, "usage_metadata", None) if result.generations else None
+
+
+def routing_enabled():
+    """
+    Whether LLM calls are routed by complexity; MODEL_ROUTER=0 keeps a single model.
+    """
+    return os.environ.get("MODEL_ROUTER", "1") != "0"
+
+
+def configured_routes(routes=DEFAULT_ROUTES, model_env=ROUTE_MODEL_ENV):
+    """
+    The routes with model IDs overridden from the environment variables in `model_env`:
+    MODEL_ROUTE_SIMPLE / MODEL_ROUTE_COMPLEX by default, CLAUDE_ROUTE_SIMPLE /
+    CLAUDE_ROUTE_COMPLEX for CLAUDE_ROUTES.
+    """
+    return {
+        name: route._replace(model_id=os.environ.get(model_env.get(name, ""), route.model_id))
+        for name, route in routes.items()
+    }
+
+
+def bedrock_router(client, routes=None, **model_kwargs):
+    """
+    A RoutedChatModel with one ChatBedrockConverse per route.
+
+    Args:
+        client: boto3 bedrock-runtime client shared by the routes
+        routes (dict, optional): Route name -> ModelRoute; defaults to configured_routes()
+        **model_kwargs: Extra ChatBedrockConverse arguments, e.g. temperature
+    """
+    from langchain_aws import ChatBedrockConverse
+
+    routes = routes or configured_routes()
+    models = {
+        name: ChatBedrockConverse(
+            model=route.model_id,
+            # "us.amazon.nova-lite-v1:0" -> "amazon"
+            provider=route.model_id.split(".")[-2],
+            max_tokens=route.max_tokens,
+            client=client,
+            **model_kwargs,
+        )
+        for name, route in routes.items()
+    }
+    return RoutedChatModel(models=models, routes=routes)
+
+
+def fake_router(llm, routes=None):
+    """
+    A RoutedChatModel over copies of a fake model, one per route, named after the route's model ID.
+    """
+    routes = routes or configured_routes()
+    models = {name: llm.model_copy(update={"model": route.model_id}) for name, route in routes.items()}
+    return RoutedChatModel(models=models, routes=routes)
@@ -0,0 +1,238 @@
+"""
+Map-reduce planning of itineraries that cover several cities.
+
+The itinerary graph in server.py runs one ReAct loop per request, so "5 days in Paris,
+Rome and Venice" fetches the weather and attractions of each city one LLM round trip
+after the other. In multi-city mode the graph instead:
+
+1. extracts the cities of the route table named in the request (`extract_cities`, no LLM call)
+   and orders them with route_optimizer, starting from the first one named;
+2. fans out one `plan_city` worker per city with LangGraph's `Send`, each running its
+   own small ReAct loop for that city's weather, attractions and day plan;
+3. merges the per-city plans in order with one LLM call (`combine_city_plans`).
+
+A city whose worker fails or times out is reported in the itinerary instead of failing
+the request. In checkpointed runs a failing worker fails the run, so that a retry plans
+that city again, until it has failed `max_attempts` times. Under a request deadline (deadline.py) the workers stop in time for the
+merge, and the merge joins the plans without the LLM when no time is left for it. The number of workers running at once is capped with the graph's
+`max_concurrency`.
+"""
+import asyncio
+import logging
+import re
+from typing import Optional, TypedDict
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langgraph.prebuilt import create_react_agent
+from langgraph.types import Send
+
+from concurrency_limiter import LimiterRejected
+from deadline import DeadlineExceeded, current_deadline, step_seconds
+from instrumentation import DEADLINE_TRIGGERED
+from message_utils import final_text
+from city_coordinates import CITY_COORDINATES
+
+logger = logging.getLogger(__name__)
+
+MAX_CITIES = 8
+# Start of the error of a city the request deadline left no time for
+NO_TIME_LEFT = "no time left"
+# Configurable key of the failed attempts per city of an earlier run, see failed_city_attempts
+CITY_ATTEMPTS = "city_attempts"
+
+_FAILED_ATTEMPT = re.compile(r"Planning (.+?) failed on attempt (\d+):")
+# What the visit order of the cities minimizes (route_optimizer.OBJECTIVES), or "request" to keep their order
+ROUTE_ORDERS = ("distance", "duration", "price", "request")
+
+# The cities of the route table, longest names first so "New York" is not cut short,
+# matched as whole words in any case. A city right after "from" is the origin, not a stop.
+_CITY = re.compile(
+    r"\b(from\s+)?(" + "|".join(re.escape(city) for city in sorted(CITY_COORDINATES, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+_CITY_NAMES = {city.casefold(): city for city in CITY_COORDINATES}
+
+CITY_PROMPT = (
+    "Plan the part of this trip in {city}. Get the weather forecast and the tourist attractions "
+    "in {city}, then write a day-by-day plan for {city} only.\n\nTrip request: {request}"
+)
+COMBINE_PROMPT = (
+    "You are a travel planner. Combine the per-city plans below into one itinerary, keeping the "
+    "cities in the given order, adding the travel between them and keeping each day plan. Mention "
+    "any city that could not be planned."
+)
+
+
+class CityTask(TypedDict):
+    index: int
+    city: str
+    user_message: str
+
+
+class CityPlan(TypedDict):
+    index: int
+    city: str
+    plan: Optional[str]
+    error: Optional[str]
+
+
+class CityPlanningFailed(Exception):
+    """
+    Raised by the worker of a checkpointed run when planning a city fails. Checkpoints
+    keep the text of a task's error only, so the attempt is part of the message.
+    """
+
+    def __init__(self, city, attempt, error):
+        super().__init__(f"Planning {city} failed on attempt {attempt}: {error}")
+
+
+def failed_city_attempts(errors):
+    """
+    Failed attempts per city, from the errors of the pending tasks of an interrupted run
+    (`PregelTask.error` of its state snapshot).
+    """
+    attempts = {}
+    for error in errors:
+        match = _FAILED_ATTEMPT.search(str(error or ""))
+        if match:
+            attempts[match.group(1)] = int(match.group(2))
+    return attempts
+
+
+def merge_city_plans(existing, new):
+    """
+    Reducer for city plans: parallel workers append, and None starts a new request.
+    """
+    if new is None:
+        return []
+    return (existing or []) + new
+
+
+def extract_cities(message, limit=MAX_CITIES):
+    """
+    Destination cities named in a request, in order, e.g.
+    "4 days across Paris, Rome and Venice" -> ["Paris", "Rome", "Venice"]. Only cities of
+    the route table count, so landmarks and other capitalized words are never planned as
+    a city.
+    """
+    cities = []
+    for match in _CITY.finditer(message):
+        city = _CITY_NAMES[match.group(2).casefold()]
+        if not match.group(1) and city not in cities:
+            cities.append(city)
+    return cities[:limit]
+
+
+def order_cities(cities, objective="distance"):
+    """
+    The cities in the visit order that minimizes `objective` ("distance", "duration" or
+    "price"), starting from the first one; None or "request" keeps them as they are.
+    """
+    if objective in (None, "request") or len(cities) < 3:
+        return cities
+    # NumPy is loaded only once a trip has an order to optimize
+    from route_optimizer import optimize_route
+    return optimize_route(cities, objective=objective).cities
+
+
+def dispatch_cities(state, fallback, route_objective="distance"):
+    """
+    Conditional edge: one Send to "plan_city" per city when the request names two or
+    more known cities, otherwise the single-loop `fallback` node. The cities are planned
+    and merged in the order given by `order_cities`.
+    """
+    cities = extract_cities(state["user_message"])
+    if len(cities) < 2:
+        return fallback
+    cities = order_cities(cities, route_objective)
+    return [Send("plan_city", CityTask(index=i, city=city, user_message=state["user_message"])) for i, city in enumerate(cities)]
+
+
+def city_planner(llm, tools, timeout=None, raise_errors=False, max_attempts=3):
+    """
+    The map step: a node planning one city with its own ReAct agent.
+
+    Args:
+        llm: Chat model that supports tool calling
+        tools (list): Tools taking a city, e.g. weather forecast and attractions search
+        timeout (float, optional): Seconds after which the city is reported as failed
+        raise_errors (bool): Raise errors other than timeouts instead of reporting the city
+            as failed, for checkpointed runs where a retry re-plans only the failed cities
+        max_attempts (int): With raise_errors, the attempt at which the city is reported as
+            failed after all; earlier ones are read from config["configurable"][CITY_ATTEMPTS]
+    """
+    agent = create_react_agent(llm, tools=tools)
+
+    async def plan_city(task: CityTask, config):
+        prompt = CITY_PROMPT.format(city=task["city"], request=task["user_message"])
+        limit, deadline = timeout, current_deadline()
+        if deadline is not None:
+            # Keep one LLM step for the merge, unless that leaves the city no time at all:
+            # then the merge joins the plans without the LLM
+            left = deadline.remaining() - step_seconds()
+            if left <= 0:
+                left = deadline.remaining()
+            if left <= 0:
+                DEADLINE_TRIGGERED.inc("city_skipped")
+                return {"city_plans": [CityPlan(index=task["index"], city=task["city"], plan=None, error=NO_TIME_LEFT)]}
+            limit = left if limit is None else min(limit, left)
+        try:
+            result = await asyncio.wait_for(agent.ainvoke({"messages": [HumanMessage(content=prompt)]}, config), limit)
+            plan = CityPlan(index=task["index"], city=task["city"], plan=final_text(result["messages"]), error=None)
+        except LimiterRejected:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning("Planning %s timed out after %.1fs", task["city"], limit)
+            error = f"timed out after {limit:.0f}s"
+            if limit != timeout:
+                DEADLINE_TRIGGERED.inc("city_stopped")
+                error = f"{NO_TIME_LEFT}, stopped after {limit:.0f}s"
+            plan = CityPlan(index=task["index"], city=task["city"], plan=None, error=error)
+        except Exception as e:
+            logger.error("Planning %s failed: %s", task["city"], e)
+            attempt = config.get("configurable", {}).get(CITY_ATTEMPTS, {}).get(task["city"], 0) + 1
+            if raise_errors and attempt < max_attempts:
+                raise CityPlanningFailed(task["city"], attempt, e) from e
+            plan = CityPlan(index=task["index"], city=task["city"], plan=None, error=str(e))
+        return {"city_plans": [plan]}
+
+    return plan_city
+
+
+def combine_city_plans(llm):
+    """
+    The reduce step: one itinerary from the city plans, in their planned order.
+    If the LLM call fails the plans are joined as they are. When the request deadline left
+    no city any time, it raises DeadlineExceeded rather than answer without a plan.
+    """
+
+    async def combine(state, config):
+        plans = sorted(state["city_plans"], key=lambda plan: plan["index"])
+        sections = [
+            f"## {plan['city']}\n{plan['plan']}" if plan["plan"] else f"## {plan['city']}\nCould not be planned: {plan['error']}"
+            for plan in plans
+        ]
+        itinerary = "\n\n".join(sections)
+        if all(plan["error"] and plan["error"].startswith(NO_TIME_LEFT) for plan in plans):
+            raise DeadlineExceeded("There was not enough time to plan any city of this itinerary")
+        deadline = current_deadline()
+        if deadline is not None and deadline.short(step_seconds()):
+            DEADLINE_TRIGGERED.inc("merge_skipped")
+        elif any(plan["plan"] for plan in plans):
+            try:
+                response = await llm.ainvoke([
+                    SystemMessage(content=COMBINE_PROMPT),
+                    HumanMessage(content=f"Trip request: {state['user_message']}\n\n{itinerary}"),
+                ], config)
+                itinerary = final_text([response]) or itinerary
+            except LimiterRejected:
+                raise
+            except Exception as e:
+                logger.error("Combining the city plans failed, returning them as they are: %s", e)
+        return {
+            "itinerary": itinerary,
+            "cities": [plan["city"] for plan in plans],
+            "messages": [*state.get("messages", []), HumanMessage(content=state["user_message"]), AIMessage(content=itinerary)],
+        }
+
+    return combine
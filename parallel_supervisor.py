@@ -0,0 +1,165 @@
+"""
+Supervisor graph that fans out to the flight and hotel agents in parallel.
+
+The notebook supervisor (2_multi_agent_langGraph) routes one hop at a time: a request
+like "cancel my flight and my hotel" costs a supervisor LLM call to pick the flight
+agent, another to pick the hotel agent and a third to finish, with the agents
+running one after the other. Here the supervisor plans every independent sub-task
+up front, dispatches them together with LangGraph's `Send`, merges the agent results
+in a reducer and makes a single final decision:
+
+    START -> plan --Send--> flight_agent --\\
+                  \\-Send--> hotel_agent  ---> decide -> END
+
+Planning is keyword based when the request names its domains, which needs no LLM
+call, and falls back to a structured-output LLM call otherwise.
+"""
+import re
+from typing import Annotated, List, Literal, TypedDict
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+from langgraph.types import Send
+from pydantic import BaseModel, Field
+
+from message_utils import final_text, latest_user_request
+
+AGENT_KEYWORDS = {
+    "flight_agent": re.compile(r"\b(flights?|fly|flying|plane|airline|airport|departure|boarding)\b", re.IGNORECASE),
+    "hotel_agent": re.compile(r"\b(hotels?|rooms?|stay|check[\s-]?in|check[\s-]?out|accommodation|lodging)\b", re.IGNORECASE),
+}
+AGENT_DOMAINS = {"flight_agent": "flight", "hotel_agent": "hotel"}
+
+DECIDE_PROMPT = (
+    "You are the supervisor of a travel assistant. The flight and hotel agents have handled "
+    "their parts of the user's request; their results are below. Reply to the user with one "
+    "combined answer. Do not repeat work the agents have finished."
+)
+
+
+class SubTask(TypedDict):
+    agent: str
+    request: str
+
+
+class AgentResult(TypedDict):
+    agent: str
+    request: str
+    output: str
+
+
+def merge_results(existing, new):
+    """
+    Reducer for the agents' results: parallel agents append, and None starts a new turn.
+    """
+    if new is None:
+        return []
+    return (existing or []) + new
+
+
+class ParallelSupervisorState(TypedDict):
+    messages: Annotated[list, add_messages]
+    tasks: List[SubTask]
+    results: Annotated[List[AgentResult], merge_results]
+
+
+class WorkerState(TypedDict):
+    task: SubTask
+
+
+class SupervisorPlan(BaseModel):
+    """
+    Agents that have to act on the user's request.
+    """
+
+    agents: List[Literal["flight_agent", "hotel_agent"]] = Field(
+        description="Every agent needed: flight_agent for flights, hotel_agent for hotels; empty if neither"
+    )
+
+
+def keyword_plan(message):
+    """
+    The agents a request clearly needs from its wording, e.g. "cancel my flight and my hotel"
+    -> ["flight_agent", "hotel_agent"]. Empty when no domain is mentioned.
+    """
+    return [agent for agent, pattern in AGENT_KEYWORDS.items() if pattern.search(message)]
+
+
+def sub_task(agent, message, agents):
+    """
+    The request an agent gets: the user's message, narrowed to the agent's domain when
+    other agents work on the rest of it.
+    """
+    if len(agents) == 1:
+        return SubTask(agent=agent, request=message)
+    others = " and ".join(AGENT_DOMAINS[other] for other in agents if other != agent)
+    return SubTask(
+        agent=agent,
+        request=f"{message}\n\nOnly handle the {AGENT_DOMAINS[agent]} part of this request; the {others} part is handled separately.",
+    )
+
+
+def build_parallel_supervisor(llm, flight_agent, hotel_agent, checkpointer=None):
+    """
+    Build the fan-out supervisor graph.
+
+    Args:
+        llm: Chat model for the supervisor's planning fallback and final decision
+        flight_agent: Runnable taking {"messages": [...]}, e.g. the notebook's create_react_agent graph
+        hotel_agent: Runnable taking {"messages": [...]}, e.g. the notebook's hotel_graph_compiled
+        checkpointer (optional): Checkpointer for turn-by-turn memory
+    Returns:
+        The compiled graph; invoke it with {"messages": [("user", "...")]}
+    """
+    agents = {"flight_agent": flight_agent, "hotel_agent": hotel_agent}
+    planner = llm.with_structured_output(SupervisorPlan)
+
+    def plan(state: ParallelSupervisorState):
+        message = latest_user_request(state["messages"])
+        selected = keyword_plan(message)
+        if not selected:
+            selected = list(dict.fromkeys(planner.invoke(state["messages"]).agents))
+        return {"tasks": [sub_task(agent, message, selected) for agent in selected], "results": None}
+
+    def dispatch(state: ParallelSupervisorState):
+        if not state["tasks"]:
+            return "decide"
+        return [Send(task["agent"], {"task": task}) for task in state["tasks"]]
+
+    def make_worker(name):
+        agent = agents[name]
+
+        def worker(state: WorkerState, config):
+            task = state["task"]
+            # Each agent keeps its own scratchpad; only its final answer goes back to the supervisor
+            result = agent.invoke({"messages": [HumanMessage(content=task["request"])]}, config)
+            output = final_text(result["messages"])
+            return {
+                "results": [AgentResult(agent=name, request=task["request"], output=output)],
+                "messages": [HumanMessage(content=output, name=name)],
+            }
+
+        return worker
+
+    def decide(state: ParallelSupervisorState):
+        results = state.get("results") or []
+        if not results:
+            return {"messages": [AIMessage(content="I can help with flight and hotel bookings. What would you like to do?")]}
+        report = "\n\n".join(f"{result['agent']}:\n{result['output']}" for result in results)
+        response = llm.invoke([
+            SystemMessage(content=DECIDE_PROMPT),
+            HumanMessage(content=f"User request: {latest_user_request(state['messages'])}\n\nAgent results:\n{report}"),
+        ])
+        return {"messages": [AIMessage(content=final_text([response]), name="supervisor")]}
+
+    workflow = StateGraph(ParallelSupervisorState)
+    workflow.add_node("plan", plan)
+    for name in agents:
+        workflow.add_node(name, make_worker(name))
+        workflow.add_edge(name, "decide")
+    workflow.add_node("decide", decide)
+    workflow.add_edge(START, "plan")
+    workflow.add_conditional_edges("plan", dispatch, [*agents, "decide"])
+    workflow.add_edge("decide", END)
+    return workflow.compile(checkpointer=checkpointer)
@@ -0,0 +1,136 @@
+"""
+Single-flight deduplication of identical in-flight requests.
+
+When several coroutines ask for the same key while a call for it is still running,
+only the first one (the leader) runs the call; the others wait for its outcome.
+Results and exceptions are delivered to every waiter, and the key is released as
+soon as the call finishes, so later requests run a fresh call.
+
+`SingleFlight.do_with_updates` also shares the progress of the call: the call gets an
+`on_update` callback and every waiter's own callback receives each update, including
+those sent before it joined.
+"""
+import asyncio
+import re
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_message(message):
+    """
+    Coalescing key of a user message: case-folded, with runs of whitespace collapsed.
+    """
+    return _WHITESPACE.sub(" ", message).strip().casefold()
+
+
+class _Fanout:
+    """
+    Updates of one shared call, passed on to the callbacks of its waiters.
+    """
+
+    def __init__(self):
+        self.updates = []
+        self.listeners = []
+
+    def __call__(self, *update):
+        self.updates.append(update)
+        for listener in list(self.listeners):
+            listener(*update)
+
+    def subscribe(self, listener):
+        for update in self.updates:
+            listener(*update)
+        self.listeners.append(listener)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one execution.
+
+    Args:
+        timeout (float, optional): Seconds a key's execution may run before every
+            waiter gets an asyncio.TimeoutError. None waits indefinitely.
+    """
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self._inflight = {}
+        self._fanouts = {}
+        self.calls = 0
+        self.executions = 0
+
+    def __len__(self):
+        return len(self._inflight)
+
+    async def do(self, key, fn, *args, timeout=None, **kwargs):
+        """
+        Await `fn(*args, **kwargs)`, sharing the execution with concurrent calls for `key`.
+
+        Args:
+            key (Hashable): Requests with equal keys share one execution
+            fn (Callable): Coroutine function run by the leader
+            timeout (float, optional): Overrides the instance timeout for this key's execution
+        Returns:
+            tuple: (result, shared) where shared is True when another caller ran the execution
+        Raises:
+            asyncio.TimeoutError: If the execution exceeded the timeout
+            Exception: Whatever the shared execution raised
+        """
+        return await self._join(key, lambda: fn(*args, **kwargs), timeout)
+
+    async def do_with_updates(self, key, fn, *args, on_update=None, timeout=None, **kwargs):
+        """
+        Like `do`, for a call reporting its progress: the leader runs
+        `fn(*args, on_update=..., **kwargs)` and every update it sends is passed to the
+        `on_update` of each waiter, those sent before the waiter joined included.
+        A key should be used with either `do` or `do_with_updates`, not both.
+
+        Args:
+            key (Hashable): Requests with equal keys share one execution
+            fn (Callable): Coroutine function run by the leader, taking an `on_update` keyword
+            on_update (Callable, optional): Called with the arguments of every update
+            timeout (float, optional): Overrides the instance timeout for this key's execution
+        Returns:
+            tuple: (result, shared) where shared is True when another caller ran the execution
+        """
+        fanout = self._fanouts.get(key)
+        if fanout is None:
+            fanout = _Fanout()
+        if on_update is not None:
+            fanout.subscribe(on_update)
+        try:
+            return await self._join(key, lambda: fn(*args, on_update=fanout, **kwargs), timeout, fanout)
+        finally:
+            if on_update is not None:
+                fanout.listeners.remove(on_update)
+
+    async def _join(self, key, start, timeout, fanout=None):
+        self.calls += 1
+        task = self._inflight.get(key)
+        shared = task is not None
+        if not shared:
+            self.executions += 1
+            limit = self.timeout if timeout is None else timeout
+            task = asyncio.ensure_future(asyncio.wait_for(start(), limit))
+            self._inflight[key] = task
+            if fanout is not None:
+                self._fanouts[key] = fanout
+            task.add_done_callback(lambda done: self._release(key, done))
+        # A waiter that disconnects must not cancel the execution the others are waiting for
+        return await asyncio.shield(task), shared
+
+    def _release(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            self._fanouts.pop(key, None)
+        if not task.cancelled():
+            # Mark the exception as retrieved when every waiter went away before it was raised
+            task.exception()
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.calls - self.executions,
+            "inflight": len(self._inflight),
+        }
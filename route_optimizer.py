@@ -0,0 +1,199 @@
+"""
+Visit order for multi-city trips over the RouteTable cost matrices.
+
+Given the cities of a trip, `optimize_route` finds the order that minimizes the total
+distance, flight duration or price, starting from a fixed city and optionally returning
+to it:
+
+- up to `EXACT_MAX_STOPS` stops it is solved exactly with Held-Karp dynamic
+  programming, O(2^n * n^2), vectorized over the last city of each subset;
+- above that, nearest neighbor builds a route that 2-opt then improves until no
+  segment reversal shortens it.
+
+`optimize_trip_route` exposes it as a LangChain tool so agents ask for an order
+instead of guessing one.
+"""
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+from langchain_core.tools import tool
+
+from route_table import get_route_table
+
+OBJECTIVES = {"distance": "distance", "duration": "duration_minutes", "price": "price"}
+EXACT_MAX_STOPS = 12
+
+
+class Route(NamedTuple):
+    cities: List[str]
+    objective: str
+    total: float
+    method: str
+
+
+def route_cost(cost, order, round_trip=False):
+    """
+    Total cost of visiting `order` (matrix indices), including the way back if round_trip.
+    """
+    order = list(order)
+    if round_trip:
+        order.append(order[0])
+    return float(cost[order[:-1], order[1:]].sum()) if len(order) > 1 else 0.0
+
+
+def held_karp(cost, round_trip=False):
+    """
+    Optimal order of all nodes of `cost`, starting at node 0.
+
+    Args:
+        cost (np.ndarray): N x N cost matrix
+        round_trip (bool): Whether the route ends back at node 0
+    Returns:
+        list: Node indices, starting with 0
+    """
+    n = len(cost)
+    if n <= 2:
+        return list(range(n))
+    m = n - 1  # stops other than the start; bit k of a mask is node k + 1
+    stops = cost[1:, 1:]
+    best = np.full((1 << m, m), np.inf)
+    parent = np.full((1 << m, m), -1, dtype=np.int64)
+    best[1 << np.arange(m), np.arange(m)] = cost[0, 1:]
+    bits = 1 << np.arange(m)
+    columns = np.arange(m)
+    for mask in range(1, 1 << m):
+        row = best[mask]
+        if not np.isfinite(row).any():
+            continue
+        # Extend every route ending at j in mask by every k outside it, in one step
+        candidates = row[:, None] + stops
+        previous = np.argmin(candidates, axis=0)
+        extended = candidates[previous, columns]
+        targets = mask | bits
+        better = ((mask & bits) == 0) & (extended < best[targets, columns])
+        best[targets[better], columns[better]] = extended[better]
+        parent[targets[better], columns[better]] = previous[better]
+    full = (1 << m) - 1
+    last_costs = best[full] + (cost[1:, 0] if round_trip else 0)
+    last = int(np.argmin(last_costs))
+    order, mask = [], full
+    while last >= 0:
+        order.append(last + 1)
+        last, mask = int(parent[mask, last]), mask & ~(1 << last)
+    return [0] + order[::-1]
+
+
+def nearest_neighbor(cost):
+    """
+    Greedy order starting at node 0: always go to the cheapest unvisited node.
+    """
+    n = len(cost)
+    order, visited = [0], np.zeros(n, dtype=bool)
+    visited[0] = True
+    for _ in range(n - 1):
+        costs = np.where(visited, np.inf, cost[order[-1]])
+        order.append(int(np.argmin(costs)))
+        visited[order[-1]] = True
+    return order
+
+
+def two_opt(cost, order, round_trip=False):
+    """
+    Improve an order by reversing segments while that lowers its cost. Node 0 stays first.
+    Assumes a symmetric cost matrix, as the RouteTable matrices are.
+    """
+    order = list(order)
+    n = len(order)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 1):
+            path = np.array(order + [order[0]] if round_trip else order)
+            j = np.arange(i + 1, n)
+            before, first, last = path[i - 1], path[i], path[j]
+            # Reversing order[i..j] replaces edges (i-1, i) and (j, j+1) with (i-1, j) and (i, j+1)
+            delta = cost[before, last] - cost[before, first]
+            has_next = j + 1 < len(path)
+            after = path[np.minimum(j + 1, len(path) - 1)]
+            delta = delta + np.where(has_next, cost[first, after] - cost[last, after], 0.0)
+            k = int(np.argmin(delta))
+            if delta[k] < -1e-9:
+                order[i:j[k] + 1] = order[i:j[k] + 1][::-1]
+                improved = True
+    return order
+
+
+def optimize_route(cities, objective="distance", start=None, round_trip=False, table=None):
+    """
+    Best visit order of the given cities.
+
+    Args:
+        cities (list): City names, as in the route table
+        objective (str): "distance" (km), "duration" (flight minutes) or "price" ($)
+        start (str, optional): City the trip starts from; defaults to the first city
+        round_trip (bool): Whether the trip ends back at the start
+        table (RouteTable, optional): Defaults to get_route_table()
+    Returns:
+        Route: The ordered cities, the total of the objective and the method used
+    Raises:
+        KeyError: If a city is not in the route table
+        ValueError: If the objective is unknown
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective!r}, expected one of {sorted(OBJECTIVES)}")
+    table = table or get_route_table()
+    cities = list(dict.fromkeys(cities))
+    start = start or cities[0]
+    cities = [start] + [city for city in cities if city != start]
+    missing = [city for city in cities if city not in table]
+    if missing:
+        raise KeyError(f"Unknown cities: {', '.join(missing)}")
+
+    indices = np.array([table.index[city] for city in cities])
+    cost = getattr(table, OBJECTIVES[objective])[np.ix_(indices, indices)].astype(np.float64)
+    if len(cities) - 1 <= EXACT_MAX_STOPS:
+        order, method = held_karp(cost, round_trip), "held-karp"
+    else:
+        order, method = two_opt(cost, nearest_neighbor(cost), round_trip), "nearest-neighbor+2-opt"
+    return Route([cities[i] for i in order], objective, route_cost(cost, order, round_trip), method)
+
+
+@tool
+def optimize_trip_route(cities: List[str], objective: str = "distance", start_city: Optional[str] = None, round_trip: bool = False) -> str:
+    """
+    Find the best order to visit several cities. Use this instead of guessing the order of a multi-city trip.
+
+    Args:
+        cities (List[str]): The cities of the trip
+        objective (str): What to minimize: "distance", "duration" (flight time) or "price"
+        start_city (str, optional): Where the trip starts; defaults to the first city
+        round_trip (bool): Whether the trip returns to the start city
+
+    Returns:
+        str: The cities in the best order with each leg's distance, flight time and price, and the totals
+    """
+    table = get_route_table()
+    names = {city.lower(): city for city in table.cities}
+    unknown = [city for city in [*cities, start_city or ""] if city and city.strip().lower() not in names]
+    if unknown:
+        return f"No coordinates for: {', '.join(unknown)}. Known cities: {', '.join(table.cities)}"
+    try:
+        route = optimize_route(
+            [names[city.strip().lower()] for city in cities],
+            objective=objective,
+            start=names[start_city.strip().lower()] if start_city else None,
+            round_trip=round_trip,
+            table=table,
+        )
+    except ValueError as e:
+        return str(e)
+
+    stops = route.cities + ([route.cities[0]] if round_trip else [])
+    lines = [f"Best order by {objective}: {' -> '.join(stops)}"]
+    totals = np.zeros(3)
+    for origin, destination in zip(stops, stops[1:]):
+        distance, minutes, price = table.lookup(origin, destination)
+        totals += (distance, minutes, price)
+        lines.append(f"- {origin} -> {destination}: {distance:,.0f} km, {minutes // 60}h{minutes % 60:02d}m, ${price:,.2f}")
+    lines.append(f"Total: {totals[0]:,.0f} km, {int(totals[1]) // 60}h{int(totals[1]) % 60:02d}m of flights, ${totals[2]:,.2f}")
+    return "\n".join(lines)
@@ -0,0 +1,117 @@
+"""
+Precomputed distance, flight duration and price between every pair of cities.
+
+The formulas are the same as calculate_distance, calculate_flight_duration and
+calculate_flight_price in utils.py, evaluated once for all city pairs so lookups
+are O(1) instead of recomputing the trigonometry per booking or per search.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from city_coordinates import CITY_COORDINATES
+
+EARTH_RADIUS_KM = 6371
+# Assume average speed of 800 km/h and add 30 minutes for takeoff and landing
+AVERAGE_SPEED_KMH = 800
+TAKEOFF_LANDING_MINUTES = 30
+# Base price of $50 plus $0.1 per km
+BASE_PRICE = 50
+PRICE_PER_KM = 0.1
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    Vectorized great-circle distance in kilometers.
+
+    Accepts scalars or NumPy arrays (broadcast against each other) in degrees,
+    e.g. haversine(lats[:, None], lons[:, None], lats[None, :], lons[None, :]).
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=np.float64)) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def haversine_matrix(coords):
+    """
+    Great-circle distances between every pair of coordinates.
+
+    Args:
+        coords (array-like): N x 2 array of (latitude, longitude) in degrees
+    Returns:
+        np.ndarray: N x N matrix of distances in kilometers
+    """
+    lat, lon = np.asarray(coords, dtype=np.float64).T
+    return haversine(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+
+
+class RouteTable:
+    """
+    N x N distance (km), flight duration (minutes) and price ($) matrices for a set of cities.
+
+    Args:
+        cities (dict): City name -> (latitude, longitude), e.g. CITY_COORDINATES
+    """
+
+    def __init__(self, cities):
+        self.cities = list(cities.keys())
+        self.index = {city: i for i, city in enumerate(self.cities)}
+        self.coords = np.array(list(cities.values()), dtype=np.float64)
+
+        self.distance = haversine_matrix(self.coords)
+        self.duration_minutes = (self.distance / AVERAGE_SPEED_KMH * 60).astype(np.int64) + TAKEOFF_LANDING_MINUTES
+        self.price = np.round(BASE_PRICE + self.distance * PRICE_PER_KM, 2)
+
+        # Plain nested lists make scalar lookups cheaper than NumPy item access
+        self._distance_rows = self.distance.tolist()
+        self._duration_rows = self.duration_minutes.tolist()
+        self._price_rows = self.price.tolist()
+
+    def __len__(self):
+        return len(self.cities)
+
+    def __contains__(self, city):
+        return city in self.index
+
+    def lookup(self, origin, destination):
+        """
+        Distance, duration and price of a single route.
+
+        Returns:
+            tuple: (distance in km, duration in minutes, price)
+        Raises:
+            KeyError: If either city is not in the table
+        """
+        i = self.index[origin]
+        j = self.index[destination]
+        return self._distance_rows[i][j], self._duration_rows[i][j], self._price_rows[i][j]
+
+    def lookup_indices(self, origin_idx, destination_idx):
+        """
+        Vectorized lookup for arrays of city indices.
+
+        Returns:
+            tuple: (distances, durations in minutes, prices) as NumPy arrays
+        """
+        return (
+            self.distance[origin_idx, destination_idx],
+            self.duration_minutes[origin_idx, destination_idx],
+            self.price[origin_idx, destination_idx],
+        )
+
+    def distances_from(self, lat, lon):
+        """
+        Distances from ad-hoc coordinates to every city in the table.
+        """
+        return haversine(lat, lon, self.coords[:, 0], self.coords[:, 1])
+
+    def nearest_city(self, lat, lon):
+        return self.cities[int(np.argmin(self.distances_from(lat, lon)))]
+
+
+@lru_cache(maxsize=1)
+def get_route_table():
+    """
+    The RouteTable for CITY_COORDINATES, built once per process.
+    """
+    return RouteTable(CITY_COORDINATES)
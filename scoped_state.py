@@ -0,0 +1,118 @@
+"""
+Scoped state channels for supervisor / sub-agent graphs.
+
+In the notebook's supervisor graph, `agent_node` invokes each sub-agent with the whole
+shared state, so every worker prompt carries the entire multi-agent conversation,
+including the other agents' tool calls, and the supervisor sees all of it too. Prompts
+therefore grow with every turn.
+
+Here the state is split into channels:
+
+- `messages` is the supervisor channel: user requests, supervisor decisions and one
+  compact summary per agent reply;
+- `agent_history` keeps each agent's own turns (the requests it got and its answers),
+  capped at `MAX_AGENT_HISTORY` messages per agent.
+
+`scoped_agent_node` gives a sub-agent only the latest user request plus its own recent
+turns and returns a summary to the supervisor channel. `scoped_supervisor` shows the
+supervisor only the last few user turns of its channel. Prompt sizes then stay flat as
+the conversation grows.
+
+Sub-agents should be compiled without their own checkpointer; their memory is the
+`agent_history` channel, which the parent graph's checkpointer persists.
+"""
+import re
+from typing import Annotated, Dict, TypedDict
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph.message import add_messages
+
+from message_utils import final_text, latest_user_request
+
+MAX_AGENT_HISTORY = 12
+SUMMARY_CHARS = 600
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def merge_agent_history(existing, new):
+    """
+    Reducer for agent_history: append each agent's new messages, keeping the most recent ones.
+    """
+    merged = dict(existing or {})
+    for agent, messages in (new or {}).items():
+        merged[agent] = (merged.get(agent, []) + list(messages))[-MAX_AGENT_HISTORY:]
+    return merged
+
+
+class ScopedSupervisorState(TypedDict):
+    messages: Annotated[list, add_messages]
+    agent_history: Annotated[Dict[str, list], merge_agent_history]
+    next: str
+
+
+def compact_summary(text, limit=SUMMARY_CHARS):
+    """
+    The agent's answer with whitespace collapsed, cut at a sentence or word boundary
+    near `limit` characters. The FINISHED sentinel is kept for the supervisor.
+    """
+    text = _WHITESPACE.sub(" ", text).strip()
+    finished = text.endswith("FINISHED")
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    boundary = max(cut.rfind(". "), cut.rfind("\n"))
+    cut = cut[: boundary + 1] if boundary > limit // 2 else cut.rsplit(" ", 1)[0] + " ..."
+    return f"{cut} FINISHED" if finished else cut
+
+
+def scoped_agent_node(agent, name, history_turns=3, summary_chars=SUMMARY_CHARS):
+    """
+    Wrap a sub-agent as a node that sees only its own context.
+
+    Args:
+        agent: Runnable taking {"messages": [...]}, e.g. a create_react_agent graph
+        name (str): Agent name, used for its history channel and its summary message
+        history_turns (int): The agent's own previous request/answer pairs to include
+        summary_chars (int): Maximum length of the summary sent to the supervisor
+    Returns:
+        Callable: A graph node for ScopedSupervisorState
+    """
+
+    def node(state, config=None):
+        request = HumanMessage(content=latest_user_request(state["messages"]))
+        history = (state.get("agent_history") or {}).get(name, [])[-2 * history_turns:]
+        result = agent.invoke({"messages": [*history, request]}, config)
+        answer = final_text(result["messages"])
+        return {
+            "messages": [HumanMessage(content=compact_summary(answer, summary_chars), name=name)],
+            "agent_history": {name: [request, AIMessage(content=answer)]},
+        }
+
+    node.__name__ = name
+    return node
+
+
+def supervisor_view(messages, max_turns=3):
+    """
+    The supervisor channel from the start of the `max_turns`-th most recent user turn.
+    """
+    starts = [
+        i for i, message in enumerate(messages)
+        if (isinstance(message, HumanMessage) and not message.name) or (isinstance(message, tuple) and message[0] == "user")
+    ]
+    if len(starts) <= max_turns:
+        return list(messages)
+    return list(messages[starts[-max_turns]:])
+
+
+def scoped_supervisor(supervisor, max_turns=3):
+    """
+    Wrap a supervisor node (e.g. the notebook's supervisor_agent or a TieredRouter) so it
+    only sees the last `max_turns` user turns of the supervisor channel.
+    """
+
+    def node(state):
+        return supervisor({**state, "messages": supervisor_view(state["messages"], max_turns)})
+
+    return node
@@ -0,0 +1,297 @@
+"""
+Tiered routing for the multi-agent supervisor's `routeResponse` decision.
+
+The notebook supervisor makes a structured-output LLM call on every hop, even when
+the answer is obvious. `TieredRouter` wraps that supervisor node and tries cheaper
+tiers first:
+
+1. rules: FINISH once every agent the request names has replied with the FINISHED
+   sentinel, and keyword intent ("flight", "hotel") for the first hop;
+2. a small TF-IDF + logistic regression classifier trained on logged routes,
+   used when its probability clears a threshold;
+3. the LLM supervisor itself, whose decisions are appended to a route log so the
+   classifier can be retrained on them.
+
+The classifier is implemented with NumPy so it needs no extra dependency. Train it
+from a route log with:
+
+    python supervisor_router.py --log data/supervisor_routes.jsonl --output data/supervisor_router.json
+"""
+import argparse
+import json
+import math
+import re
+import time
+from collections import Counter
+
+import numpy as np
+from langchain_core.messages import BaseMessage, HumanMessage
+
+from parallel_supervisor import AGENT_KEYWORDS
+
+MEMBERS = ("flight_agent", "hotel_agent")
+OPTIONS = ("FINISH",) + MEMBERS
+FINISHED_SENTINEL = "FINISHED"
+
+_TOKEN = re.compile(r"[a-z0-9_]+")
+
+
+def _role_content_name(message):
+    if isinstance(message, BaseMessage):
+        role = "user" if isinstance(message, HumanMessage) and not message.name else message.type
+        content = message.content
+        if isinstance(content, list):
+            content = " ".join(block.get("text", "") for block in content if isinstance(block, dict))
+        return role, content, message.name
+    # ("user", "...") tuples as passed to graph.invoke
+    return message[0], message[1], None
+
+
+def hop_context(messages):
+    """
+    What a routing decision depends on: the latest user request and the agents that
+    have replied to it since, in order.
+
+    Returns:
+        tuple: (request text, list of (agent name, reply text))
+    """
+    request, replies = "", []
+    for message in messages:
+        role, content, name = _role_content_name(message)
+        if role in ("user", "human") and name is None:
+            request, replies = content, []
+        elif name in MEMBERS:
+            replies.append((name, content))
+    return request, replies
+
+
+def hop_text(messages):
+    """
+    Classifier input for a hop: the request words plus tokens for the agents that have
+    replied and whether the last reply was FINISHED.
+    """
+    request, replies = hop_context(messages)
+    progress = [f"__replied_{name}" for name, _ in replies]
+    if replies:
+        progress.append(f"__last_{replies[-1][0]}")
+        if FINISHED_SENTINEL in replies[-1][1]:
+            progress.append("__finished")
+    else:
+        progress.append("__first_hop")
+    return f"{request} {' '.join(progress)}"
+
+
+def mentioned_agents(request):
+    """
+    Agents named by the request's keywords, in the order they are mentioned.
+    """
+    found = []
+    for agent, pattern in AGENT_KEYWORDS.items():
+        match = pattern.search(request)
+        if match:
+            found.append((match.start(), agent))
+    return [agent for _, agent in sorted(found)]
+
+
+def rule_route(messages):
+    """
+    Tier 1: a decision from deterministic rules, or None when the rules do not apply.
+    """
+    request, replies = hop_context(messages)
+    needed = mentioned_agents(request)
+    if not needed:
+        return None
+    replied = {name for name, _ in replies}
+    if replies and FINISHED_SENTINEL not in replies[-1][1]:
+        # The agent stopped without finishing, e.g. to ask for missing details
+        return None
+    remaining = [agent for agent in needed if agent not in replied]
+    return remaining[0] if remaining else "FINISH"
+
+
+# ---- Tier 2: TF-IDF + logistic regression ----
+
+
+def _tokens(text):
+    words = _TOKEN.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class RouteClassifier:
+    """
+    Multinomial logistic regression over L2-normalized TF-IDF unigrams and bigrams.
+
+    Args:
+        min_df (int): Minimum number of training texts a term must appear in
+        l2 (float): L2 regularization strength
+    """
+
+    def __init__(self, min_df=2, l2=1e-3):
+        self.min_df = min_df
+        self.l2 = l2
+        self.vocabulary = {}
+        self.idf = np.zeros(0)
+        self.labels = list(OPTIONS)
+        self.weights = np.zeros((0, len(self.labels)))
+        self.bias = np.zeros(len(self.labels))
+
+    def _matrix(self, texts):
+        rows = np.zeros((len(texts), len(self.vocabulary)))
+        for i, text in enumerate(texts):
+            for term, count in Counter(_tokens(text)).items():
+                j = self.vocabulary.get(term)
+                if j is not None:
+                    rows[i, j] = count
+        rows *= self.idf
+        norms = np.linalg.norm(rows, axis=1, keepdims=True)
+        return rows / np.where(norms == 0, 1, norms)
+
+    def fit(self, texts, labels, epochs=300, learning_rate=2.0):
+        """
+        Fit the vocabulary, IDF weights and regression weights with full-batch gradient descent.
+        """
+        document_frequency = Counter(term for text in texts for term in set(_tokens(text)))
+        terms = sorted(term for term, df in document_frequency.items() if df >= self.min_df)
+        self.vocabulary = {term: j for j, term in enumerate(terms)}
+        self.idf = np.array([math.log((1 + len(texts)) / (1 + document_frequency[t])) + 1 for t in terms])
+
+        x = self._matrix(texts)
+        y = np.zeros((len(texts), len(self.labels)))
+        y[np.arange(len(texts)), [self.labels.index(label) for label in labels]] = 1
+        self.weights = np.zeros((x.shape[1], len(self.labels)))
+        self.bias = np.zeros(len(self.labels))
+        for _ in range(epochs):
+            error = self._softmax(x @ self.weights + self.bias) - y
+            self.weights -= learning_rate * (x.T @ error / len(texts) + self.l2 * self.weights)
+            self.bias -= learning_rate * error.mean(axis=0)
+        return self
+
+    @staticmethod
+    def _softmax(z):
+        z = np.exp(z - z.max(axis=1, keepdims=True))
+        return z / z.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, texts):
+        return self._softmax(self._matrix(texts) @ self.weights + self.bias)
+
+    def predict(self, text):
+        """
+        Returns:
+            tuple: (label, probability)
+        """
+        probabilities = self.predict_proba([text])[0]
+        best = int(np.argmax(probabilities))
+        return self.labels[best], float(probabilities[best])
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({
+                "min_df": self.min_df, "l2": self.l2, "labels": self.labels, "terms": list(self.vocabulary),
+                "idf": self.idf.tolist(), "weights": self.weights.tolist(), "bias": self.bias.tolist(),
+            }, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        classifier = cls(data["min_df"], data["l2"])
+        classifier.labels = data["labels"]
+        classifier.vocabulary = {term: j for j, term in enumerate(data["terms"])}
+        classifier.idf = np.array(data["idf"])
+        classifier.weights = np.array(data["weights"]).reshape(len(data["terms"]), len(data["labels"]))
+        classifier.bias = np.array(data["bias"])
+        return classifier
+
+
+def read_route_log(path):
+    """
+    (hop text, next) pairs from a JSONL route log.
+    """
+    texts, labels = [], []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                texts.append(entry["text"])
+                labels.append(entry["next"])
+    return texts, labels
+
+
+# ---- The tiered router ----
+
+
+class TieredRouter:
+    """
+    Drop-in replacement for the supervisor node that only calls the LLM when needed.
+
+    Args:
+        llm_supervisor (Callable): The LLM supervisor node, returning {"next": ...}
+        classifier (RouteClassifier, optional): Tier 2 classifier
+        threshold (float): Minimum classifier probability to skip the LLM
+        log_path (str, optional): JSONL file the LLM's decisions are appended to
+    """
+
+    def __init__(self, llm_supervisor, classifier=None, threshold=0.85, log_path=None):
+        self.llm_supervisor = llm_supervisor
+        self.classifier = classifier
+        self.threshold = threshold
+        self.log_path = log_path
+        self.decisions = Counter()
+        self.llm_seconds = 0.0
+
+    def route(self, state):
+        """
+        Returns:
+            tuple: (next, tier) where tier is "rules", "classifier" or "llm"
+        """
+        messages = state["messages"]
+        decision = rule_route(messages)
+        if decision is not None:
+            return decision, "rules"
+        text = hop_text(messages)
+        if self.classifier is not None:
+            decision, probability = self.classifier.predict(text)
+            if probability >= self.threshold:
+                return decision, "classifier"
+        start = time.perf_counter()
+        decision = self.llm_supervisor(state)["next"]
+        self.llm_seconds += time.perf_counter() - start
+        if self.log_path:
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps({"text": text, "next": decision}) + "\n")
+        return decision, "llm"
+
+    def __call__(self, state):
+        decision, tier = self.route(state)
+        self.decisions[tier] += 1
+        return {
+            "next": decision,
+            "messages": [HumanMessage(content=f"Supervisor decided: {decision}", name="supervisor")],
+        }
+
+    def stats(self):
+        hops = sum(self.decisions.values())
+        return {
+            "hops": hops,
+            "by_tier": dict(self.decisions),
+            "llm_skipped": (hops - self.decisions["llm"]) / hops if hops else 0.0,
+            "llm_seconds": round(self.llm_seconds, 3),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the supervisor route classifier from a route log")
+    parser.add_argument("--log", required=True, help="JSONL route log written by TieredRouter")
+    parser.add_argument("--output", default="data/supervisor_router.json", help="Where to save the classifier")
+    parser.add_argument("--min-df", type=int, default=2, help="Minimum document frequency of a term")
+    args = parser.parse_args()
+
+    texts, labels = read_route_log(args.log)
+    classifier = RouteClassifier(min_df=args.min_df).fit(texts, labels)
+    accuracy = np.mean([classifier.predict(text)[0] == label for text, label in zip(texts, labels)])
+    classifier.save(args.output)
+    print(f"Trained on {len(texts)} routes ({dict(Counter(labels))}), training accuracy {accuracy:.1%}, saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,6 @@ import pickle
 import random
 from datetime import datetime, timedelta
 from faker import Faker
-import sqlite3
 import math
 import os
 
@@ -12,11 +11,15 @@ import os
 from collections import Counter
 from langchain_core.tools import tool
 from langchain_core.runnables.config import RunnableConfig
-from langchain_aws import ChatBedrockConverse
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_aws.embeddings.bedrock import BedrockEmbeddings
 from langgraph.prebuilt import create_react_agent
-from langgraph.checkpoint.memory import MemorySaver
+from checkpointer import BoundedCheckpointSaver
+from route_table import CITY_COORDINATES
+from booking_repository import create_database
+from fake_llm import llm_from_env
+from model_router import CLAUDE_ROUTE_MODEL_ENV, CLAUDE_ROUTES, bedrock_router, configured_routes, routing_enabled
+from langchain_core.embeddings import DeterministicFakeEmbedding
 from langchain.tools.retriever import create_retriever_tool
 from langchain_community.vectorstores import FAISS
 from langchain.retrievers import ParentDocumentRetriever
@@ -57,19 +60,85 @@ def convert_message_langchain_to_ragas(lc_message):
     return rg_message
 
 
-def create_agent(enable_memory = False):
+def _ragas_block_tool_call(block):
+    # Same argument shape as convert_message_langchain_to_ragas: the first input is passed as `query`
+    tool_input = block.get('input') or {}
+    for value in tool_input.values():
+        return RGToolCall(name=block['name'], args={'query': value})
+    return RGToolCall(name=block['name'], args={})
+
+
+def _convert_message(lc_message):
+    message_type = lc_message.type
+    if message_type == 'human':
+        return RGHumanMessage(content=lc_message.content)
+    if message_type == 'ai':
+        content = lc_message.content
+        if isinstance(content, list):
+            # Single pass over the content blocks, keeping every tool_use block instead of the first one
+            text = None
+            tool_calls = []
+            for block in content:
+                if isinstance(block, str):
+                    block_type, block = 'text', {'text': block}
+                else:
+                    block_type = block.get('type')
+                if block_type == 'text':
+                    if text is None:
+                        text = block['text']
+                elif block_type == 'tool_use':
+                    tool_calls.append(_ragas_block_tool_call(block))
+            return RGAIMessage(content=text or '', tool_calls=tool_calls or None)
+        tool_calls = [RGToolCall(name=tc['name'], args=tc['args']) for tc in lc_message.tool_calls]
+        return RGAIMessage(content=content, tool_calls=tool_calls, metadata=lc_message.usage_metadata)
+    if message_type == 'tool':
+        return RGToolMessage(content=lc_message.content, metadata={"tool_name": lc_message.name, "tool_call_id": lc_message.tool_call_id})
+    return None
+
+
+def convert_messages(lc_messages):
+    """
+    Lazily convert LangChain messages to RAGAS messages.
+
+    Unlike convert_message_langchain_to_ragas, this reads message attributes directly
+    instead of calling model_dump(), keeps all tool calls of an AI message and skips
+    message types RAGAS has no equivalent for (e.g. system messages).
+
+    Args:
+        lc_messages (Iterable[BaseMessage]): LangChain messages, e.g. result["messages"] of a graph run.
+    Yields:
+        RAGAS HumanMessage, AIMessage or ToolMessage objects in the same order.
+    """
+    for lc_message in lc_messages:
+        rg_message = _convert_message(lc_message)
+        if rg_message is not None:
+            yield rg_message
+
+
+def create_agent(enable_memory = False, checkpoint_db_path = "data/agent_checkpoints.db", llm = None, embeddings_model = None):
     # ---- ⚠️ Update region for your AWS setup ⚠️ ----
     bedrock_client = boto3.client("bedrock-runtime", region_name="us-west-2")
     
     
     
-    llm = ChatBedrockConverse(
-        model="anthropic.claude-3-haiku-20240307-v1:0",
-        temperature=0,
-        max_tokens=None,
-        client=bedrock_client,
-        # other params...
-    )
+    # A custom chat model (e.g. fake_llm.FakeBedrockChatModel for offline runs) can be passed in,
+    # or selected with LLM_BACKEND=fake
+    env_fake_llm = llm_from_env()
+    if llm is None:
+        llm = env_fake_llm
+    if llm is None and routing_enabled():
+        # Claude 3 Haiku for simple requests, a larger Claude for complex ones (see model_router.py)
+        llm = bedrock_router(
+            bedrock_client, routes=configured_routes(CLAUDE_ROUTES, CLAUDE_ROUTE_MODEL_ENV), temperature=0
+        )
+    if llm is None:
+        from langchain_aws import ChatBedrockConverse
+        llm = ChatBedrockConverse(
+            model="anthropic.claude-3-haiku-20240307-v1:0",
+            temperature=0,
+            max_tokens=None,
+            client=bedrock_client,
+        )
     
     def read_travel_data(file_path: str = "data/synthetic_travel_data.csv") -> pd.DataFrame:
         """Read travel data from CSV file"""
@@ -124,9 +193,13 @@ def create_agent(enable_memory = False):
         return f"Based on your current location ({current_location}), age ({age}), and past travel data, we recommend visiting {recommended_destination}."
     
     
-    embeddings_model = BedrockEmbeddings(
-        client=bedrock_client, model_id="amazon.titan-embed-text-v1"
-    )
+    if embeddings_model is None and env_fake_llm is not None:
+        # Same dimension as amazon.titan-embed-text-v1 so the stored FAISS index can be queried
+        embeddings_model = DeterministicFakeEmbedding(size=1536)
+    if embeddings_model is None:
+        embeddings_model = BedrockEmbeddings(
+            client=bedrock_client, model_id="amazon.titan-embed-text-v1"
+        )
     
     child_splitter = RecursiveCharacterTextSplitter(
         separators=["\n", "\n\n"], chunk_size=2000, chunk_overlap=250
@@ -166,7 +239,14 @@ def create_agent(enable_memory = False):
 
     if enable_memory:
 
-        memory = MemorySaver()
+        # Bounded checkpointer: keeps the latest checkpoints of recently used threads in memory
+        # and spills idle threads to SQLite instead of growing forever like MemorySaver
+        memory = BoundedCheckpointSaver(
+            db_path=checkpoint_db_path,
+            max_checkpoints_per_thread=int(os.environ.get("AGENT_MAX_CHECKPOINTS_PER_THREAD", 10)),
+            max_threads=int(os.environ.get("AGENT_MAX_HOT_THREADS", 1000)),
+            idle_ttl_seconds=float(os.environ.get("AGENT_THREAD_IDLE_TTL_SECONDS", 3600)),
+        )
         agent = create_react_agent(llm, tools, checkpointer = memory)
 
     else:
@@ -182,53 +262,8 @@ fake = Faker()
 # Get today's date
 today = datetime.now().date()
 
-# City data with coordinates (latitude, longitude)
-city_data = {
-    "New York": (40.7128, -74.0060),
-    "Los Angeles": (34.0522, -118.2437),
-    "Chicago": (41.8781, -87.6298),
-    "Las Vegas": (36.1699, -115.1398),
-    "San Francisco": (37.7749, -122.4194),
-    "Orlando": (28.5383, -81.3792),
-    "Miami": (25.7617, -80.1918),
-    "Washington": (38.9072, -77.0369),
-    "New Orleans": (29.9511, -90.0715),
-    "Boston": (42.3601, -71.0589),
-    "Seattle": (47.6062, -122.3321),
-    "San Diego": (32.7157, -117.1611),
-    "Honolulu": (21.3069, -157.8583),
-    "Nashville": (36.1627, -86.7816),
-    "Denver": (39.7392, -104.9903),
-    "Austin": (30.2672, -97.7431),
-    "Philadelphia": (39.9526, -75.1652),
-    "Atlanta": (33.7490, -84.3880),
-    "San Antonio": (29.4241, -98.4936),
-    "Portland": (45.5155, -122.6789),
-    "Paris": (48.8566, 2.3522),
-    "London": (51.5074, -0.1278),
-    "Rome": (41.9028, 12.4964),
-    "Barcelona": (41.3851, 2.1734),
-    "Amsterdam": (52.3676, 4.9041),
-    "Berlin": (52.5200, 13.4050),
-    "Vienna": (48.2082, 16.3738),
-    "Prague": (50.0755, 14.4378),
-    "Venice": (45.4408, 12.3155),
-    "Florence": (43.7696, 11.2558),
-    "Istanbul": (41.0082, 28.9784),
-    "Madrid": (40.4168, -3.7038),
-    "Lisbon": (38.7223, -9.1393),
-    "Dublin": (53.3498, -6.2603),
-    "Budapest": (47.4979, 19.0402),
-    "Athens": (37.9838, 23.7275),
-    "Edinburgh": (55.9533, -3.1883),
-    "Copenhagen": (55.6761, 12.5683),
-    "Stockholm": (59.3293, 18.0686),
-    "Brussels": (50.8503, 4.3517),
-    "Zurich": (47.3769, 8.5417),
-    "Milan": (45.4642, 9.1900),
-    "Munich": (48.1351, 11.5820),
-    "Seville": (37.3891, -5.9845),
-}
+# City data with coordinates (latitude, longitude), shared with route_table
+city_data = CITY_COORDINATES
 
 def calculate_distance(lat1, lon1, lat2, lon2):
     R = 6371  # Earth's radius in kilometers
@@ -335,69 +370,6 @@ def generate_hotel_booking(booking_id, user_id, user_name):
         room_type,
     )
 
-def create_database():
-    try:
-        os.remove("data/travel_bookings.db")
-    except OSError:
-        pass
-    conn = sqlite3.connect("data/travel_bookings.db")
-    cursor = conn.cursor()
-
-    cursor.execute(
-        """
-    CREATE TABLE IF NOT EXISTS users (
-        user_id INTEGER PRIMARY KEY,
-        name TEXT,
-        age INTEGER,
-        home_location TEXT
-    )
-    """
-    )
-
-    cursor.execute(
-        """
-    CREATE TABLE IF NOT EXISTS flight_bookings (
-        booking_id INTEGER PRIMARY KEY,
-        user_id INTEGER,
-        user_name TEXT,
-        origin TEXT,
-        destination TEXT,
-        price REAL,
-        flight_duration INTEGER,
-        departure_date TEXT,
-        departure_time TEXT,
-        arrival_date TEXT,
-        arrival_time TEXT,
-        distance REAL,
-        booking_date TEXT,
-        FOREIGN KEY (user_id) REFERENCES users (user_id)
-    )
-    """
-    )
-
-    cursor.execute(
-        """
-    CREATE TABLE IF NOT EXISTS hotel_bookings (
-        booking_id INTEGER PRIMARY KEY,
-        user_id INTEGER,
-        user_name TEXT,
-        city TEXT,
-        hotel_name TEXT,
-        check_in_date TEXT,
-        check_out_date TEXT,
-        nights INTEGER,
-        price_per_night REAL,
-        total_price REAL,
-        num_guests INTEGER,
-        room_type TEXT,
-        FOREIGN KEY (user_id) REFERENCES users (user_id)
-    )
-    """
-    )
-
-    conn.commit()
-    return conn, cursor
-
 def insert_sample_data(
     conn, cursor, num_users, num_flight_bookings, num_hotel_bookings
 ):